@@ -22,7 +22,7 @@ from abc import ABC, abstractmethod
 
 # Sync calls set weights and also resyncs the metagraph.
 from autoppia_web_agents_subnet.base.utils.config import check_config, add_args, config
-from autoppia_web_agents_subnet.base.utils.misc import _get_current_block_serialized, ttl_get_block
+from autoppia_web_agents_subnet.base.utils.block_clock import block_clock_for
 from autoppia_web_agents_subnet.utils.logging_filter import apply_subnet_module_logging_filters
 import time
 import traceback
@@ -60,11 +60,13 @@ class BaseNeuron(ABC):
     def block(self):
         return self.get_current_block()
 
+    @property
+    def block_clock(self):
+        return block_clock_for(self)
+
     def get_current_block(self, *, fresh: bool = False) -> int:
-        """Thread-safe block read. `fresh=True` bypasses TTL cache."""
-        if fresh:
-            return _get_current_block_serialized(self)
-        return ttl_get_block(self)
+        """Thread-safe block read through the shared block clock. `fresh=True` always reads the chain."""
+        return self.block_clock.get(fresh=fresh)
 
     def __init__(self, config=None):
         base_config = copy.deepcopy(config or BaseNeuron.config())
@@ -145,6 +147,8 @@ class BaseNeuron(ABC):
         # The wallet holds the cryptographic key pairs for the miner.
 
         self.wallet = bt.wallet(config=self.config)
+        # Create the shared block clock up front so background threads never race to build their own.
+        block_clock_for(self)
         while True:
             try:
                 bt.logging.info("Initializing subtensor and metagraph")
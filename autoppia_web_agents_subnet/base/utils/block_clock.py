@@ -0,0 +1,277 @@
+"""
+Shared block clock for a neuron.
+
+Every consumer of the current block (``neuron.block``, ``get_current_block``,
+the settlement/round waiters) goes through one BlockClock per neuron instead
+of polling the chain independently:
+
+- Observations come from a new-heads subscription when one is running
+  (``subscribe``) and otherwise from RPC reads, which are rate limited and
+  single-flighted so concurrent callers share one round trip.
+- Between observations the clock predicts the head from SECONDS_PER_BLOCK
+  (``predict`` / ``eta``); plain reads return the last observed block until
+  the next one is due, so they only hit the chain about once per block.
+- ``wait_for_block`` hands out futures that resolve as soon as an
+  observation reaches the target. While anyone is waiting, one poller per
+  event loop re-reads the chain shortly after each block is predicted to
+  land (backing off if it is late) rather than on a fixed 12s cadence.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+import bittensor as bt
+
+SECONDS_PER_BLOCK = 12.0
+
+
+class BlockClock:
+    def __init__(
+        self,
+        read_block: Callable[[], int],
+        *,
+        seconds_per_block: float = SECONDS_PER_BLOCK,
+        min_poll_interval_s: float = 1.0,
+        max_poll_interval_s: float = 60.0,
+        max_consecutive_errors: int = 5,
+        time_fn: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._read_block = read_block
+        self.seconds_per_block = float(seconds_per_block)
+        self.min_poll_interval_s = float(min_poll_interval_s)
+        self.max_poll_interval_s = float(max_poll_interval_s)
+        self.max_consecutive_errors = max(1, int(max_consecutive_errors))
+        self._time = time_fn
+
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._block: Optional[int] = None
+        self._changed_at = 0.0  # when the current head was first observed
+        self._observed_at = 0.0  # last observation of any kind
+        self._read_at = float("-inf")  # last RPC read
+        self._waiters: List[Tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._pollers: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+        self.subscribed = False
+        self._stop = threading.Event()
+        self._subscription_thread: Optional[threading.Thread] = None
+
+        self.reads = 0
+        self.heads = 0
+
+    # ── observations ────────────────────────────────────────────────────────
+
+    @property
+    def last_block(self) -> Optional[int]:
+        return self._block
+
+    def observe(self, block: int) -> int:
+        """Record a chain head (from any source) and wake waiters it satisfies; heads never go backwards."""
+        block = int(block)
+        now = self._time()
+        with self._lock:
+            if self._block is None or block > self._block:
+                self._block = block
+                self._changed_at = now
+            self._observed_at = now
+            current = self._block
+            due = [w for w in self._waiters if w[0] <= current]
+            if due:
+                self._waiters = [w for w in self._waiters if w[0] > current]
+        for _target, loop, fut in due:
+            _resolve(loop, fut, current)
+        return current
+
+    def refresh(self) -> int:
+        """Read the head from the chain; callers that queued behind an in-flight read reuse its result."""
+        generation = self.reads
+        with self._read_lock:
+            if self.reads != generation and self._block is not None:
+                return self._block
+            block = self._read_block()
+            self._read_at = self._time()
+            self.reads += 1
+        return self.observe(block)
+
+    def get(self, *, fresh: bool = False) -> int:
+        """Current block; reuses the last observation until the next block is due (or always reads when `fresh`)."""
+        if fresh or self._block is None or self._needs_read():
+            return self.refresh()
+        return self._block
+
+    def _needs_read(self) -> bool:
+        now = self._time()
+        if self.subscribed and now - self._observed_at < 2 * self.seconds_per_block:
+            return False
+        return now - self._changed_at >= self.seconds_per_block and now - self._read_at >= self.min_poll_interval_s
+
+    # ── prediction ──────────────────────────────────────────────────────────
+
+    def predict(self) -> int:
+        """Best guess of the current head without touching the chain."""
+        if self._block is None:
+            return self.get()
+        elapsed = max(0.0, self._time() - self._changed_at)
+        return self._block + int(elapsed // self.seconds_per_block)
+
+    def eta(self, target_block: int) -> float:
+        """Seconds until `target_block` is expected, from the last observed head."""
+        if self._block is None:
+            self.get()
+        remaining = (int(target_block) - self._block) * self.seconds_per_block - (self._time() - self._changed_at)
+        return max(0.0, remaining)
+
+    # ── waiting ─────────────────────────────────────────────────────────────
+
+    async def wait_for_block(self, target_block: int, *, timeout: Optional[float] = None) -> int:
+        """Resolve with the observed head once it reaches `target_block`; TimeoutError after `timeout` seconds."""
+        target_block = int(target_block)
+        current = self._block if self._block is not None else self.get()
+        if current >= target_block:
+            return current
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._lock:
+            self._waiters.append((target_block, loop, fut))
+        self._ensure_poller(loop)
+        try:
+            if timeout is None:
+                return await asyncio.shield(fut)
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        finally:
+            if not fut.done():
+                fut.cancel()
+            with self._lock:
+                self._waiters = [w for w in self._waiters if w[2] is not fut]
+
+    def _ensure_poller(self, loop: asyncio.AbstractEventLoop) -> None:
+        task = self._pollers.get(loop)
+        if task is None or task.done():
+            self._pollers[loop] = loop.create_task(self._poll(loop))
+
+    def _pending(self, loop: asyncio.AbstractEventLoop) -> List[int]:
+        with self._lock:
+            return [target for target, waiter_loop, fut in self._waiters if waiter_loop is loop and not fut.done()]
+
+    async def _poll(self, loop: asyncio.AbstractEventLoop) -> None:
+        misses = 0
+        errors = 0
+        try:
+            while True:
+                pending = self._pending(loop)
+                if not pending:
+                    return
+                await asyncio.sleep(self._next_poll_delay(min(pending), misses))
+                if not self._pending(loop):
+                    return
+                if self.subscribed and self._time() - self._observed_at < 2 * self.seconds_per_block:
+                    continue
+                before = self._block
+                try:
+                    after = self.refresh()
+                    errors = 0
+                except Exception as exc:
+                    errors += 1
+                    bt.logging.warning(f"Block clock read failed ({errors}/{self.max_consecutive_errors}): {exc}")
+                    if errors >= self.max_consecutive_errors:
+                        self._fail_waiters(loop, RuntimeError(f"Failed to read current block {errors} times in a row"), exc)
+                        return
+                    continue
+                misses = 0 if after != before else misses + 1
+        finally:
+            if self._pollers.get(loop) is asyncio.current_task():
+                self._pollers.pop(loop, None)
+
+    def _next_poll_delay(self, target_block: int, misses: int) -> float:
+        """Sleep until shortly after the next useful block is due; back off while the chain runs late."""
+        if self.subscribed:
+            return 2 * self.seconds_per_block
+        spb = self.seconds_per_block
+        until_target = (target_block - (self._block or 0)) * spb - (self._time() - self._changed_at)
+        if until_target > spb:
+            # Far away: sleep until about one block before the target, re-anchoring at least every max_poll_interval_s.
+            return min(until_target - spb, self.max_poll_interval_s)
+        slack = min(self.min_poll_interval_s * (2**misses), spb)
+        return max(until_target, 0.0) + slack
+
+    def _fail_waiters(self, loop: asyncio.AbstractEventLoop, error: BaseException, cause: BaseException) -> None:
+        error.__cause__ = cause
+        with self._lock:
+            failed = [w for w in self._waiters if w[1] is loop]
+            self._waiters = [w for w in self._waiters if w[1] is not loop]
+        for _target, _loop, fut in failed:
+            if not fut.done():
+                fut.set_exception(error)
+
+    # ── new-heads subscription ──────────────────────────────────────────────
+
+    def subscribe(self, substrate_factory: Callable[[], Any], *, name: str = "block-clock") -> None:
+        """
+        Follow new heads on a dedicated connection in a daemon thread.
+
+        `substrate_factory` must return a fresh substrate interface (its own
+        websocket; never the neuron's shared one) exposing
+        subscribe_block_headers. Reconnects with backoff; while disconnected
+        the clock falls back to polling.
+        """
+        if self._subscription_thread is not None and self._subscription_thread.is_alive():
+            return
+        self._stop.clear()
+        self._subscription_thread = threading.Thread(target=self._follow_heads, args=(substrate_factory,), name=name, daemon=True)
+        self._subscription_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.subscribed = False
+
+    def _follow_heads(self, substrate_factory: Callable[[], Any]) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                substrate = substrate_factory()
+
+                def on_head(obj, update_nr=None, subscription_id=None):
+                    self.heads += 1
+                    self.subscribed = True
+                    self.observe(int(obj["header"]["number"]))
+                    return True if self._stop.is_set() else None
+
+                substrate.subscribe_block_headers(on_head)
+                backoff = 1.0
+            except Exception as exc:
+                bt.logging.warning(f"Block clock head subscription dropped; polling until it reconnects: {exc}")
+            finally:
+                self.subscribed = False
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+
+def _resolve(loop: asyncio.AbstractEventLoop, fut: asyncio.Future, block: int) -> None:
+    def _set() -> None:
+        if not fut.done():
+            fut.set_result(block)
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        _set()
+    elif not loop.is_closed():
+        loop.call_soon_threadsafe(_set)
+
+
+def block_clock_for(neuron: Any) -> BlockClock:
+    """The neuron's BlockClock, created on first use and reading through its serialized subtensor access."""
+    clock = getattr(neuron, "_block_clock", None)
+    if not isinstance(clock, BlockClock):
+        from autoppia_web_agents_subnet.base.utils.misc import _get_current_block_serialized
+
+        clock = BlockClock(lambda: _get_current_block_serialized(neuron))
+        neuron._block_clock = clock
+    return clock
@@ -0,0 +1,226 @@
+"""
+Background metagraph refresh with atomically swapped snapshots.
+
+A MetagraphRefresher owns its own subtensor connection and re-fetches the
+metagraph in a daemon thread every `interval_blocks`. Each fetch is frozen
+into an immutable MetagraphSnapshot (read-only NumPy arrays plus tuples) and
+published with a single attribute assignment, so round phases read one
+consistent view without awaiting RPC and without seeing a half-synced
+metagraph. A failed refresh keeps the previous snapshot; `staleness()`
+reports how old it is.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import bittensor as bt
+import numpy as np
+
+from autoppia_web_agents_subnet.base.utils.block_clock import SECONDS_PER_BLOCK, BlockClock
+
+
+def _as_float(value: Any) -> float:
+    tao = getattr(value, "tao", None)
+    if tao is not None:
+        return float(tao)
+    try:
+        return float(value)
+    except Exception:
+        return 0.0
+
+
+def _frozen(values, dtype) -> np.ndarray:
+    arr = np.array(values, dtype=dtype)
+    arr.flags.writeable = False
+    return arr
+
+
+@dataclass(frozen=True)
+class MetagraphSnapshot:
+    """Read-only view of the metagraph fields the round phases use (same attribute names as bt.metagraph)."""
+
+    block: int
+    uids: np.ndarray
+    hotkeys: Tuple[str, ...]
+    coldkeys: Tuple[str, ...]
+    stake: np.ndarray
+    axons: Tuple[Any, ...]
+    taken_at: float = field(default_factory=time.monotonic)
+    _uid_by_hotkey: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_metagraph(cls, metagraph: Any, *, block: int) -> "MetagraphSnapshot":
+        hotkeys = tuple(str(hk) for hk in (getattr(metagraph, "hotkeys", None) or ()))
+        n = len(hotkeys)
+        uids = getattr(metagraph, "uids", None)
+        stake = getattr(metagraph, "stake", None)
+        if stake is None:
+            stake = getattr(metagraph, "S", None)
+        return cls(
+            block=int(block),
+            uids=_frozen(list(uids) if uids is not None else range(n), np.int64),
+            hotkeys=hotkeys,
+            coldkeys=tuple(str(ck) for ck in (getattr(metagraph, "coldkeys", None) or ())),
+            stake=_frozen([_as_float(s) for s in stake] if stake is not None else [0.0] * n, np.float64),
+            axons=tuple(getattr(metagraph, "axons", None) or ()),
+            _uid_by_hotkey={hk: uid for uid, hk in enumerate(hotkeys)},
+        )
+
+    @property
+    def n(self) -> int:
+        return len(self.hotkeys)
+
+    @property
+    def S(self) -> np.ndarray:
+        return self.stake
+
+    def uid_for_hotkey(self, hotkey: str) -> Optional[int]:
+        return self._uid_by_hotkey.get(hotkey)
+
+    def age_s(self) -> float:
+        return max(0.0, time.monotonic() - self.taken_at)
+
+
+class MetagraphRefresher:
+    def __init__(
+        self,
+        subtensor_factory: Callable[[], Any],
+        *,
+        netuid: int,
+        interval_blocks: int,
+        block_clock: Optional[BlockClock] = None,
+        seconds_per_block: float = SECONDS_PER_BLOCK,
+        max_backoff_s: float = 300.0,
+    ) -> None:
+        self._subtensor_factory = subtensor_factory
+        self._subtensor: Any = None
+        self.netuid = int(netuid)
+        self.interval_blocks = max(1, int(interval_blocks))
+        self.block_clock = block_clock
+        self.seconds_per_block = float(block_clock.seconds_per_block if block_clock is not None else seconds_per_block)
+        self.max_backoff_s = float(max_backoff_s)
+
+        self._snapshot: Optional[MetagraphSnapshot] = None
+        self._metagraph: Any = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def snapshot(self) -> Optional[MetagraphSnapshot]:
+        return self._snapshot
+
+    @property
+    def metagraph(self) -> Any:
+        """The bt.metagraph object behind the current snapshot; never mutated after it is published."""
+        return self._metagraph
+
+    def adopt(self, metagraph: Any, *, block: int) -> MetagraphSnapshot:
+        """Publish an already fetched metagraph (e.g. the one built at startup)."""
+        snapshot = MetagraphSnapshot.from_metagraph(metagraph, block=block)
+        self._metagraph = metagraph
+        self._snapshot = snapshot
+        return snapshot
+
+    def refresh(self) -> MetagraphSnapshot:
+        """Fetch the metagraph on the refresher's own connection and swap it in."""
+        try:
+            if self._subtensor is None:
+                self._subtensor = self._subtensor_factory()
+            metagraph = self._subtensor.metagraph(self.netuid)
+            block = getattr(metagraph, "block", None)
+            block = int(block) if block is not None and int(block) > 0 else int(self._subtensor.get_current_block())
+        except Exception as exc:
+            # Drop the connection; the next attempt reconnects.
+            self._subtensor = None
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            raise
+        snapshot = self.adopt(metagraph, block=block)
+        self.refreshes += 1
+        self.consecutive_failures = 0
+        self.last_error = None
+        return snapshot
+
+    def staleness(self, current_block: Optional[int] = None) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if current_block is None and self.block_clock is not None and self.block_clock.last_block is not None:
+            current_block = self.block_clock.predict()
+        return {
+            "block": snapshot.block if snapshot else None,
+            "age_blocks": (max(0, int(current_block) - snapshot.block) if snapshot and current_block is not None else None),
+            "age_s": snapshot.age_s() if snapshot else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def is_stale(self, current_block: Optional[int] = None) -> bool:
+        """True once the snapshot has missed more than one scheduled refresh."""
+        info = self.staleness(current_block)
+        if info["block"] is None:
+            return True
+        if info["age_blocks"] is not None:
+            return info["age_blocks"] > 2 * self.interval_blocks
+        return info["age_s"] > 2 * self.interval_blocks * self.seconds_per_block
+
+    def _next_delay(self) -> float:
+        if self.consecutive_failures:
+            return min(self.seconds_per_block * (2 ** min(self.consecutive_failures, 10)), self.max_backoff_s)
+        snapshot = self._snapshot
+        if snapshot is not None and self.block_clock is not None and self.block_clock.last_block is not None:
+            return max(self.block_clock.eta(snapshot.block + self.interval_blocks), self.seconds_per_block)
+        return self.interval_blocks * self.seconds_per_block
+
+    def start(self, *, name: str = "metagraph-refresher") -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        if self._snapshot is not None:
+            self._stop.wait(self._next_delay())
+        while not self._stop.is_set():
+            try:
+                snapshot = self.refresh()
+                bt.logging.debug(f"Metagraph snapshot refreshed at block {snapshot.block} (n={snapshot.n})")
+            except Exception as exc:
+                bt.logging.warning(f"Metagraph refresh failed ({self.consecutive_failures} in a row); keeping snapshot from block {self._snapshot.block if self._snapshot else '-'}: {exc}")
+            self._stop.wait(self._next_delay())
+
+
+def metagraph_view(neuron: Any) -> Any:
+    """Latest refreshed snapshot when the neuron runs a MetagraphRefresher, else its live metagraph."""
+    refresher = getattr(neuron, "metagraph_refresher", None)
+    if isinstance(refresher, MetagraphRefresher) and refresher.snapshot is not None:
+        return refresher.snapshot
+    return getattr(neuron, "metagraph", None)
+
+
+def log_metagraph_staleness(neuron: Any, phase: str) -> None:
+    """Log which metagraph snapshot `phase` is using; warns when refreshes have fallen behind."""
+    refresher = getattr(neuron, "metagraph_refresher", None)
+    if not isinstance(refresher, MetagraphRefresher) or refresher.snapshot is None:
+        return
+    info = refresher.staleness()
+    message = f"Metagraph snapshot for {phase}: block {info['block']} ({info['age_blocks']} blocks, {info['age_s']:.0f}s old)"
+    if refresher.is_stale():
+        bt.logging.warning(f"{message}; refresh is behind (last error: {info['last_error']})")
+    else:
+        bt.logging.info(message)
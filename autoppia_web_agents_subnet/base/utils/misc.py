@@ -88,29 +88,6 @@ def _ttl_hash_gen(seconds: int):
         yield floor((time.time() - start_time) / seconds)
 
 
-# 12 seconds updating block.
-@ttl_cache(maxsize=1, ttl=12)
-def ttl_get_block(self) -> int:
-    """
-    Retrieves the current block number from the blockchain. This method is cached with a time-to-live (TTL)
-    of 12 seconds, meaning that it will only refresh the block number from the blockchain at most every 12 seconds,
-    reducing the number of calls to the underlying blockchain interface.
-
-    Returns:
-        int: The current block number on the blockchain.
-
-    This method is useful for applications that need to access the current block number frequently and can
-    tolerate a delay of up to 12 seconds for the latest information. By using a cache with TTL, the method
-    efficiently reduces the workload on the blockchain interface.
-
-    Example:
-        current_block = ttl_get_block(self)
-
-    Note: self here is the miner or validator instance
-    """
-    return _get_current_block_serialized(self)
-
-
 def _get_current_block_serialized(self) -> int:
     """
     Read current block under a per-instance lock to avoid concurrent websocket recv().
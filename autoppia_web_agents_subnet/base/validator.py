@@ -27,6 +27,7 @@ import bittensor as bt
 from typing import List, Sequence, Union
 from traceback import print_exception
 from autoppia_web_agents_subnet.base.neuron import BaseNeuron
+from autoppia_web_agents_subnet.base.utils.metagraph_snapshot import MetagraphRefresher
 from autoppia_web_agents_subnet.base.utils.weight_utils import (
     process_weights_for_netuid,
     convert_weights_and_uids_for_emit,
@@ -323,8 +324,15 @@ class BaseValidatorNeuron(BaseNeuron):
         # Copies state of metagraph before syncing.
         previous_metagraph = copy.deepcopy(self.metagraph)
 
-        # Sync the metagraph.
-        self.metagraph.sync(subtensor=self.subtensor)
+        # Adopt the background refresher's latest metagraph instead of syncing
+        # inline; nothing to do if it has not produced a new one since.
+        refresher = getattr(self, "metagraph_refresher", None)
+        if isinstance(refresher, MetagraphRefresher) and refresher.metagraph is not None:
+            if refresher.metagraph is self.metagraph:
+                return
+            self.metagraph = refresher.metagraph
+        else:
+            self.metagraph.sync(subtensor=self.subtensor)
 
         # Check if the metagraph axon info has changed.
         if previous_metagraph.axons == self.metagraph.axons:
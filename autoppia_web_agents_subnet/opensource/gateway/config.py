@@ -5,6 +5,17 @@ load_dotenv()
 
 COST_LIMIT_PER_TASK = float(os.getenv("COST_LIMIT_PER_TASK", "10.0"))
 
+# Pre-flight budget check: estimate prompt cost before forwarding and reject
+# calls that would exceed the task's remaining budget (HTTP 402).
+GATEWAY_PREFLIGHT_COST_CHECK = os.getenv("GATEWAY_PREFLIGHT_COST_CHECK", "true").lower() == "true"
+# Characters per prompt token used by the estimator (higher = more lenient).
+GATEWAY_PREFLIGHT_CHARS_PER_TOKEN = float(os.getenv("GATEWAY_PREFLIGHT_CHARS_PER_TOKEN", "4.0"))
+# Fraction of the estimated prompt cost that must fit in the remaining budget;
+# below 1.0 leaves headroom for estimator error and prompt caching discounts.
+GATEWAY_PREFLIGHT_SAFETY_FACTOR = float(os.getenv("GATEWAY_PREFLIGHT_SAFETY_FACTOR", "0.8"))
+# If true, also reserve the full max_tokens output cost (stricter than "provably over budget").
+GATEWAY_PREFLIGHT_RESERVE_OUTPUT = os.getenv("GATEWAY_PREFLIGHT_RESERVE_OUTPUT", "false").lower() == "true"
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHUTES_API_KEY = os.getenv("CHUTES_API_KEY")
 
@@ -56,6 +67,33 @@ GATEWAY_FORCE_JSON_RESPONSE_FORMAT = os.getenv("GATEWAY_FORCE_JSON_RESPONSE_FORM
 GATEWAY_OPENAI_MAX_CONCURRENCY = int(os.getenv("GATEWAY_OPENAI_MAX_CONCURRENCY", "2"))
 GATEWAY_CHUTES_MAX_CONCURRENCY = int(os.getenv("GATEWAY_CHUTES_MAX_CONCURRENCY", "8"))
 
+# Adaptive (AIMD) upstream concurrency per provider+model. The per-provider
+# limits above are the starting point; the limit then grows while the upstream
+# answers quickly and is cut multiplicatively on 429s or slow responses.
+# Set to false to keep fixed per-provider limits.
+GATEWAY_ADAPTIVE_CONCURRENCY = os.getenv("GATEWAY_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+GATEWAY_ADAPTIVE_MIN_CONCURRENCY = int(os.getenv("GATEWAY_ADAPTIVE_MIN_CONCURRENCY", "1"))
+GATEWAY_ADAPTIVE_MAX_CONCURRENCY = int(os.getenv("GATEWAY_ADAPTIVE_MAX_CONCURRENCY", "32"))
+GATEWAY_ADAPTIVE_INCREASE_STEP = float(os.getenv("GATEWAY_ADAPTIVE_INCREASE_STEP", "1.0"))
+GATEWAY_ADAPTIVE_DECREASE_FACTOR = float(os.getenv("GATEWAY_ADAPTIVE_DECREASE_FACTOR", "0.5"))
+# Successful responses slower than this are treated as a congestion signal (0 disables).
+GATEWAY_ADAPTIVE_LATENCY_TARGET_S = float(os.getenv("GATEWAY_ADAPTIVE_LATENCY_TARGET_S", "25"))
+
+# Opt-in hedging for Chutes chat completions: if the primary upstream has not
+# answered after its rolling p95 latency, send a duplicate to this alternate
+# OpenAI-compatible base URL (it receives CHUTES_API_KEY). First usable response
+# wins; the other call is cancelled and never billed. Empty disables hedging.
+GATEWAY_CHUTES_HEDGE_BASE_URL = (os.getenv("GATEWAY_CHUTES_HEDGE_BASE_URL") or "").strip()
+GATEWAY_HEDGE_QUANTILE = float(os.getenv("GATEWAY_HEDGE_QUANTILE", "0.95"))
+# Until this many samples exist, GATEWAY_HEDGE_INITIAL_DELAY_S is used instead.
+GATEWAY_HEDGE_MIN_SAMPLES = int(os.getenv("GATEWAY_HEDGE_MIN_SAMPLES", "20"))
+GATEWAY_HEDGE_INITIAL_DELAY_S = float(os.getenv("GATEWAY_HEDGE_INITIAL_DELAY_S", "10"))
+GATEWAY_HEDGE_MIN_DELAY_S = float(os.getenv("GATEWAY_HEDGE_MIN_DELAY_S", "0.5"))
+GATEWAY_HEDGE_MAX_DELAY_S = float(os.getenv("GATEWAY_HEDGE_MAX_DELAY_S", "30"))
+# Rolling window (number of responses) for per-upstream latency stats.
+GATEWAY_LATENCY_WINDOW = int(os.getenv("GATEWAY_LATENCY_WINDOW", "200"))
+
 # Upstream retry policy (best-effort) for transient errors.
 GATEWAY_UPSTREAM_MAX_RETRIES = int(os.getenv("GATEWAY_UPSTREAM_MAX_RETRIES", "2"))
 GATEWAY_UPSTREAM_RETRY_BASE_DELAY_S = float(os.getenv("GATEWAY_UPSTREAM_RETRY_BASE_DELAY_S", "0.5"))
+GATEWAY_UPSTREAM_RETRY_MAX_DELAY_S = float(os.getenv("GATEWAY_UPSTREAM_RETRY_MAX_DELAY_S", "8"))
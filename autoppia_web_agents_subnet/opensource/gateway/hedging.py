@@ -0,0 +1,111 @@
+import asyncio
+import math
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of upstream latencies (seconds) plus outcome counters."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=max(1, int(window)))
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.wins = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, latency_s: float) -> None:
+        self.requests += 1
+        self._samples.append(float(latency_s))
+
+    def observe_error(self) -> None:
+        self.requests += 1
+        self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Nearest-rank quantile over the window, or None with no samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[idx]
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "requests": self.requests,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "wins": self.wins,
+            "p50_s": self.quantile(0.50),
+            "p95_s": self.quantile(0.95),
+            "p99_s": self.quantile(0.99),
+        }
+
+
+def hedge_delay(
+    tracker: LatencyTracker,
+    *,
+    quantile: float,
+    min_samples: int,
+    initial_delay_s: float,
+    min_delay_s: float,
+    max_delay_s: float,
+) -> float:
+    """
+    Delay before sending the hedged duplicate.
+
+    Uses the primary upstream's rolling latency quantile once enough samples
+    exist, so only the slowest ~(1 - quantile) of requests get duplicated.
+    """
+    observed = tracker.quantile(quantile) if len(tracker) >= max(1, int(min_samples)) else None
+    delay = initial_delay_s if observed is None else observed
+    return min(max(delay, min_delay_s), max_delay_s)
+
+
+async def race_hedged(
+    primary: Callable[[], Awaitable[T]],
+    hedge: Callable[[], Awaitable[T]],
+    *,
+    delay_s: float,
+    is_usable: Callable[[T], bool],
+) -> tuple[T, bool]:
+    """
+    Run `primary`; if it has not finished after `delay_s`, also run `hedge`.
+
+    Returns (result, hedge_won). The first usable result wins and the other call
+    is cancelled. If the primary finishes before the hedge is launched its
+    result (or exception) is returned as-is. When neither result is usable the
+    primary's outcome is preferred so retry handling sees the same errors as an
+    unhedged call.
+    """
+    primary_task = asyncio.ensure_future(primary())
+    hedge_task: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=max(0.0, delay_s))
+        if done:
+            return primary_task.result(), False
+
+        hedge_task = asyncio.ensure_future(hedge())
+        pending = {primary_task, hedge_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both complete in the same loop iteration.
+            for task in sorted(done, key=lambda t: t is not primary_task):
+                if task.exception() is None and is_usable(task.result()):
+                    return task.result(), task is hedge_task
+        if primary_task.exception() is None or hedge_task.exception() is not None:
+            return primary_task.result(), False
+        return hedge_task.result(), True
+    finally:
+        # Also reached when the caller is cancelled during the hedge delay.
+        tasks = [task for task in (primary_task, hedge_task) if task is not None]
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
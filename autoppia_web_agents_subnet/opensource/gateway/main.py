@@ -2,7 +2,6 @@ import asyncio
 import json
 import logging
 import os
-import random
 import time
 from typing import Optional
 from logging.handlers import RotatingFileHandler
@@ -12,8 +11,16 @@ from fastapi import FastAPI, Request, HTTPException, Response
 import secrets
 
 from models import LLMUsage, DEFAULT_PROVIDER_CONFIGS
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, GatewayMetrics
+from rate_limit import UpstreamLimiters, jittered_backoff, parse_retry_after
+from hedging import LatencyTracker, hedge_delay, race_hedged
+from preflight import estimate_prompt_tokens, requested_max_output_tokens
 from config import (
     COST_LIMIT_PER_TASK,
+    GATEWAY_PREFLIGHT_COST_CHECK,
+    GATEWAY_PREFLIGHT_CHARS_PER_TOKEN,
+    GATEWAY_PREFLIGHT_SAFETY_FACTOR,
+    GATEWAY_PREFLIGHT_RESERVE_OUTPUT,
     OPENAI_API_KEY,
     CHUTES_API_KEY,
     SANDBOX_GATEWAY_ADMIN_TOKEN,
@@ -28,8 +35,22 @@ from config import (
     GATEWAY_FORCE_JSON_RESPONSE_FORMAT,
     GATEWAY_OPENAI_MAX_CONCURRENCY,
     GATEWAY_CHUTES_MAX_CONCURRENCY,
+    GATEWAY_ADAPTIVE_CONCURRENCY,
+    GATEWAY_ADAPTIVE_MIN_CONCURRENCY,
+    GATEWAY_ADAPTIVE_MAX_CONCURRENCY,
+    GATEWAY_ADAPTIVE_INCREASE_STEP,
+    GATEWAY_ADAPTIVE_DECREASE_FACTOR,
+    GATEWAY_ADAPTIVE_LATENCY_TARGET_S,
+    GATEWAY_CHUTES_HEDGE_BASE_URL,
+    GATEWAY_HEDGE_QUANTILE,
+    GATEWAY_HEDGE_MIN_SAMPLES,
+    GATEWAY_HEDGE_INITIAL_DELAY_S,
+    GATEWAY_HEDGE_MIN_DELAY_S,
+    GATEWAY_HEDGE_MAX_DELAY_S,
+    GATEWAY_LATENCY_WINDOW,
     GATEWAY_UPSTREAM_MAX_RETRIES,
     GATEWAY_UPSTREAM_RETRY_BASE_DELAY_S,
+    GATEWAY_UPSTREAM_RETRY_MAX_DELAY_S,
 )
 
 logging.basicConfig(
@@ -37,7 +58,7 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[
         RotatingFileHandler(
-            "/app/logs/gateway.log",
+            os.path.join(os.getenv("SANDBOX_GATEWAY_LOG_DIR", "/app/logs"), "gateway.log"),
             maxBytes=int(os.getenv("SANDBOX_GATEWAY_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
             backupCount=int(os.getenv("SANDBOX_GATEWAY_LOG_BACKUP_COUNT", "3")),
         ),
@@ -63,11 +84,23 @@ class LLMGateway:
         self.usage_per_task: dict[str, LLMUsage] = {}
         self._chutes_pricing_lock = asyncio.Lock()
         self._chutes_pricing_last_refresh = 0.0
-        # Best-effort upstream concurrency limits to reduce 429s.
-        self._provider_semaphores = {
-            "openai": asyncio.Semaphore(max(1, int(GATEWAY_OPENAI_MAX_CONCURRENCY))),
-            "chutes": asyncio.Semaphore(max(1, int(GATEWAY_CHUTES_MAX_CONCURRENCY))),
-        }
+        # Upstream concurrency limits (AIMD per provider+model) to reduce 429s.
+        self.upstream_limiters = UpstreamLimiters(
+            initial_limits={
+                "openai": GATEWAY_OPENAI_MAX_CONCURRENCY,
+                "chutes": GATEWAY_CHUTES_MAX_CONCURRENCY,
+            },
+            adaptive=GATEWAY_ADAPTIVE_CONCURRENCY,
+            min_limit=GATEWAY_ADAPTIVE_MIN_CONCURRENCY,
+            max_limit=GATEWAY_ADAPTIVE_MAX_CONCURRENCY,
+            increase_step=GATEWAY_ADAPTIVE_INCREASE_STEP,
+            decrease_factor=GATEWAY_ADAPTIVE_DECREASE_FACTOR,
+            latency_target_s=GATEWAY_ADAPTIVE_LATENCY_TARGET_S,
+        )
+        # Rolling latency per upstream base URL; drives the hedge delay.
+        self.upstream_latency: dict[str, LatencyTracker] = {}
+        self.chutes_hedge_base_url = GATEWAY_CHUTES_HEDGE_BASE_URL
+        self.metrics = GatewayMetrics(self)
 
     def _maybe_force_json_response_format(self, provider: str, suffix: str, body: dict) -> tuple[dict, bool]:
         """
@@ -91,6 +124,77 @@ class LLMGateway:
         b2["response_format"] = {"type": "json_object"}
         return b2, True
 
+    def _latency_tracker(self, upstream: str) -> LatencyTracker:
+        tracker = self.upstream_latency.get(upstream)
+        if tracker is None:
+            tracker = self.upstream_latency[upstream] = LatencyTracker(window=GATEWAY_LATENCY_WINDOW)
+        return tracker
+
+    def _hedge_base_url(self, provider: str, suffix: str, method: str) -> Optional[str]:
+        # Only chat completions are hedged: they have no server-side state, so a
+        # duplicate can be dropped without side effects.
+        if provider != "chutes" or method != "POST" or suffix != "/v1/chat/completions":
+            return None
+        return self.chutes_hedge_base_url or None
+
+    async def _timed_request(self, upstream: str, method: str, url: str, headers: dict, params, content: bytes) -> httpx.Response:
+        tracker = self._latency_tracker(upstream)
+        started = time.monotonic()
+        try:
+            response = await self.http_client.request(method=method, url=url, headers=headers, params=params, content=content)
+        except asyncio.CancelledError:
+            tracker.cancelled += 1
+            raise
+        except Exception:
+            tracker.observe_error()
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            tracker.observe_error()
+        else:
+            tracker.observe(time.monotonic() - started)
+        return response
+
+    async def send_upstream(self, provider: str, suffix: str, method: str, headers: dict, params, content: bytes) -> httpx.Response:
+        """
+        Send one upstream attempt, hedged to the alternate base URL when configured.
+
+        The hedged duplicate does not take a concurrency slot: it goes to a
+        different upstream than the one the limiter is protecting.
+        """
+        primary_base = self.providers[provider].base_url
+        url = _upstream_url(primary_base, suffix)
+        hedge_base = self._hedge_base_url(provider, suffix, method)
+        if not hedge_base:
+            return await self._timed_request(primary_base, method, url, headers, params, content)
+
+        delay = hedge_delay(
+            self._latency_tracker(primary_base),
+            quantile=GATEWAY_HEDGE_QUANTILE,
+            min_samples=GATEWAY_HEDGE_MIN_SAMPLES,
+            initial_delay_s=GATEWAY_HEDGE_INITIAL_DELAY_S,
+            min_delay_s=GATEWAY_HEDGE_MIN_DELAY_S,
+            max_delay_s=GATEWAY_HEDGE_MAX_DELAY_S,
+        )
+        hedge_url = _upstream_url(hedge_base, suffix)
+        hedged = False
+
+        async def _hedge() -> httpx.Response:
+            nonlocal hedged
+            hedged = True
+            return await self._timed_request(hedge_base, method, hedge_url, headers, params, content)
+
+        response, hedge_won = await race_hedged(
+            lambda: self._timed_request(primary_base, method, url, headers, params, content),
+            _hedge,
+            delay_s=delay,
+            is_usable=lambda r: r.status_code != 429 and r.status_code < 500,
+        )
+        if hedged:
+            self._latency_tracker(hedge_base if hedge_won else primary_base).wins += 1
+            self.metrics.hedges.inc(provider, "hedge" if hedge_won else "primary")
+            logger.info(f"Hedged {provider} request after {delay:.2f}s; winner={'hedge' if hedge_won else 'primary'}")
+        return response
+
     def detect_provider(self, path: str) -> Optional[str]:
         """Detect LLM provider from request."""
         for provider in self.providers.keys():
@@ -149,6 +253,61 @@ class LLMGateway:
                 best_key = key
         return best_key or model
 
+    def _model_prices(self, provider: str, model: str) -> tuple[str, float, float, float]:
+        """Return (pricing_model, input, cached_input, output) prices in USD per 1M tokens."""
+        provider_config = self.providers[provider]
+        pricing_model = self._resolve_pricing_model(provider, model)
+        pricing = provider_config.pricing.get(pricing_model, {})
+        input_price = float(pricing.get("input", provider_config.default_input_price))
+        cached_input_price = float(pricing.get("input_cache_read", input_price))
+        output_price = float(pricing.get("output", provider_config.default_output_price))
+        return pricing_model, input_price, cached_input_price, output_price
+
+    def estimate_request_cost(self, provider: str, suffix: str, model: str, body: dict) -> dict:
+        """
+        Estimate the cost of a request before it is forwarded.
+
+        `min_cost` is the (safety-discounted) prompt cost alone; `max_cost` adds the
+        full `max_tokens` output cost when the agent set one.
+        """
+        _, input_price, _, output_price = self._model_prices(provider, model)
+        prompt_tokens = estimate_prompt_tokens(suffix, body, chars_per_token=GATEWAY_PREFLIGHT_CHARS_PER_TOKEN)
+        max_output_tokens = requested_max_output_tokens(body)
+        prompt_cost = (prompt_tokens / 1_000_000) * input_price
+        min_cost = prompt_cost * max(0.0, GATEWAY_PREFLIGHT_SAFETY_FACTOR)
+        max_cost = None
+        if max_output_tokens is not None:
+            max_cost = prompt_cost + (max_output_tokens / 1_000_000) * output_price
+        return {
+            "estimated_prompt_tokens": prompt_tokens,
+            "max_output_tokens": max_output_tokens,
+            "min_cost": min_cost,
+            "max_cost": max_cost,
+        }
+
+    def preflight_budget_error(self, provider: str, suffix: str, task_id: str, model: str, body: dict) -> Optional[dict]:
+        """Return a structured error if the request cannot fit in the task's remaining budget."""
+        estimate = self.estimate_request_cost(provider, suffix, model, body)
+        remaining = COST_LIMIT_PER_TASK - self.get_usage_for_task(task_id).total_cost
+        required = estimate["min_cost"]
+        if GATEWAY_PREFLIGHT_RESERVE_OUTPUT and estimate["max_cost"] is not None:
+            required = estimate["max_cost"]
+        if required <= remaining:
+            return None
+        return {
+            "error": {
+                "type": "budget_exceeded",
+                "code": "preflight_cost_limit",
+                "message": f"Estimated request cost ${required:.4f} exceeds remaining task budget ${max(0.0, remaining):.4f}",
+                "model": model,
+                "estimated_prompt_tokens": estimate["estimated_prompt_tokens"],
+                "max_output_tokens": estimate["max_output_tokens"],
+                "estimated_cost": round(required, 6),
+                "remaining_budget": round(max(0.0, remaining), 6),
+                "cost_limit": COST_LIMIT_PER_TASK,
+            }
+        }
+
     async def refresh_chutes_pricing(self) -> bool:
         """
         Fetch Chutes model pricing from the public OpenAI-compatible models endpoint.
@@ -287,13 +446,7 @@ class LLMGateway:
             cached_input_tokens = input_tokens
 
         model = str(response_data.get("model", "") or "")
-        provider_config = self.providers[provider]
-        pricing_model = self._resolve_pricing_model(provider, model)
-        pricing = provider_config.pricing.get(pricing_model, {})
-
-        input_price = float(pricing.get("input", provider_config.default_input_price))
-        cached_input_price = float(pricing.get("input_cache_read", input_price))
-        output_price = float(pricing.get("output", provider_config.default_output_price))
+        pricing_model, input_price, cached_input_price, output_price = self._model_prices(provider, model)
 
         non_cached_input_tokens = max(0, input_tokens - cached_input_tokens)
         input_cost = (non_cached_input_tokens / 1_000_000) * input_price
@@ -302,6 +455,10 @@ class LLMGateway:
         total_cost = input_cost + cached_input_cost + output_cost
 
         self.usage_per_task[task_id].add_usage(provider, model, total_tokens, total_cost)
+        metric_model = pricing_model if pricing_model in self.providers[provider].pricing else "other"
+        self.metrics.tokens.inc(provider, metric_model, "in", amount=input_tokens)
+        self.metrics.tokens.inc(provider, metric_model, "out", amount=output_tokens)
+        self.metrics.cost.inc(provider, metric_model, amount=total_cost)
         logger.info(f"Updated usage for task: {task_id}")
         if pricing_model and pricing_model != model:
             logger.info(f"Provider: {provider} | Model: {model} (priced_as={pricing_model}) | Tokens: {total_tokens} | Cost: {total_cost}")
@@ -320,6 +477,13 @@ class LLMGateway:
         return self.usage_per_task[task_id].total_cost >= COST_LIMIT_PER_TASK
 
 
+def _upstream_url(base_url: str, suffix: str) -> str:
+    # Scheme/host always come from trusted config; the path is the validated suffix.
+    # This prevents authority-section injection like "https://api.openai.com@evil.com/..." .
+    base = httpx.URL(base_url)
+    return str(base.copy_with(raw_path=suffix.encode("utf-8") if suffix else b""))
+
+
 def _looks_like_unsupported_response_format(resp: httpx.Response) -> bool:
     try:
         payload = resp.json()
@@ -406,6 +570,23 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics(request: Request):
+    """Prometheus metrics (admin-only, like the other validator endpoints)."""
+    _require_admin(request)
+    return Response(content=gateway.metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/upstream-stats")
+async def upstream_stats(request: Request):
+    """Rolling latency and concurrency state per upstream (admin-only)."""
+    _require_admin(request)
+    return {
+        "latency": {upstream: tracker.snapshot() for upstream, tracker in gateway.upstream_latency.items()},
+        "limiters": gateway.upstream_limiters.snapshot(),
+    }
+
+
 @app.get("/usage/{task_id}")
 async def get_usage_for_task(task_id: str, request: Request):
     """Get usage for a specific task ID"""
@@ -438,11 +619,31 @@ async def set_allowed_task_ids(request: Request):
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_request(request: Request, path: str):
     """Main proxy endpoint for LLM requests"""
+    started = time.monotonic()
+    # Filled in by _proxy_request once provider/model are validated, so metric
+    # label values never come straight from untrusted input.
+    labels = {"provider": "", "model": ""}
+    status_code = 500
+    try:
+        response = await _proxy_request(request, path, labels)
+        status_code = response.status_code
+        return response
+    except HTTPException as exc:
+        status_code = exc.status_code
+        raise
+    finally:
+        gateway.metrics.requests.inc(labels["provider"], labels["model"], str(status_code))
+        if labels["provider"]:
+            gateway.metrics.request_latency.observe(time.monotonic() - started, labels["provider"], labels["model"])
+
+
+async def _proxy_request(request: Request, path: str, labels: dict) -> Response:
     try:
         # Detect provider
         provider = gateway.detect_provider(path)
         if not provider:
             raise HTTPException(status_code=400, detail="Unsupported provider!")
+        labels["provider"] = provider
 
         # Detect task ID for usage tracking
         task_id = gateway.detect_task_id(request)
@@ -466,11 +667,6 @@ async def proxy_request(request: Request, path: str):
         # Ensure pricing is loaded (Chutes) before we validate model/price.
         await gateway.ensure_provider_pricing(provider)
 
-        # Build upstream URL ensuring the scheme/host always come from the trusted provider config.
-        # This prevents authority-section injection like "https://api.openai.com@evil.com/..." .
-        base = httpx.URL(provider_config.base_url)
-        url = str(base.copy_with(raw_path=suffix.encode("utf-8") if suffix else b""))
-
         # Forward the request
         headers = {}
         headers["Content-Type"] = "application/json"
@@ -503,6 +699,7 @@ async def proxy_request(request: Request, path: str):
                 raise HTTPException(status_code=400, detail="Streaming is not supported")
 
         # Enforce per-provider model allowlist and (optionally) strict pricing.
+        model = ""
         if request.method in ("POST", "PUT", "PATCH"):
             model = str(parsed_body.get("model") or "")
             if not model:
@@ -515,6 +712,17 @@ async def proxy_request(request: Request, path: str):
                 # conservative defaults rather than hard-fail the task.
                 if (provider != "chutes" or provider_config.pricing) and pricing_model not in provider_config.pricing:
                     raise HTTPException(status_code=400, detail="Missing pricing for model")
+            # Unpriced models share one label so request bodies cannot grow the series count.
+            pricing_model = gateway._resolve_pricing_model(provider, model)
+            labels["model"] = pricing_model if pricing_model in provider_config.pricing else "other"
+            # Reject calls whose prompt alone cannot fit in the remaining budget,
+            # before paying for an upstream round trip.
+            if GATEWAY_PREFLIGHT_COST_CHECK:
+                budget_error = gateway.preflight_budget_error(provider, suffix, task_id, model, parsed_body)
+                if budget_error:
+                    logger.warning(f"Pre-flight budget rejection (task_id={task_id}): {budget_error['error']['message']}")
+                    gateway.metrics.preflight_rejections.inc(provider)
+                    raise HTTPException(status_code=402, detail=budget_error)
 
         upstream_body = body
         forced_response_format = False
@@ -529,28 +737,35 @@ async def proxy_request(request: Request, path: str):
         # NOTE: max_retries counts additional tries after the initial attempt.
         max_retries = max(0, int(GATEWAY_UPSTREAM_MAX_RETRIES))
         base_delay = max(0.0, float(GATEWAY_UPSTREAM_RETRY_BASE_DELAY_S))
+        max_delay = max(base_delay, float(GATEWAY_UPSTREAM_RETRY_MAX_DELAY_S))
         attempted_without_response_format = False
 
-        sem = gateway._provider_semaphores.get(provider) or asyncio.Semaphore(10_000)
+        limiter = gateway.upstream_limiters.get(provider, model)
 
         last_exc: Exception | None = None
         response: httpx.Response | None = None
         attempt = 0
 
         while True:
+            retry_after_s = 0.0
+            waited = await limiter.acquire(task_id)
+            gateway.metrics.limiter_wait.observe(waited, provider)
+            started = time.monotonic()
+            status_code: int | None = None
             try:
-                async with sem:
-                    response = await gateway.http_client.request(
-                        method=request.method,
-                        url=url,
-                        headers=headers,
-                        params=request.query_params,
-                        content=upstream_body,
-                    )
+                response = await gateway.send_upstream(provider, suffix, request.method, headers, request.query_params, upstream_body)
+                status_code = response.status_code
+                retry_after_s = parse_retry_after(response.headers.get("retry-after"))
             except Exception as e:
                 last_exc = e
                 response = None
-            else:
+            finally:
+                latency_s = time.monotonic() - started
+                limiter.release(status_code=status_code, latency_s=latency_s, retry_after_s=retry_after_s)
+                gateway.metrics.upstream_responses.inc(provider, str(status_code) if status_code is not None else "error")
+                gateway.metrics.upstream_latency.observe(latency_s, provider, labels["model"])
+
+            if response is not None:
                 # If we forced response_format and upstream rejects it, retry once without it.
                 if forced_response_format and not attempted_without_response_format and response.status_code in (400, 422):
                     if _looks_like_unsupported_response_format(response):
@@ -558,29 +773,24 @@ async def proxy_request(request: Request, path: str):
                         forced_response_format = False
                         upstream_body = body  # original bytes
                         # Do not count this as a retry; it's a compatibility fallback.
+                        gateway.metrics.retries.inc(provider, "response_format")
                         continue
 
-                # Retry transient upstream errors.
+                # Retry transient upstream errors. Jittered so agents throttled in
+                # the same burst do not retry in lockstep.
                 if response.status_code == 429 or response.status_code >= 500:
                     if attempt < max_retries:
-                        retry_after_s = 0.0
-                        ra = (response.headers.get("retry-after") or "").strip()
-                        if ra:
-                            try:
-                                retry_after_s = float(ra)
-                            except Exception:
-                                retry_after_s = 0.0
-                        delay = max(base_delay * (2**attempt), retry_after_s)
-                        delay += random.random() * 0.25
+                        delay = jittered_backoff(attempt, base_delay=base_delay, max_delay=max_delay, retry_after_s=retry_after_s)
                         attempt += 1
+                        gateway.metrics.retries.inc(provider, "429" if response.status_code == 429 else "5xx")
                         await asyncio.sleep(delay)
                         continue
 
             if response is None:
                 if attempt < max_retries:
-                    delay = base_delay * (2**attempt)
-                    delay += random.random() * 0.25
+                    delay = jittered_backoff(attempt, base_delay=base_delay, max_delay=max_delay)
                     attempt += 1
+                    gateway.metrics.retries.inc(provider, "error")
                     await asyncio.sleep(delay)
                     continue
 
@@ -0,0 +1,191 @@
+import bisect
+import math
+import time
+from typing import Callable, Iterable, Optional
+
+# Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter. `inc` is a single dict update, cheap enough for the proxy hot path."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, val in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(val)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Gauge whose samples are produced at scrape time by `collect`.
+
+    Values derived from existing gateway state (cost per task, pricing age) are
+    read only when /metrics is scraped, so they add nothing to the request path.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), collect: Optional[Callable[[], Iterable[tuple[tuple, float]]]] = None) -> None:
+        super().__init__(name, help_text, labels)
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        if self._collect is None:
+            return lines
+        for key, val in self._collect():
+            lines.append(f"{self.name}{_format_labels(self.label_names, tuple(key))} {_format_value(val)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram. `observe` is a bisect plus a few list/float updates."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[label_values] = series
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, (counts, total, n) in self._series.items():
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class GatewayMetrics:
+    """Metrics exposed by the gateway's /metrics endpoint."""
+
+    def __init__(self, gateway) -> None:
+        self._gateway = gateway
+        self.registry = MetricsRegistry()
+        r = self.registry.register
+        self.requests = r(Counter("gateway_requests_total", "Proxied requests by provider, model and returned status code.", ("provider", "model", "status")))
+        self.request_latency = r(Histogram("gateway_request_duration_seconds", "End-to-end proxy latency by provider and model.", ("provider", "model")))
+        self.upstream_responses = r(Counter("gateway_upstream_responses_total", "Upstream attempts by provider and upstream status code ('error' for transport failures).", ("provider", "status")))
+        self.upstream_latency = r(Histogram("gateway_upstream_duration_seconds", "Latency of individual upstream attempts.", ("provider", "model")))
+        self.retries = r(Counter("gateway_upstream_retries_total", "Upstream retries by provider and reason.", ("provider", "reason")))
+        self.limiter_wait = r(Histogram("gateway_upstream_wait_seconds", "Time spent waiting for an upstream concurrency slot.", ("provider",), buckets=WAIT_BUCKETS))
+        self.tokens = r(Counter("gateway_tokens_total", "Billed tokens by provider, model and direction (in/out).", ("provider", "model", "direction")))
+        self.cost = r(Counter("gateway_cost_usd_total", "Billed cost in USD by provider and model.", ("provider", "model")))
+        self.hedges = r(Counter("gateway_hedged_requests_total", "Hedged upstream requests by provider and winning side.", ("provider", "winner")))
+        self.preflight_rejections = r(Counter("gateway_preflight_rejections_total", "Requests rejected by the pre-flight budget check.", ("provider",)))
+        r(Gauge("gateway_task_cost_usd", "Accumulated cost of each currently allowed task.", ("task_id",), collect=self._collect_task_cost))
+        r(Gauge("gateway_active_tasks", "Number of task ids currently allowed to use the gateway.", collect=self._collect_active_tasks))
+        r(Gauge("gateway_pricing_refresh_age_seconds", "Seconds since provider pricing was last refreshed (-1 if never).", ("provider",), collect=self._collect_pricing_age))
+        r(Gauge("gateway_upstream_latency_seconds", "Rolling upstream latency quantiles per base URL.", ("upstream", "quantile"), collect=self._collect_upstream_latency))
+        r(Gauge("gateway_upstream_concurrency_limit", "Current upstream concurrency limit per provider/model.", ("key",), collect=lambda: self._collect_limiters("limit")))
+        r(Gauge("gateway_upstream_in_flight", "Upstream requests in flight per provider/model.", ("key",), collect=lambda: self._collect_limiters("in_flight")))
+        r(Gauge("gateway_upstream_queued", "Requests waiting for an upstream slot per provider/model.", ("key",), collect=lambda: self._collect_limiters("queued")))
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def _collect_task_cost(self):
+        for task_id, usage in self._gateway.usage_per_task.items():
+            yield (task_id,), usage.total_cost
+
+    def _collect_active_tasks(self):
+        yield (), len(self._gateway.allowed_task_ids)
+
+    def _collect_pricing_age(self):
+        if "chutes" not in self._gateway.providers:
+            return
+        last = self._gateway._chutes_pricing_last_refresh
+        yield ("chutes",), (time.time() - last) if last else -1
+
+    def _collect_upstream_latency(self):
+        for upstream, tracker in self._gateway.upstream_latency.items():
+            for q in (0.5, 0.95, 0.99):
+                value = tracker.quantile(q)
+                if value is not None:
+                    yield (upstream, str(q)), value
+
+    def _collect_limiters(self, field: str):
+        for name, snap in self._gateway.upstream_limiters.snapshot().items():
+            yield (name,), snap[field]
@@ -0,0 +1,62 @@
+import math
+from typing import Any, Optional
+
+# Fixed per-message framing overhead in chat formats (role markers, separators).
+_MESSAGE_OVERHEAD_TOKENS = 3
+
+
+def _iter_text(value: Any):
+    """Yield every prompt string in a message/content tree, skipping non-text parts (images, audio)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        part_type = value.get("type")
+        if part_type and part_type not in ("text", "input_text", "output_text"):
+            return
+        for key in ("content", "text"):
+            if key in value:
+                yield from _iter_text(value[key])
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_text(item)
+
+
+def estimate_prompt_tokens(suffix: str, body: dict, *, chars_per_token: float = 4.0) -> int:
+    """
+    Estimate prompt tokens for an OpenAI-compatible request body without a tokenizer.
+
+    Only message text is counted (plus a small per-message overhead); tool schemas
+    and image parts are ignored, so the estimate errs low. For the BPE tokenizers
+    used by OpenAI/Chutes models, English text and HTML average 3-4 characters per
+    token, which is what `chars_per_token` calibrates.
+    """
+    if not isinstance(body, dict):
+        return 0
+    if suffix == "/v1/responses":
+        messages = body.get("input") or body.get("messages")
+        extra = [body.get("instructions")]
+    elif suffix == "/v1/chat/completions":
+        messages = body.get("messages")
+        extra = []
+    else:
+        messages = body.get("prompt")
+        extra = []
+
+    chars = sum(len(s) for s in _iter_text(messages)) + sum(len(s) for s in _iter_text(extra))
+    message_count = len(messages) if isinstance(messages, list) else (1 if messages else 0)
+    return int(math.ceil(chars / max(float(chars_per_token), 1.0))) + message_count * _MESSAGE_OVERHEAD_TOKENS
+
+
+def requested_max_output_tokens(body: dict) -> Optional[int]:
+    """Return the output-token cap the agent asked for, if any."""
+    if not isinstance(body, dict):
+        return None
+    for key in ("max_completion_tokens", "max_output_tokens", "max_tokens"):
+        value = body.get(key)
+        if value is None:
+            continue
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            return None
+    return None
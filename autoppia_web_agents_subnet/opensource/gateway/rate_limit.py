@@ -0,0 +1,294 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+def parse_retry_after(value: Optional[str], *, now: Optional[float] = None) -> float:
+    """
+    Parse a Retry-After header into seconds.
+
+    Supports both delta-seconds ("2", "0.5") and HTTP-date forms. Returns 0.0
+    when the header is missing or unparseable.
+    """
+    raw = (value or "").strip()
+    if not raw:
+        return 0.0
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(raw)
+    except Exception:
+        return 0.0
+    if when is None:
+        return 0.0
+    current = time.time() if now is None else now
+    return max(0.0, when.timestamp() - current)
+
+
+def jittered_backoff(attempt: int, *, base_delay: float, max_delay: float, retry_after_s: float = 0.0) -> float:
+    """
+    Full-jitter exponential backoff, never shorter than the upstream's Retry-After.
+
+    Spreading retries uniformly over [0, base * 2^attempt] keeps agents that were
+    throttled together from retrying in lockstep.
+    """
+    cap = min(max(0.0, max_delay), max(0.0, base_delay) * (2 ** max(0, attempt)))
+    delay = random.uniform(0.0, cap) if cap > 0 else 0.0
+    if retry_after_s > 0:
+        # Small spread on top of Retry-After so waiters do not wake simultaneously.
+        delay = max(delay, retry_after_s + random.uniform(0.0, max(base_delay, 0.05)))
+    return delay
+
+
+class _FairQueue:
+    """FIFO per task id, served round-robin across task ids."""
+
+    def __init__(self) -> None:
+        self._by_task: "OrderedDict[str, deque]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, task_id: str, item: asyncio.Future) -> None:
+        self._by_task.setdefault(task_id, deque()).append(item)
+        self._size += 1
+
+    def pop(self) -> Optional[asyncio.Future]:
+        if not self._by_task:
+            return None
+        task_id, items = next(iter(self._by_task.items()))
+        item = items.popleft()
+        self._size -= 1
+        if items:
+            self._by_task.move_to_end(task_id)
+        else:
+            del self._by_task[task_id]
+        return item
+
+    def task_ids(self) -> list[str]:
+        return list(self._by_task.keys())
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for one upstream (provider, model) pair.
+
+    - Each successful fast response grows the limit by `increase_step / limit`
+      (i.e. roughly +increase_step per window of in-flight requests).
+    - A 429, or a success slower than `latency_target_s`, multiplies the limit by
+      `decrease_factor`, at most once per `decrease_cooldown_s` so a burst of
+      429s from the same window does not collapse it to the floor.
+    - A Retry-After on a 429 pauses admission for the whole key.
+    - Waiters are admitted round-robin by task id.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial_limit: float,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target_s: float = 0.0,
+        decrease_cooldown_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(max(float(initial_limit), self.min_limit), self.max_limit))
+        self.increase_step = max(0.0, float(increase_step))
+        self.decrease_factor = min(max(float(decrease_factor), 0.05), 1.0)
+        self.latency_target_s = max(0.0, float(latency_target_s))
+        self.decrease_cooldown_s = max(0.0, float(decrease_cooldown_s))
+        self._clock = clock
+
+        self.in_flight = 0
+        self._queue = _FairQueue()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._wakeup_handle: Optional[asyncio.TimerHandle] = None
+
+        # Counters for observability.
+        self.successes = 0
+        self.throttled = 0
+        self.slow_responses = 0
+        self.decreases = 0
+        self.max_queue_depth = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def blocked_for(self) -> float:
+        return max(0.0, self._blocked_until - self._clock())
+
+    async def acquire(self, task_id: str = "") -> float:
+        """Wait for an upstream slot. Returns the time spent waiting, in seconds."""
+        start = self._clock()
+        if not self._queue and self._can_admit():
+            self.in_flight += 1
+            return 0.0
+
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.push(str(task_id or ""), fut)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was granted while we were being cancelled: hand it back.
+                self.in_flight = max(0, self.in_flight - 1)
+                self._dispatch()
+            raise
+        return self._clock() - start
+
+    def release(
+        self,
+        *,
+        status_code: Optional[int] = None,
+        latency_s: Optional[float] = None,
+        retry_after_s: float = 0.0,
+    ) -> None:
+        """Return a slot and feed the upstream outcome into the AIMD controller."""
+        self.in_flight = max(0, self.in_flight - 1)
+        now = self._clock()
+        if status_code == 429:
+            self.throttled += 1
+            if retry_after_s and retry_after_s > 0:
+                self._blocked_until = max(self._blocked_until, now + float(retry_after_s))
+            self._decrease(now)
+        elif status_code is not None and 200 <= status_code < 300:
+            self.successes += 1
+            if self.latency_target_s > 0 and latency_s is not None and latency_s > self.latency_target_s:
+                self.slow_responses += 1
+                self._decrease(now)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + self.increase_step / max(self.limit, 1.0))
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 3),
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": len(self._queue),
+            "queued_task_ids": len(self._queue.task_ids()),
+            "blocked_for_s": round(self.blocked_for(), 3),
+            "successes": self.successes,
+            "throttled": self.throttled,
+            "slow_responses": self.slow_responses,
+            "decreases": self.decreases,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def _decrease(self, now: float) -> None:
+        if now - self._last_decrease < self.decrease_cooldown_s:
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+
+    def _can_admit(self) -> bool:
+        return self.in_flight < self.capacity and self._clock() >= self._blocked_until
+
+    def _dispatch(self) -> None:
+        while self._queue and self._can_admit():
+            fut = self._queue.pop()
+            if fut is None:
+                break
+            if fut.done():
+                # Waiter was cancelled while queued.
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        # Re-run admission once a Retry-After pause expires; releases alone may
+        # never come if every slot is idle while the key is blocked.
+        if not self._queue or self._wakeup_handle is not None:
+            return
+        delay = self._blocked_until - self._clock()
+        if delay <= 0:
+            return
+        self._wakeup_handle = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup_handle = None
+        self._dispatch()
+
+
+class UpstreamLimiters:
+    """
+    Lazily-created limiters keyed by (provider, model).
+
+    With adaptive mode disabled every model of a provider shares one fixed-size
+    limiter, which matches the previous per-provider semaphore behavior.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limits: dict[str, int],
+        adaptive: bool = True,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target_s: float = 0.0,
+        decrease_cooldown_s: float = 1.0,
+        default_limit: int = 8,
+    ) -> None:
+        self.initial_limits = {k: max(1, int(v)) for k, v in (initial_limits or {}).items()}
+        self.adaptive = bool(adaptive)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target_s = latency_target_s
+        self.decrease_cooldown_s = decrease_cooldown_s
+        self.default_limit = max(1, int(default_limit))
+        self._limiters: dict[tuple[str, str], AdaptiveConcurrencyLimiter] = {}
+
+    def get(self, provider: str, model: str = "") -> AdaptiveConcurrencyLimiter:
+        key = (provider, model or "*") if self.adaptive else (provider, "*")
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            initial = self.initial_limits.get(provider, self.default_limit)
+            if self.adaptive:
+                limiter = AdaptiveConcurrencyLimiter(
+                    f"{key[0]}/{key[1]}",
+                    initial_limit=initial,
+                    min_limit=self.min_limit,
+                    max_limit=max(self.max_limit, initial),
+                    increase_step=self.increase_step,
+                    decrease_factor=self.decrease_factor,
+                    latency_target_s=self.latency_target_s,
+                    decrease_cooldown_s=self.decrease_cooldown_s,
+                )
+            else:
+                limiter = AdaptiveConcurrencyLimiter(
+                    f"{key[0]}/{key[1]}",
+                    initial_limit=initial,
+                    min_limit=initial,
+                    max_limit=initial,
+                )
+            self._limiters[key] = limiter
+        return limiter
+
+    def snapshot(self) -> dict[str, dict]:
+        return {limiter.name: limiter.snapshot() for limiter in self._limiters.values()}
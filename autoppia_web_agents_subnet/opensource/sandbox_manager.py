@@ -333,8 +333,26 @@ class SandboxManager:
             "GATEWAY_FORCE_JSON_RESPONSE_FORMAT",
             "GATEWAY_OPENAI_MAX_CONCURRENCY",
             "GATEWAY_CHUTES_MAX_CONCURRENCY",
+            "GATEWAY_ADAPTIVE_CONCURRENCY",
+            "GATEWAY_ADAPTIVE_MIN_CONCURRENCY",
+            "GATEWAY_ADAPTIVE_MAX_CONCURRENCY",
+            "GATEWAY_ADAPTIVE_INCREASE_STEP",
+            "GATEWAY_ADAPTIVE_DECREASE_FACTOR",
+            "GATEWAY_ADAPTIVE_LATENCY_TARGET_S",
             "GATEWAY_UPSTREAM_MAX_RETRIES",
             "GATEWAY_UPSTREAM_RETRY_BASE_DELAY_S",
+            "GATEWAY_UPSTREAM_RETRY_MAX_DELAY_S",
+            "GATEWAY_CHUTES_HEDGE_BASE_URL",
+            "GATEWAY_HEDGE_QUANTILE",
+            "GATEWAY_HEDGE_MIN_SAMPLES",
+            "GATEWAY_HEDGE_INITIAL_DELAY_S",
+            "GATEWAY_HEDGE_MIN_DELAY_S",
+            "GATEWAY_HEDGE_MAX_DELAY_S",
+            "GATEWAY_LATENCY_WINDOW",
+            "GATEWAY_PREFLIGHT_COST_CHECK",
+            "GATEWAY_PREFLIGHT_CHARS_PER_TOKEN",
+            "GATEWAY_PREFLIGHT_SAFETY_FACTOR",
+            "GATEWAY_PREFLIGHT_RESERVE_OUTPUT",
         ):
             val = os.getenv(key)
             if val is not None and str(val).strip() != "":
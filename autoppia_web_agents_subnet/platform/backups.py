@@ -0,0 +1,280 @@
+"""
+Local backups of the payloads IWAPClient sends.
+
+`PayloadBackupWriter.submit` only enqueues the payload; a background thread
+sanitizes it (unless the caller already did), serializes it and appends it
+as one compact JSON line to the current round's backup file
+(`season_<s>/round_<r>/logs/iwap_payloads.jsonl` plus `.gz`/`.zst`). Records drained together are written as one compressed
+member/frame, so a crash loses at most the batch being written and earlier
+ones stay readable. When the queue is full the record is dropped (and
+counted) rather than delaying the submission. After each batch, backup files
+beyond the retention limits (number of rounds, total bytes) are removed
+oldest first.
+
+`iter_records` / `list_backups` read the files back; see
+scripts/validator/iwap_backups.py for the command-line tool.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard  # type: ignore
+
+    _HAVE_ZSTD = True
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+    _HAVE_ZSTD = False
+
+BACKUP_STEM = "iwap_payloads.jsonl"
+_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _round_dir(root: Path, season_number: Optional[int], round_number_in_season: Optional[int]) -> Path:
+    season_token = f"season_{season_number}" if season_number is not None else "season_unknown"
+    round_token = f"round_{round_number_in_season}" if round_number_in_season is not None else "round_unknown"
+    return root / season_token / round_token / "logs"
+
+
+def _encode(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return data
+
+
+@dataclass
+class _Record:
+    ts: float
+    context: str
+    payload: Any
+    season_number: Optional[int]
+    round_number_in_season: Optional[int]
+    sanitized: bool
+
+
+@dataclass
+class _Flush:
+    done: threading.Event
+
+
+class PayloadBackupWriter:
+    def __init__(
+        self,
+        root: Path | str,
+        *,
+        compression: str = "gzip",
+        max_rounds: int = 0,
+        max_bytes: int = 0,
+        max_queue: int = 1024,
+        sanitize: Callable[[Any], Any] = lambda payload: payload,
+    ) -> None:
+        compression = (compression or "none").strip().lower()
+        if compression == "zstd" and not _HAVE_ZSTD:
+            compression = "gzip"
+        if compression not in _SUFFIXES:
+            raise ValueError(f"unsupported backup compression {compression!r}")
+        self.root = Path(root)
+        self.compression = compression
+        self.max_rounds = max(0, int(max_rounds))
+        self.max_bytes = max(0, int(max_bytes))
+        self._sanitize = sanitize
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+        self.bytes_written = 0
+
+    # ── producer side (event loop) ──────────────────────────────────────────
+
+    def submit(
+        self,
+        context: str,
+        payload: Any,
+        *,
+        season_number: Optional[int] = None,
+        round_number_in_season: Optional[int] = None,
+        sanitized: bool = False,
+    ) -> bool:
+        """Queue a payload for backup without blocking; False if it was dropped."""
+        if self._closed:
+            return False
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(_Record(time.time(), context, payload, season_number, round_number_in_season, sanitized))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far is on disk (call via asyncio.to_thread from async code)."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(_Flush(done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "dropped": self.dropped, "failures": self.failures, "bytes_written": self.bytes_written, "queued": self._queue.qsize()}
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="iwap-payload-backups", daemon=True)
+                self._thread.start()
+                atexit.register(self.close, 2.0)
+
+    # ── writer thread ───────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Any] = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [entry for entry in batch if isinstance(entry, _Record)]
+            if records:
+                self._write(records)
+            for entry in batch:
+                if isinstance(entry, _Flush):
+                    entry.done.set()
+            if any(entry is None for entry in batch):
+                return
+
+    def _write(self, records: List[_Record]) -> None:
+        by_file: Dict[Path, List[bytes]] = {}
+        for record in records:
+            try:
+                line = {"ts": record.ts, "context": record.context, "payload": record.payload if record.sanitized else self._sanitize(record.payload)}
+                encoded = json.dumps(line, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+            except Exception:
+                self.failures += 1
+                continue
+            target = _round_dir(self.root, record.season_number, record.round_number_in_season) / (BACKUP_STEM + _SUFFIXES[self.compression])
+            by_file.setdefault(target, []).append(encoded)
+        for target, lines in by_file.items():
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                chunk = _encode(b"".join(lines), self.compression)
+                with target.open("ab") as fh:
+                    fh.write(chunk)
+                self.written += len(lines)
+                self.bytes_written += len(chunk)
+            except Exception:
+                self.failures += len(lines)
+                from autoppia_web_agents_subnet.utils.logging import ColoredLogger
+
+                ColoredLogger.warning(f"IWAP | Failed to persist {len(lines)} backup payloads at {target}")
+        if self.max_rounds or self.max_bytes:
+            try:
+                self.enforce_retention()
+            except Exception:
+                pass
+
+    def enforce_retention(self) -> List[Path]:
+        """Delete the oldest backup files beyond `max_rounds` / `max_bytes`; returns what was removed."""
+        files = sorted(_backup_files(self.root), key=lambda item: item[1].st_mtime)
+        removed: List[Path] = []
+        total = sum(stat.st_size for _, stat in files)
+        while files and ((self.max_rounds and len(files) > self.max_rounds) or (self.max_bytes and total > self.max_bytes and len(files) > 1)):
+            path, stat = files.pop(0)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+            removed.append(path)
+        return removed
+
+
+# ── reading backups ─────────────────────────────────────────────────────────
+
+
+def _backup_files(root: Path) -> List[Tuple[Path, Any]]:
+    out = []
+    for path in Path(root).glob(f"season_*/round_*/logs/{BACKUP_STEM}*"):
+        try:
+            out.append((path, path.stat()))
+        except FileNotFoundError:
+            continue
+    return out
+
+
+def _members(path: Path) -> Iterator[bytes]:
+    """Decompressed batches of a backup file, stopping at the first torn or corrupt one."""
+    data = path.read_bytes()
+    if path.suffix == ".gz":
+        new_decoder = lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)  # noqa: E731
+    elif path.suffix == ".zst":
+        if not _HAVE_ZSTD:
+            raise RuntimeError(f"{path} is zstd-compressed but the 'zstandard' package is not installed")
+        new_decoder = lambda: zstandard.ZstdDecompressor().decompressobj()  # noqa: E731
+    else:
+        yield data
+        return
+    while data:
+        decoder = new_decoder()
+        try:
+            chunk = decoder.decompress(data)
+        except Exception:
+            return
+        yield chunk
+        if not getattr(decoder, "eof", True):
+            return
+        data = getattr(decoder, "unused_data", b"")
+
+
+def iter_records(path: Path | str) -> Iterator[Dict[str, Any]]:
+    """Records ({"ts", "context", "payload"}) of one backup file, in write order; a torn tail is skipped."""
+    for chunk in _members(Path(path)):
+        for line in chunk.splitlines():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def list_backups(root: Path | str) -> List[Dict[str, Any]]:
+    """Backup files under `root`, oldest first, with their size and record count per context."""
+    rows = []
+    for path, stat in sorted(_backup_files(Path(root)), key=lambda item: item[1].st_mtime):
+        contexts: Dict[str, int] = {}
+        for record in iter_records(path):
+            contexts[record.get("context", "?")] = contexts.get(record.get("context", "?"), 0) + 1
+        rows.append({"path": str(path), "bytes": stat.st_size, "records": sum(contexts.values()), "contexts": contexts})
+    return rows
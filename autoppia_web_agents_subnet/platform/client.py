@@ -1,27 +1,45 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import gzip
+import hashlib
 import json
 import logging
 import os
+import time
 import uuid
 from dataclasses import asdict, is_dataclass
 from datetime import date, datetime, time as dtime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
 import re
 
 import bittensor as bt
 import httpx
 
 from autoppia_web_agents_subnet.validator.config import (
+    IWAP_BACKUP_COMPRESSION,
+    IWAP_BACKUP_MAX_MB,
+    IWAP_BACKUP_MAX_ROUNDS,
+    IWAP_BACKUP_QUEUE_SIZE,
+    IWAP_DEBUG_LOG_MAX_CHARS,
+    IWAP_DEBUG_LOG_SAMPLE_RATE,
+    IWAP_REQUEST_COMPRESSION,
+    IWAP_REQUEST_COMPRESSION_MIN_BYTES,
+    IWAP_TASK_LOG_DEDUP_SNAPSHOTS,
     MAX_MINER_AGENT_NAME_LENGTH,
     MINIMUM_START_BLOCK as VALIDATOR_MINIMUM_START_BLOCK,
     SEASON_SIZE_EPOCHS,
 )
 
 from . import models
+from .backups import PayloadBackupWriter
+from .compression import IDENTITY, EncodedBody, choose_encoding, encode_body, parse_accept_encoding
+from .outbox import DONE as OUTBOX_DONE, PENDING as OUTBOX_PENDING, IWAPOutbox, OutboxEntry, outbox_key, outbox_lane
+from .telemetry import DebugLogSampler, IWAPTelemetry
+from .utils.html_snapshots import DEDUPED_SCHEMA_VERSION, TASK_LOG_SCHEMAS_HEADER, dedupe_task_log, parse_schema_versions
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +48,10 @@ VALIDATOR_SIGNATURE_HEADER = "x-validator-signature"
 
 T = TypeVar("T")
 
+# Backoff between quick retries of one request (_with_retry, and inline outbox sends
+# before they are handed to the drainer).
+_RETRY_DELAYS: Tuple[float, ...] = (0.5, 1.0, 3.0)
+
 # Season calculation constants (must match backend config)
 # Import from validator config to ensure consistency with TESTING mode
 
@@ -133,6 +155,10 @@ class IWAPClient:
         client: Optional[httpx.AsyncClient] = None,
         backup_dir: Optional[Path] = None,
         auth_provider: Optional[Callable[[], Dict[str, str]]] = None,
+        outbox: Optional[IWAPOutbox] = None,
+        request_compression: Optional[str] = None,
+        compression_min_bytes: Optional[int] = None,
+        task_log_dedup: Optional[str] = None,
     ) -> None:
         resolved_base_url = (base_url or os.getenv("IWAP_API_BASE_URL", "http://217.154.10.168:8080")).rstrip("/")
         self._client = client or httpx.AsyncClient(base_url=resolved_base_url, timeout=timeout)
@@ -144,6 +170,26 @@ class IWAPClient:
         resolved_backup = backup_dir or env_dir or default_dir
         self._backup_dir = Path(resolved_backup)
         self._auth_provider = auth_provider
+        # Durable write path: evaluation batches, GIFs and logs go through the outbox when set.
+        self._outbox = outbox
+        self._outbox_drainer: Optional[asyncio.Task] = None
+        # Outbox entries being sent inline; the drainer leaves their lanes alone meanwhile.
+        self._outbox_inflight: Set[int] = set()
+        # Request-body compression: "auto" compresses once the backend advertises a coding.
+        self._request_compression = (request_compression if request_compression is not None else IWAP_REQUEST_COMPRESSION or "none").strip().lower()
+        self._compression_min_bytes = int(compression_min_bytes if compression_min_bytes is not None else IWAP_REQUEST_COMPRESSION_MIN_BYTES)
+        self._accepted_encodings: Set[str] = set()
+        self._compression_disabled = False
+        # Task-log snapshot dedup: "auto" sends schema 1.1 logs once the backend lists it as readable.
+        self._task_log_dedup = (task_log_dedup if task_log_dedup is not None else IWAP_TASK_LOG_DEDUP_SNAPSHOTS or "auto").strip().lower()
+        self._task_log_schemas: Set[str] = set()
+        # None until the first round-log chunk tells whether IWAP has the chunk endpoint.
+        self.round_log_chunks_supported: Optional[bool] = None
+        # None until the first batch registration tells whether IWAP has the batch endpoint.
+        self.agent_run_batch_supported: Optional[bool] = None
+        # Per-endpoint latency/size/retry/status counters; request details are logged for a sample only.
+        self.telemetry = IWAPTelemetry()
+        self._debug_log = DebugLogSampler(IWAP_DEBUG_LOG_SAMPLE_RATE, IWAP_DEBUG_LOG_MAX_CHARS)
         from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 
         ColoredLogger.info(f"IWAP client initialized with base_url={self._client.base_url}", color=ColoredLogger.GOLD)
@@ -152,10 +198,24 @@ class IWAPClient:
         except Exception:
             ColoredLogger.warning(f"IWAP | Unable to create backup directory at {self._backup_dir}")
             self._backup_dir = None
+        self._backup_writer: Optional[PayloadBackupWriter] = None
+        if self._backup_dir is not None:
+            self._backup_writer = PayloadBackupWriter(
+                self._backup_dir,
+                compression=IWAP_BACKUP_COMPRESSION,
+                max_rounds=IWAP_BACKUP_MAX_ROUNDS,
+                max_bytes=int(IWAP_BACKUP_MAX_MB * 1024 * 1024),
+                max_queue=IWAP_BACKUP_QUEUE_SIZE,
+                sanitize=_sanitize_json,
+            )
 
     async def close(self) -> None:
+        if self._outbox_drainer is not None and not self._outbox_drainer.done():
+            self._outbox_drainer.cancel()
         if self._owns_client:
             await self._client.aclose()
+        if self._backup_writer is not None:
+            await asyncio.to_thread(self._backup_writer.close)
 
     def set_auth_provider(self, provider: Optional[Callable[[], Dict[str, str]]]) -> None:
         self._auth_provider = provider
@@ -288,16 +348,86 @@ class IWAPClient:
             agent_run.agent_run_id = response["agent_run_id"]
         return response
 
-    async def upload_evaluation_gif(self, evaluation_id: str, gif_bytes: bytes) -> Optional[str]:
+    async def start_agent_runs_batch(
+        self,
+        *,
+        validator_round_id: str,
+        registrations: List[Tuple[models.AgentRunIWAP, models.MinerIdentityIWAP, models.MinerSnapshotIWAP]],
+        force: bool = False,
+    ) -> Optional[Dict[int, Dict[str, Any]]]:
+        """
+        Register several agent runs in one request.
+
+        Returns the per-miner results keyed by miner uid ({"status": "created" |
+        "exists" | "error", "agent_run_id", "detail"}); miners missing from the
+        response were not registered. Returns None when IWAP has no batch
+        endpoint, in which case `agent_run_batch_supported` becomes False and
+        callers fall back to `start_agent_run`.
+        """
+        if self.agent_run_batch_supported is False:
+            return None
+        from autoppia_web_agents_subnet.validator.config import TESTING
+
+        if TESTING:
+            force = True
+        payload = {
+            "agent_runs": [
+                {"agent_run": agent_run.to_payload(), "miner_identity": miner_identity.to_payload(), "miner_snapshot": miner_snapshot.to_payload()}
+                for agent_run, miner_identity, miner_snapshot in registrations
+            ]
+        }
+        url = f"/api/v1/validator-rounds/{validator_round_id}/agent-runs/start-batch"
+        if force:
+            url += "?force=true"
+        season_number, round_number_in_season = self._extract_round_info_from_validator_round_id(validator_round_id)
+        try:
+            response = await self._post(url, payload, context="start_agent_runs_batch", season_number=season_number, round_number_in_season=round_number_in_season)
+        except httpx.HTTPStatusError as exc:
+            if exc.response is not None and exc.response.status_code in (404, 405):
+                self.agent_run_batch_supported = False
+                bt.logging.warning(f"IWAP | batch agent-run endpoint unavailable (HTTP {exc.response.status_code}); registering miners one by one")
+                return None
+            raise
+        self.agent_run_batch_supported = True
+        results: Dict[int, Dict[str, Any]] = {}
+        rows = response.get("results") if isinstance(response, dict) else None
+        for row in rows if isinstance(rows, list) else []:
+            try:
+                results[int(row["miner_uid"])] = row
+            except (KeyError, TypeError, ValueError):
+                continue
+        # Backend may return an existing agent_run_id for duplicates, as in start_agent_run.
+        for agent_run, _identity, _snapshot in registrations:
+            row = results.get(int(agent_run.miner_uid))
+            if row and row.get("status") in ("created", "exists") and row.get("agent_run_id"):
+                agent_run.agent_run_id = row["agent_run_id"]
+        return results
+
+    async def upload_evaluation_gif(self, evaluation_id: str, gif_bytes: bytes, *, retry: bool = True) -> Optional[str]:
+        """Upload an evaluation GIF; `retry=False` makes a single attempt (GIFUploadPool retries itself)."""
         if not gif_bytes:
             raise ValueError("GIF payload is empty")
 
         from autoppia_web_agents_subnet.platform.utils.iwa_core import log_gif_event
 
-        auth_headers = self._resolve_auth_headers()
         path = f"/api/v1/evaluations/{evaluation_id}/gif"
         filename = f"{evaluation_id}.gif"
         log_gif_event(f"Uploading to API - evaluation_id={evaluation_id} filename={filename} bytes={len(gif_bytes)}")
+        if self._outbox is not None:
+            response = await self._submit_via_outbox(
+                key=outbox_key("upload_evaluation_gif", evaluation_id),
+                context="upload_evaluation_gif",
+                path=path,
+                body=bytes(gif_bytes),
+                kind="gif",
+            )
+            if response is None:
+                log_gif_event(f"Upload queued in IWAP outbox for evaluation_id={evaluation_id}", level="warning")
+                return None
+            return self._gif_url_from_response(response, evaluation_id)
+
+        auth_headers = self._resolve_auth_headers()
+        self.telemetry.observe_payload("upload_evaluation_gif", len(gif_bytes))
 
         async def attempt(attempt_index: int) -> httpx.Response:
             attempt_number = attempt_index + 1
@@ -314,14 +444,22 @@ class IWAPClient:
                 log_gif_event(f"Upload request successful - status {response.status_code}", level="debug")
                 return response
             except httpx.HTTPStatusError as exc:
-                body = exc.response.text
+                body = self._debug_log.cap(exc.response.text)
                 log_gif_event(f"Upload failed - POST {path}{attempt_suffix} returned {exc.response.status_code}: {body}", level="error")
                 raise
             except Exception as exc:  # noqa: BLE001
                 log_gif_event(f"Upload failed unexpectedly - POST {path}{attempt_suffix}: {str(exc)}", level="error", exc_info=True)
                 raise
 
-        response = await self._with_retry(attempt, context="upload_evaluation_gif")
+        if retry:
+            response = await self._with_retry(attempt, context="upload_evaluation_gif")
+        else:
+            response = await self._timed_attempt(attempt, 0, context="upload_evaluation_gif")
+        return self._gif_url_from_response(response, evaluation_id)
+
+    @staticmethod
+    def _gif_url_from_response(response: httpx.Response, evaluation_id: str) -> Optional[str]:
+        from autoppia_web_agents_subnet.platform.utils.iwa_core import log_gif_event
 
         try:
             payload = response.json()
@@ -391,7 +529,7 @@ class IWAPClient:
             except Exception as e:
                 bt.logging.warning(f"⚠️  Failed to decode GIF for multipart: {e}")
 
-        # Payload preview (gated by env)
+        # Payload preview (gated by env, size-capped)
         if os.getenv("IWAP_LOG_PAYLOADS", "false").strip().lower() in {"1", "true", "yes", "on"}:
             bt.logging.debug("=" * 80)
             bt.logging.debug("📤 COMPLETE PAYLOAD BEFORE SENDING TO API")
@@ -403,7 +541,7 @@ class IWAPClient:
                 payload_str = json.dumps(_sanitize_json(json_data), indent=2, ensure_ascii=False)
             except Exception:
                 payload_str = json.dumps({"error": "non-serializable-payload"})
-            for line in payload_str.split("\n"):
+            for line in self._debug_log.cap(payload_str).split("\n"):
                 bt.logging.debug(line)
             bt.logging.debug("")
             if files:
@@ -469,13 +607,49 @@ class IWAPClient:
         log_iwap_phase("add_evaluations_batch", f"Preparing batch request for validator_round_id={validator_round_id} agent_run_id={agent_run_id} count={len(evaluations)}", level="debug")
         season_number, round_number_in_season = self._extract_round_info_from_validator_round_id(validator_round_id)
 
-        return await self._post(
-            f"/api/v1/validator-rounds/{validator_round_id}/agent-runs/{agent_run_id}/evaluations/batch",
+        path = f"/api/v1/validator-rounds/{validator_round_id}/agent-runs/{agent_run_id}/evaluations/batch"
+        if self._outbox is None:
+            return await self._post(
+                path,
+                evaluations,
+                context="add_evaluations_batch",
+                season_number=season_number,
+                round_number_in_season=round_number_in_season,
+            )
+
+        evaluation_ids = sorted(str(((item.get("evaluation_result") or item.get("evaluation") or {}) if isinstance(item, dict) else {}).get("evaluation_id")) for item in evaluations)
+        key = outbox_key("add_evaluations_batch", agent_run_id, *evaluation_ids)
+        response = await self._post_durable(
+            path,
             evaluations,
             context="add_evaluations_batch",
+            key=key,
             season_number=season_number,
             round_number_in_season=round_number_in_season,
         )
+        if response is not None:
+            return response
+        # No response: the batch was delivered before, is queued for the drainer, or was given up on.
+        state = await asyncio.to_thread(self._outbox.state_of, key)
+        if state == OUTBOX_DONE:
+            return {
+                "duplicate": True,
+                "evaluations_created": 0,
+                "total_requested": len(evaluations),
+                "message": "Already delivered to IWAP; not sent again",
+            }
+        if state == OUTBOX_PENDING:
+            return {
+                "deferred": True,
+                "evaluations_created": 0,
+                "total_requested": len(evaluations),
+                "message": "Queued in IWAP outbox; will be replayed when the backend is reachable",
+            }
+        return {
+            "evaluations_created": 0,
+            "total_requested": len(evaluations),
+            "message": "Given up on after repeated failures; kept in the IWAP outbox as dead",
+        }
 
     async def finish_round(
         self,
@@ -547,21 +721,39 @@ class IWAPClient:
         """
         auth_headers = self._resolve_auth_headers()
         path = "/api/v1/task-logs"
+        if self._dedupe_task_logs() and isinstance(payload, dict) and isinstance(payload.get("payload"), dict):
+            # Send each distinct page once: step HTML becomes a sha256 reference into payload["snapshots"].
+            payload = dict(payload, payload=await asyncio.to_thread(dedupe_task_log, payload["payload"]))
         season_number, round_number_in_season = self._extract_round_info_from_payload(payload)
         self._backup_payload(
             "upload_task_log",
-            _sanitize_json(payload),
+            payload,
             season_number=season_number,
             round_number_in_season=round_number_in_season,
+            sanitized=False,
         )
 
-        try:
-            payload_size = len(json.dumps(payload, ensure_ascii=False))
-        except Exception:
-            payload_size = -1
+        if self._outbox is not None:
+            response = await self._post_durable(
+                path,
+                payload,
+                context="upload_task_log",
+                key=outbox_key(
+                    "upload_task_log",
+                    payload.get("validator_round_id") if isinstance(payload, dict) else None,
+                    payload.get("agent_run_id") if isinstance(payload, dict) else None,
+                    payload.get("task_id") if isinstance(payload, dict) else None,
+                ),
+                sanitize=False,
+            )
+            data = response if isinstance(response, dict) else {}
+            return (data.get("data") or {}).get("url") if isinstance(data.get("data"), dict) else None
+
+        encoded = await self._encode_json(payload)
+        self.telemetry.observe_payload("upload_task_log", len(encoded.raw), len(encoded.content))
 
         async def attempt(attempt_index: int) -> httpx.Response:
-            request = self._client.build_request("POST", path, json=payload)
+            request = self._client.build_request("POST", path, content=encoded.content, headers=encoded.headers)
             if auth_headers:
                 request.headers.update(auth_headers)
 
@@ -575,10 +767,9 @@ class IWAPClient:
                 f"IWAP | [task_log] POST {target_url} started{attempt_suffix}",
                 color=ColoredLogger.GOLD,
             )
-            if payload_size >= 0:
-                bt.logging.debug(f"   Task log payload size: {payload_size} chars")
+            bt.logging.debug(f"   Task log payload size: {len(encoded.raw)} bytes ({len(encoded.content)} bytes sent, encoding={encoded.encoding})")
 
-            response = await self._client.send(request)
+            response = await self._send_encoded(request, encoded)
             response.raise_for_status()
             return response
 
@@ -623,17 +814,96 @@ class IWAPClient:
         except Exception:
             payload_size = -1
 
-        response = await self._post(
-            f"/api/v1/validator-rounds/{validator_round_id}/round-log",
-            _sanitize_json(payload),
-            context="upload_round_log",
-            season_number=season_number,
-            round_number_in_season=round_number_in_season,
-        )
+        path = f"/api/v1/validator-rounds/{validator_round_id}/round-log"
+        if self._outbox is not None:
+            # A newer log supersedes a pending one for the same round.
+            response = await self._post_durable(
+                path,
+                payload,
+                context="upload_round_log",
+                key=outbox_key("upload_round_log", validator_round_id),
+                replace=True,
+                season_number=season_number,
+                round_number_in_season=round_number_in_season,
+            )
+        else:
+            response = await self._post(
+                path,
+                _sanitize_json(payload),
+                context="upload_round_log",
+                season_number=season_number,
+                round_number_in_season=round_number_in_season,
+            )
 
         if payload_size >= 0:
             bt.logging.debug(f"   Round log payload size: {payload_size} chars")
 
+        return self.round_log_url_from_response(response)
+
+    async def upload_round_log_chunk(
+        self,
+        *,
+        validator_round_id: str,
+        chunk: bytes,
+        offset: int,
+        seq: int,
+        final: bool = False,
+        season_number: Optional[int] = None,
+        round_number_in_season: Optional[int] = None,
+        validator_uid: Optional[int] = None,
+        validator_hotkey: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Append bytes [offset, offset + len(chunk)) to the round log stored by IWAP.
+
+        The chunk travels gzip-compressed and base64-encoded in `content`; `seq`
+        numbers the chunks of a round from 0 and a `final` chunk seals the log.
+        Returns the parsed response, or None when IWAP has no chunk endpoint, in
+        which case `round_log_chunks_supported` becomes False and callers fall
+        back to `upload_round_log`. Chunks bypass the outbox: a chunk is only
+        worth sending right after its predecessor, and its 404 (no endpoint) or
+        409 (offset/seq mismatch) must reach the caller rather than be settled
+        in the background.
+        """
+        if self.round_log_chunks_supported is False:
+            return None
+        compressed = await asyncio.to_thread(gzip.compress, chunk, 6, mtime=0)
+        payload: Dict[str, Any] = {
+            "validator_round_id": validator_round_id,
+            "season": season_number,
+            "round_in_season": round_number_in_season,
+            "validator_uid": validator_uid,
+            "validator_hotkey": validator_hotkey,
+            "seq": int(seq),
+            "offset": int(offset),
+            "length": len(chunk),
+            "sha256": hashlib.sha256(chunk).hexdigest(),
+            "final": bool(final),
+            "content_encoding": "gzip+base64",
+            "content": base64.b64encode(compressed).decode("ascii"),
+        }
+        parsed_season_number, parsed_round_number_in_season = self._extract_round_info_from_validator_round_id(validator_round_id)
+        path = f"/api/v1/validator-rounds/{validator_round_id}/round-log/chunks"
+        try:
+            response = await self._post(
+                path,
+                payload,
+                context="upload_round_log_chunk",
+                season_number=season_number if season_number is not None else parsed_season_number,
+                round_number_in_season=round_number_in_season if round_number_in_season is not None else parsed_round_number_in_season,
+            )
+        except httpx.HTTPStatusError as exc:
+            if exc.response is not None and exc.response.status_code in (404, 405):
+                self.round_log_chunks_supported = False
+                bt.logging.warning(f"IWAP | round-log chunk endpoint unavailable (HTTP {exc.response.status_code}); falling back to full round-log uploads")
+                return None
+            raise
+        self.round_log_chunks_supported = True
+        bt.logging.debug(f"   Round log chunk seq={seq} offset={offset}: {len(chunk)} bytes ({len(compressed)} compressed){' [final]' if final else ''}")
+        return response
+
+    @staticmethod
+    def round_log_url_from_response(response: Any) -> Optional[str]:
         if isinstance(response, dict):
             data = response.get("data", {})
             if isinstance(data, dict):
@@ -641,6 +911,241 @@ class IWAPClient:
             return response.get("url")
         return None
 
+    # ── request encoding ────────────────────────────────────────────────────
+
+    def _request_encoding(self) -> str:
+        if self._compression_disabled:
+            return IDENTITY
+        return choose_encoding(self._request_compression, self._accepted_encodings)
+
+    async def _encode_json(self, payload: Any) -> EncodedBody:
+        """Serialize (and, above the size threshold, compress) a JSON body off the event loop."""
+        raw = await asyncio.to_thread(lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        return await self._encode_raw(raw)
+
+    async def _encode_raw(self, raw: bytes) -> EncodedBody:
+        return await encode_body(raw, self._request_encoding(), min_bytes=self._compression_min_bytes)
+
+    def _observe_capabilities(self, response: httpx.Response) -> None:
+        header = response.headers.get("accept-encoding")
+        if header is not None:
+            self._accepted_encodings = parse_accept_encoding(header)
+        schemas = response.headers.get(TASK_LOG_SCHEMAS_HEADER)
+        if schemas is not None:
+            self._task_log_schemas = parse_schema_versions(schemas)
+
+    def _dedupe_task_logs(self) -> bool:
+        if self._task_log_dedup in {"on", "true", "1", "yes"}:
+            return True
+        if self._task_log_dedup == "auto":
+            return DEDUPED_SCHEMA_VERSION in self._task_log_schemas
+        return False
+
+    async def _send_encoded(self, request: httpx.Request, encoded: EncodedBody) -> httpx.Response:
+        """Send `request`; if the backend rejects the body's coding (415), resend it uncompressed."""
+        response = await self._client.send(request)
+        self._observe_capabilities(response)
+        if response.status_code != 415 or encoded.encoding == IDENTITY:
+            return response
+        if choose_encoding(self._request_compression, self._accepted_encodings) in {encoded.encoding, IDENTITY}:
+            self._compression_disabled = True
+        bt.logging.warning(f"IWAP | {request.url.path} rejected Content-Encoding {encoded.encoding} (415); resending uncompressed")
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in {"content-encoding", "content-length"}}
+        retry = self._client.build_request(request.method, request.url, content=encoded.raw, headers=headers)
+        response = await self._client.send(retry)
+        self._observe_capabilities(response)
+        return response
+
+    # ── durable outbox ──────────────────────────────────────────────────────
+
+    def ensure_outbox_drainer(self) -> None:
+        """Start the outbox drainer on the running loop if it is not already draining."""
+        if self._outbox is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = self._outbox_drainer
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._outbox_drainer = loop.create_task(self._drain_outbox(), name="iwap-outbox-drainer")
+
+    async def flush_outbox(self, timeout: Optional[float] = None) -> bool:
+        """Wait (up to `timeout`) until every pending outbox request has been delivered or given up."""
+        if self._outbox is None:
+            return True
+        self.ensure_outbox_drainer()
+        task = self._outbox_drainer
+        if task is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            counts = await asyncio.to_thread(self._outbox.counts)
+            bt.logging.warning(f"IWAP | [outbox] flush timed out after {timeout}s with {counts['pending']} requests pending")
+            return False
+        return True
+
+    async def _post_durable(
+        self,
+        path: str,
+        payload: Any,
+        *,
+        context: str,
+        key: str,
+        replace: bool = False,
+        sanitize: bool = True,
+        season_number: Optional[int] = None,
+        round_number_in_season: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Persist a JSON POST in the outbox, then send it if nothing is queued ahead of it in its lane.
+
+        The payload is sanitized and backed up like `_post`; with `sanitize=False`
+        it is sent as given (task logs keep their full HTML snapshots).
+        Returns the parsed response, or None when the request was deferred to the
+        drainer (backend unreachable, or earlier requests still pending).
+        """
+        if sanitize:
+            payload = _sanitize_json(payload)
+            self._backup_payload(
+                context,
+                payload,
+                season_number=season_number,
+                round_number_in_season=round_number_in_season,
+            )
+        body = await asyncio.to_thread(lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        response = await self._submit_via_outbox(key=key, context=context, path=path, body=body, kind="json", replace=replace)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except Exception as exc:
+            raise ValueError(f"IWAP response for '{context}' is not valid JSON") from exc
+
+    async def _submit_via_outbox(self, *, key: str, context: str, path: str, body: bytes, kind: str, replace: bool = False) -> Optional[httpx.Response]:
+        """
+        Persist the request, then send it inline (with the usual quick retries)
+        when it heads its lane; otherwise, or once the quick retries are spent,
+        leave it to the drainer and return None.
+        """
+        entry = await asyncio.to_thread(self._outbox.put, key=key, context=context, path=path, body=body, kind=kind, replace=replace, lane=outbox_lane(path))
+        if entry.state == OUTBOX_DONE:
+            bt.logging.debug(f"IWAP | [{context}] {key} was already delivered; not sending again")
+            return None
+        if entry.id in self._outbox_inflight or entry.next_attempt_at > time.time() or not await asyncio.to_thread(self._outbox.is_head, entry.id):
+            # Keep delivery in order within the lane: the drainer sends it after what is queued ahead.
+            self.ensure_outbox_drainer()
+            return None
+        entry_id = entry.id
+        self._outbox_inflight.add(entry_id)
+        try:
+            for delay in (*_RETRY_DELAYS, None):
+                response = await self._deliver_outbox_entry(entry, raise_client_errors=True)
+                if response is not None or delay is None:
+                    break
+                await asyncio.sleep(delay)
+                entry = await asyncio.to_thread(self._outbox.get, entry_id)
+                if entry is None or entry.state != OUTBOX_PENDING:
+                    break
+        finally:
+            self._outbox_inflight.discard(entry_id)
+        if response is None:
+            self.ensure_outbox_drainer()
+        return response
+
+    def _build_outbox_request(self, entry: OutboxEntry, encoded: Optional[EncodedBody]) -> httpx.Request:
+        if entry.kind == "gif":
+            evaluation_id = entry.path.rstrip("/").split("/")[-2]
+            request = self._client.build_request("POST", entry.path, files={"gif": (f"{evaluation_id}.gif", entry.body, "image/gif")})
+        else:
+            request = self._client.build_request("POST", entry.path, content=encoded.content, headers=encoded.headers)
+        request.headers.update(self._resolve_auth_headers())
+        request.headers["Idempotency-Key"] = entry.key
+        return request
+
+    async def _deliver_outbox_entry(self, entry: OutboxEntry, *, raise_client_errors: bool = False) -> Optional[httpx.Response]:
+        """
+        Send one outbox request once. Success (or a 409 for an already applied
+        write) marks it done; other 4xx responses mark it dead; anything else
+        schedules a retry with backoff and returns None.
+        """
+        from autoppia_web_agents_subnet.utils.logging import ColoredLogger
+
+        replay = f" (replay, attempt {entry.attempts + 1})" if entry.attempts else ""
+        try:
+            encoded = await self._encode_raw(entry.body) if entry.kind == "json" else EncodedBody(entry.body, entry.body)
+            request = self._build_outbox_request(entry, encoded)
+            if entry.attempts:
+                self.telemetry.observe_retry(entry.context)
+            else:
+                self.telemetry.observe_payload(entry.context, len(encoded.raw), len(encoded.content))
+            ColoredLogger.info(f"IWAP | [{entry.context}] POST {request.url} started{replay}", color=ColoredLogger.GOLD)
+            started = time.monotonic()
+            try:
+                response = await self._send_encoded(request, encoded)
+            except Exception as exc:
+                self.telemetry.observe_request(entry.context, time.monotonic() - started, exc)
+                raise
+            self.telemetry.observe_request(entry.context, time.monotonic() - started, response)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code if exc.response is not None else None
+            error = f"HTTP {status_code}: {self._debug_log.cap(exc.response.text) if exc.response is not None else ''}"
+            if status_code is not None and 400 <= status_code < 500:
+                if status_code == 409:
+                    await asyncio.to_thread(self._outbox.mark_done, entry.id)
+                else:
+                    await asyncio.to_thread(self._outbox.mark_dead, entry.id, error)
+                bt.logging.error(f"IWAP | [{entry.context}] POST {entry.path} rejected ({error}); not retrying")
+                if raise_client_errors:
+                    raise
+                return None
+            await self._outbox_attempt_failed(entry, error)
+            return None
+        except Exception as exc:  # noqa: BLE001
+            await self._outbox_attempt_failed(entry, f"{type(exc).__name__}: {exc}")
+            return None
+        await asyncio.to_thread(self._outbox.mark_done, entry.id)
+        ColoredLogger.info(f"IWAP | [{entry.context}] POST {entry.path} succeeded with status {response.status_code}{replay}", color=ColoredLogger.GOLD)
+        return response
+
+    async def _outbox_attempt_failed(self, entry: OutboxEntry, error: str) -> None:
+        from autoppia_web_agents_subnet.utils.logging import ColoredLogger
+
+        delay = await asyncio.to_thread(self._outbox.mark_failed, entry.id, error)
+        if delay is None:
+            self.telemetry.observe_exhausted(entry.context)
+            bt.logging.error(f"IWAP | [{entry.context}] POST {entry.path} failed ({error}); giving up on {entry.key} after {entry.attempts + 1} attempts")
+            return
+        ColoredLogger.warning(f"IWAP | [{entry.context}] POST {entry.path} failed ({error}); kept in outbox, retrying in {delay:.0f}s")
+
+    async def _drain_outbox(self) -> None:
+        while True:
+            # The lane head due soonest: a request in backoff only holds back its own lane.
+            entry = await asyncio.to_thread(self._outbox.next_ready, tuple(self._outbox_inflight))
+            if entry is None:
+                if self._outbox_inflight:
+                    # Only lanes with an inline send in flight are left; their later requests follow it.
+                    await asyncio.sleep(0.1)
+                    continue
+                return
+            if self._outbox.is_expired(entry):
+                await asyncio.to_thread(self._outbox.mark_dead, entry.id, "expired before delivery")
+                bt.logging.error(f"IWAP | [{entry.context}] giving up on {entry.key} after {entry.attempts} attempts (expired)")
+                continue
+            wait = entry.next_attempt_at - time.time()
+            if wait > 0:
+                # Short naps, so requests that fail inline meanwhile are picked up on time.
+                await asyncio.sleep(min(wait, 5.0))
+                continue
+            self._outbox_inflight.add(entry.id)
+            try:
+                await self._deliver_outbox_entry(entry)
+            finally:
+                self._outbox_inflight.discard(entry.id)
+
     async def _with_retry(
         self,
         operation: Callable[[int], Awaitable[T]],
@@ -651,14 +1156,18 @@ class IWAPClient:
         Retry an async IWAP operation up to three additional times with backoff.
 
         Retries occur after 0.5s, 1s, and 3s delays. HTTP 4xx responses are not retried
-        because they indicate client-side issues that a retry cannot resolve.
+        because they indicate client-side issues that a retry cannot resolve. Each
+        attempt's latency and outcome, and each retry, are recorded in `telemetry`
+        under `context`.
         """
-        delays = (0.5, 1.0, 3.0)
+        delays = _RETRY_DELAYS
         last_exc: Optional[BaseException] = None
 
         for attempt in range(len(delays) + 1):
+            if attempt:
+                self.telemetry.observe_retry(context)
             try:
-                return await operation(attempt)
+                return await self._timed_attempt(operation, attempt, context=context)
             except httpx.HTTPStatusError as exc:
                 status_code = exc.response.status_code if exc.response is not None else None
                 if status_code is not None and 400 <= status_code < 500:
@@ -670,6 +1179,7 @@ class IWAPClient:
             if attempt == len(delays):
                 from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 
+                self.telemetry.observe_exhausted(context)
                 bt.logging.error(f"IWAP | [{context}] Exhausted retries after {attempt + 1} attempts")
                 if last_exc is not None:
                     raise last_exc
@@ -685,6 +1195,16 @@ class IWAPClient:
             raise last_exc
         raise RuntimeError("IWAP retry reached unexpected state")
 
+    async def _timed_attempt(self, operation: Callable[[int], Awaitable[T]], attempt: int, *, context: str) -> T:
+        started = time.monotonic()
+        try:
+            result = await operation(attempt)
+        except Exception as exc:
+            self.telemetry.observe_request(context, time.monotonic() - started, exc)
+            raise
+        self.telemetry.observe_request(context, time.monotonic() - started, result)
+        return result
+
     async def _post(
         self,
         path: str,
@@ -707,43 +1227,39 @@ class IWAPClient:
             payload_keys = list(sanitized_payload.keys())
         else:
             payload_keys = []
-        try:
-            payload_len = len(str(sanitized_payload))
-        except Exception:
-            payload_len = -1
+        encoded = await self._encode_json(sanitized_payload)
+        self.telemetry.observe_payload(context, len(encoded.raw), len(encoded.content))
 
         async def attempt(attempt_index: int) -> httpx.Response:
-            request = self._client.build_request("POST", path, json=sanitized_payload)
+            request = self._client.build_request("POST", path, content=encoded.content, headers=encoded.headers)
             if auth_headers:
                 request.headers.update(auth_headers)
             target_url = str(request.url)
             attempt_number = attempt_index + 1
             attempt_suffix = f" (attempt {attempt_number})" if attempt_number > 1 else ""
+            sampled = self._debug_log.sample()
 
             from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 
-            ColoredLogger.info(f"IWAP | [{context}] 🌐 HTTP REQUEST DETAILS:", color=ColoredLogger.GOLD)
-            bt.logging.debug("   Method: POST")
-            bt.logging.debug(f"   URL: {target_url}")
-            bt.logging.debug(f"   Context: {context}")
-            bt.logging.debug(f"   Headers: {dict(request.headers)}")
-            if payload_keys:
-                bt.logging.debug(f"   Payload keys: {payload_keys}")
-            if payload_len >= 0:
-                bt.logging.debug(f"   Payload size: {payload_len} chars")
+            bt.logging.debug(f"IWAP | [{context}] POST {target_url}: {len(encoded.raw)} bytes ({len(encoded.content)} bytes sent, encoding={encoded.encoding})")
+            if sampled:
+                bt.logging.debug(f"   Headers: {self._debug_log.headers(request.headers)}")
+                if payload_keys:
+                    bt.logging.debug(f"   Payload keys: {payload_keys}")
+                bt.logging.debug(f"   Payload: {self._debug_log.cap(encoded.raw.decode('utf-8', errors='replace'))}")
 
             try:
                 ColoredLogger.info(f"IWAP | [{context}] POST {target_url} started{attempt_suffix}", color=ColoredLogger.GOLD)
-                response = await self._client.send(request)
+                response = await self._send_encoded(request, encoded)
                 response.raise_for_status()
                 ColoredLogger.info(f"IWAP | [{context}] POST {target_url} succeeded with status {response.status_code}", color=ColoredLogger.GOLD)
-                bt.logging.debug(f"   Response status: {response.status_code}")
-                bt.logging.debug(f"   Response headers: {dict(response.headers)}")
-                if response.text:
-                    bt.logging.debug(f"   Response body (first 500 chars): {response.text[:500]}")
+                if sampled:
+                    bt.logging.debug(f"   Response headers: {self._debug_log.headers(response.headers)}")
+                    if response.text:
+                        bt.logging.debug(f"   Response body: {self._debug_log.cap(response.text)}")
                 return response
             except httpx.HTTPStatusError as exc:
-                body = exc.response.text
+                body = self._debug_log.cap(exc.response.text)
                 bt.logging.error(f"IWAP | [{context}] POST {target_url} failed ({exc.response.status_code}): {body}")
                 raise
             except Exception:
@@ -809,6 +1325,7 @@ class IWAPClient:
         data_fields = list(sanitized_data.keys())
         file_fields = list(files.keys())
         total_body_size = len(body)
+        self.telemetry.observe_payload(context, total_body_size)
 
         async def attempt(attempt_index: int) -> httpx.Response:
             request = self._client.build_request("POST", path, content=body)
@@ -822,29 +1339,25 @@ class IWAPClient:
 
             from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 
-            ColoredLogger.info(f"IWAP | [{context}] 🌐 MULTIPART REQUEST DETAILS:", color=ColoredLogger.GOLD)
-            bt.logging.debug("   Method: POST")
-            bt.logging.debug(f"   URL: {target_url}")
-            bt.logging.debug(f"   Context: {context}")
-            bt.logging.debug(f"   Content-Type: multipart/form-data; boundary={boundary}")
-            bt.logging.debug(f"   Data fields: {data_fields}")
-            bt.logging.debug(f"   File fields: {file_fields}")
-            bt.logging.debug(f"   Total body size: {total_body_size} bytes")
-            for key, file_data in files.items():
-                bt.logging.debug(f"   File {key}: {len(file_data)} bytes")
+            sampled = self._debug_log.sample()
+            bt.logging.debug(f"IWAP | [{context}] POST {target_url} (multipart): {total_body_size} bytes, data fields {data_fields}, file fields {file_fields}")
+            if sampled:
+                bt.logging.debug(f"   Headers: {self._debug_log.headers(request.headers)}")
+                for key, file_data in files.items():
+                    bt.logging.debug(f"   File {key}: {len(file_data)} bytes")
 
             try:
                 ColoredLogger.info(f"IWAP | [{context}] POST {target_url} started (multipart){attempt_suffix}", color=ColoredLogger.GOLD)
                 response = await self._client.send(request)
                 response.raise_for_status()
                 ColoredLogger.info(f"IWAP | [{context}] POST {target_url} succeeded with status {response.status_code}", color=ColoredLogger.GOLD)
-                bt.logging.debug(f"   Response status: {response.status_code}")
-                bt.logging.debug(f"   Response headers: {dict(response.headers)}")
-                if response.text:
-                    bt.logging.debug(f"   Response body (first 500 chars): {response.text[:500]}")
+                if sampled:
+                    bt.logging.debug(f"   Response headers: {self._debug_log.headers(response.headers)}")
+                    if response.text:
+                        bt.logging.debug(f"   Response body: {self._debug_log.cap(response.text)}")
                 return response
             except httpx.HTTPStatusError as exc:
-                body_text = exc.response.text
+                body_text = self._debug_log.cap(exc.response.text)
                 bt.logging.error(f"IWAP | [{context}] POST {target_url} failed ({exc.response.status_code}): {body_text}")
                 raise
             except Exception:
@@ -905,32 +1418,19 @@ class IWAPClient:
         round_number_in_season = self._to_int(payload.get("round_number_in_season"))
         return season_number, round_number_in_season
 
-    def _resolve_log_dir(self, season_number: Optional[int], round_number_in_season: Optional[int]) -> Path:
-        season_token = f"season_{season_number}" if season_number is not None else "season_unknown"
-        round_token = f"round_{round_number_in_season}" if round_number_in_season is not None else "round_unknown"
-        return self._backup_dir / season_token / round_token / "logs"
-
     def _backup_payload(
         self,
         context: str,
         payload: Dict[str, object],
         season_number: Optional[int] = None,
         round_number_in_season: Optional[int] = None,
+        sanitized: bool = True,
     ) -> None:
-        if not self._backup_dir:
+        """Hand the payload to the background backup writer; unsanitized payloads are sanitized off the event loop."""
+        if self._backup_writer is None:
             return
-        target_dir = self._resolve_log_dir(season_number, round_number_in_season)
-        target_dir.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.utcnow().isoformat().replace(":", "-")
-        filename = f"{timestamp}_{context}.json"
-        target = target_dir / filename
-        try:
-            with target.open("w", encoding="utf-8") as fh:
-                json.dump(_sanitize_json(payload), fh, ensure_ascii=False, indent=2)
-        except Exception:
-            from autoppia_web_agents_subnet.utils.logging import ColoredLogger
-
-            ColoredLogger.warning(f"IWAP | Failed to persist backup payload at {target}")
+        if not self._backup_writer.submit(context, payload, season_number=season_number, round_number_in_season=round_number_in_season, sanitized=sanitized):
+            bt.logging.debug(f"IWAP | Backup queue full; {context} payload not backed up")
 
 
 def build_miner_identity(
@@ -0,0 +1,124 @@
+"""
+Request-body compression for IWAP uploads.
+
+Evaluation batches and task logs carry execution histories with full HTML
+snapshots, so their JSON bodies are large and very repetitive. Bodies above
+a size threshold are sent with `Content-Encoding: gzip` (or zstd when the
+optional `zstandard` package is installed) once the backend is known to
+accept it: either configured explicitly, or advertised by the backend via an
+`Accept-Encoding` response header (RFC 7694). A 415 response to a
+compressed body turns compression off for that client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    import zstandard  # type: ignore
+
+    _HAVE_ZSTD = True
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+    _HAVE_ZSTD = False
+
+IDENTITY = "identity"
+# Bodies larger than this are compressed in a worker thread, not on the event loop.
+OFFLOAD_MIN_BYTES = 256 * 1024
+
+
+def available_encodings() -> Set[str]:
+    return {"gzip", "zstd"} if _HAVE_ZSTD else {"gzip"}
+
+
+def parse_accept_encoding(header: Optional[str]) -> Set[str]:
+    """Content codings listed in an Accept-Encoding header (q=0 entries excluded)."""
+    codings: Set[str] = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        if params.replace(" ", "").lower() in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        codings.add(name)
+    return codings
+
+
+def choose_encoding(mode: str, advertised: Iterable[str]) -> str:
+    """
+    Pick the request coding for `mode`: "none", "gzip"/"zstd" (forced; zstd
+    falls back to gzip without the package) or "auto" (best coding the
+    backend advertised that we support).
+    """
+    mode = (mode or "none").strip().lower()
+    if mode in {"gzip", "zstd"}:
+        return mode if mode in available_encodings() else "gzip"
+    if mode != "auto":
+        return IDENTITY
+    usable = available_encodings() & {c.lower() for c in advertised}
+    for coding in ("zstd", "gzip"):
+        if coding in usable:
+            return coding
+    return IDENTITY
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # Level 6: most of level 9's ratio on repetitive HTML at a fraction of the CPU.
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(body)
+    return body
+
+
+def decompress(body: bytes, encoding: str, *, limit: int = 512 * 1024 * 1024) -> bytes:
+    """Inverse of `compress`, refusing to inflate past `limit` bytes."""
+    encoding = (encoding or IDENTITY).strip().lower()
+    if encoding in {"", IDENTITY}:
+        out = body
+    elif encoding == "gzip":
+        out = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, limit + 1)
+    elif encoding == "zstd":
+        if not _HAVE_ZSTD:
+            raise ValueError("body is zstd-encoded but the 'zstandard' package is not installed")
+        out = zstandard.ZstdDecompressor().stream_reader(body).read(limit + 1)
+    else:
+        raise ValueError(f"unsupported content encoding {encoding!r}")
+    if len(out) > limit:
+        raise ValueError(f"decoded body exceeds {limit} bytes")
+    return out
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    raw: bytes
+    content: bytes
+    encoding: str = IDENTITY
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.encoding != IDENTITY:
+            headers["Content-Encoding"] = self.encoding
+        return headers
+
+    def identity(self) -> "EncodedBody":
+        return EncodedBody(self.raw, self.raw)
+
+
+async def encode_body(raw: bytes, encoding: str, *, min_bytes: int) -> EncodedBody:
+    """Compress `raw` with `encoding` when it is at least `min_bytes` and compression actually helps."""
+    if encoding == IDENTITY or len(raw) < max(0, int(min_bytes)):
+        return EncodedBody(raw, raw)
+    if len(raw) >= OFFLOAD_MIN_BYTES:
+        content = await asyncio.to_thread(compress, raw, encoding)
+    else:
+        content = compress(raw, encoding)
+    if len(content) >= len(raw):
+        return EncodedBody(raw, raw)
+    return EncodedBody(raw, content, encoding)
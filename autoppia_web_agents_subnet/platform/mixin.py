@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
@@ -16,6 +17,7 @@ from autoppia_web_agents_subnet.validator.config import (
 from autoppia_web_agents_subnet.validator.models import TaskWithProject
 from autoppia_web_agents_subnet.platform import models as iwa_models
 from autoppia_web_agents_subnet.platform import client as iwa_main
+from autoppia_web_agents_subnet.platform.outbox import IWAPOutbox
 
 from autoppia_web_agents_subnet.platform.utils.iwa_core import (
     log_iwap_phase,
@@ -32,10 +34,14 @@ from autoppia_web_agents_subnet.platform.utils.round_flow import (
     start_round_flow as _utils_start_round_flow,
     finish_round_flow as _utils_finish_round_flow,
     register_participating_miners_in_iwap as _utils_register_participating_miners_in_iwap,
+    cancel_pending_miner_registrations as _utils_cancel_pending_miner_registrations,
 )
 from autoppia_web_agents_subnet.platform.utils.task_flow import (
     submit_task_results as _utils_submit_task_results,
 )
+from autoppia_web_agents_subnet.platform.utils.evaluation_uploader import IWAPEvaluationUploader
+from autoppia_web_agents_subnet.platform.utils.gif_uploader import GIFUploadPool
+from autoppia_web_agents_subnet.platform.utils.round_log_uploader import IncrementalRoundLogUploader
 
 
 class ValidatorPlatformMixin:
@@ -52,16 +58,36 @@ class ValidatorPlatformMixin:
         os.environ.setdefault("IWAP_BACKUP_DIR", str(default_backup_dir))
         backup_dir = Path(os.environ.get("IWAP_BACKUP_DIR", str(default_backup_dir)))
         self._IWAP_VALIDATOR_AUTH_MESSAGE = IWAP_VALIDATOR_AUTH_MESSAGE or "I am a honest validator"
+        metrics_textfile = str(getattr(validator_config, "IWAP_METRICS_TEXTFILE", "") or "").strip()
+        self._iwap_metrics_path: Optional[Path] = None if metrics_textfile.lower() in {"off", "none", "0"} else Path(metrics_textfile or backup_dir / "metrics" / "iwap_client.prom")
         self._auth_warning_emitted = False
+        outbox: Optional[IWAPOutbox] = None
+        if getattr(validator_config, "IWAP_OUTBOX_ENABLED", False):
+            try:
+                outbox = IWAPOutbox(
+                    backup_dir / "iwap_outbox.sqlite3",
+                    max_age_s=float(getattr(validator_config, "IWAP_OUTBOX_MAX_AGE_HOURS", 24.0) or 0.0) * 3600.0,
+                    max_attempts=int(getattr(validator_config, "IWAP_OUTBOX_MAX_ATTEMPTS", 12) or 0),
+                )
+            except Exception as exc:
+                bt.logging.warning(f"IWAP outbox unavailable at {backup_dir}; submitting without it: {exc}")
         self.iwap_client = iwa_main.IWAPClient(
             base_url=IWAP_API_BASE_URL,
             backup_dir=backup_dir,
             auth_provider=self._build_iwap_auth_headers,
+            outbox=outbox,
+        )
+        self.round_log_uploader = IncrementalRoundLogUploader(
+            self.iwap_client,
+            chunked=bool(getattr(validator_config, "ROUND_LOG_CHUNKED_UPLOADS", True)),
+            max_chunk_bytes=int(getattr(validator_config, "ROUND_LOG_CHUNK_MAX_BYTES", 4 * 1024 * 1024) or 4 * 1024 * 1024),
         )
         self.current_round_id: Optional[str] = None
         self.current_round_tasks: Dict[str, iwa_models.TaskIWAP] = {}
         self.current_agent_runs: Dict[int, iwa_models.AgentRunIWAP] = {}
         self.current_miner_snapshots: Dict[int, iwa_models.MinerSnapshotIWAP] = {}
+        # Background start_agent_run retries for miners whose registration failed, by uid.
+        self.pending_miner_registrations: Dict[int, asyncio.Task] = {}
         self._iwap_shadow_mode = False
         self.round_handshake_payloads: Dict[int, Any] = {}
         self.eligibility_status_by_uid: Dict[int, str] = {}
@@ -81,6 +107,28 @@ class ValidatorPlatformMixin:
         self._round_log_last_upload_round_id: Optional[str] = None
         # Phase flags for IWAP steps (p1=start_round, p2=set_tasks)
         self._phases: Dict[str, Any] = {"p1_done": False, "p2_done": False}
+        # Evaluation batches are submitted by a background uploader (None = inline submission).
+        self.iwap_uploader: Optional[IWAPEvaluationUploader] = None
+        upload_queue_size = int(getattr(validator_config, "IWAP_UPLOAD_QUEUE_SIZE", 0) or 0)
+        if upload_queue_size > 0:
+            self.iwap_uploader = IWAPEvaluationUploader(
+                self._submit_queued_iwap_evaluations,
+                max_queue=upload_queue_size,
+                max_batch_evaluations=int(getattr(validator_config, "IWAP_UPLOAD_MAX_BATCH_EVALUATIONS", 25) or 25),
+                linger_s=float(getattr(validator_config, "IWAP_UPLOAD_LINGER_SECONDS", 2.0) or 0.0),
+            )
+        # Evaluation GIFs are uploaded by a worker pool (None = one by one after each batch).
+        self.gif_upload_pool: Optional[GIFUploadPool] = None
+        gif_concurrency = int(getattr(validator_config, "IWAP_GIF_UPLOAD_CONCURRENCY", 0) or 0)
+        if gif_concurrency > 0:
+            self.gif_upload_pool = GIFUploadPool(
+                self._upload_evaluation_gif_once,
+                concurrency=gif_concurrency,
+                timeout_s=float(getattr(validator_config, "IWAP_GIF_UPLOAD_TIMEOUT_SECONDS", 60.0) or 60.0),
+                max_attempts=int(getattr(validator_config, "IWAP_GIF_UPLOAD_MAX_ATTEMPTS", 3) or 1),
+            )
+        # This round's GIF upload outcomes by evaluation id, summarized into summary_round.json.
+        self.gif_upload_outcomes: Dict[str, Dict[str, Any]] = {}
 
     def _log_iwap_phase(self, phase: str, message: str, *, level: str = "info", exc_info: bool = False) -> None:
         # Delegate to logging utility (keeps test compatibility with monkeypatching this method)
@@ -147,6 +195,8 @@ class ValidatorPlatformMixin:
         return _utils_build_iwap_tasks(validator_round_id=validator_round_id, tasks=tasks)
 
     async def _iwap_start_round(self, *, current_block: int, n_tasks: int) -> None:
+        # Resume replaying anything a previous round (or process) left in the outbox.
+        self.iwap_client.ensure_outbox_drainer()
         await _utils_start_round_flow(self, current_block=current_block, n_tasks=n_tasks)
 
     @staticmethod
@@ -167,10 +217,12 @@ class ValidatorPlatformMixin:
         reason: str,
         force: bool = False,
         min_interval_seconds: Optional[float] = None,
+        final: bool = False,
     ) -> Optional[str]:
         """
         Best-effort upload of the current round log file to IWAP/S3.
         Safe to call frequently; throttled by interval and no-change checks.
+        Only bytes appended since the previous upload are sent; `final` seals the log.
         """
         if getattr(self, "_iwap_offline_mode", False):
             return None
@@ -207,8 +259,7 @@ class ValidatorPlatformMixin:
             return self._round_log_last_uploaded_url
 
         try:
-            content = round_log_path.read_text(encoding="utf-8", errors="replace")
-            content_size = len(content.encode("utf-8"))
+            content_size = round_log_path.stat().st_size
         except Exception as exc:
             self._log_iwap_phase(
                 "Phase 5",
@@ -218,7 +269,7 @@ class ValidatorPlatformMixin:
             )
             return self._round_log_last_uploaded_url
 
-        if not force and content_size == self._round_log_last_uploaded_size:
+        if not force and not final and content_size == self._round_log_last_uploaded_size:
             return self._round_log_last_uploaded_url
 
         season_number, round_number_in_season = self._extract_round_numbers_from_round_id(round_id)
@@ -241,10 +292,14 @@ class ValidatorPlatformMixin:
         except Exception:
             validator_hotkey = None
 
+        uploader = getattr(self, "round_log_uploader", None)
+        if not isinstance(uploader, IncrementalRoundLogUploader) or uploader.client is not self.iwap_client:
+            uploader = self.round_log_uploader = IncrementalRoundLogUploader(self.iwap_client, chunked=bool(getattr(validator_config, "ROUND_LOG_CHUNKED_UPLOADS", True)))
         try:
-            url = await self.iwap_client.upload_round_log(
-                validator_round_id=round_id,
-                content=content,
+            url = await uploader.upload(
+                round_log_path,
+                round_id=round_id,
+                final=final,
                 season_number=season_number if isinstance(season_number, int) else None,
                 round_number_in_season=round_number_in_season if isinstance(round_number_in_season, int) else None,
                 validator_uid=validator_uid if isinstance(validator_uid, int) else None,
@@ -271,6 +326,59 @@ class ValidatorPlatformMixin:
             )
         return self._round_log_last_uploaded_url
 
+    async def _submit_queued_iwap_evaluations(self, round_id: str, agent_uid: int, batch_eval_data: List[dict]) -> None:
+        """Uploader callback: submit a coalesced batch unless its round has already been closed."""
+        if round_id != getattr(self, "current_round_id", None):
+            self._log_iwap_phase(
+                "Phase 4",
+                f"dropping {len(batch_eval_data)} queued evaluations for agent {agent_uid}: round {round_id} is no longer current",
+                level="warning",
+            )
+            return
+        await self._deliver_batch_evaluations_to_iwap(agent_uid=agent_uid, batch_eval_data=batch_eval_data)  # type: ignore[attr-defined]
+
+    async def _upload_evaluation_gif_once(self, evaluation_id: str, gif_bytes: bytes) -> Optional[str]:
+        """GIFUploadPool callback: one attempt, the pool owns timeouts and retries."""
+        return await self.iwap_client.upload_evaluation_gif(evaluation_id, gif_bytes, retry=False)
+
+    async def _flush_iwap_submissions(self, *, reason: str) -> bool:
+        """Drain the evaluation uploader and GIF pool, then give the outbox a bounded chance to deliver."""
+        flushed = True
+        uploader = getattr(self, "iwap_uploader", None)
+        if isinstance(uploader, IWAPEvaluationUploader):
+            timeout = float(getattr(validator_config, "IWAP_UPLOAD_FLUSH_TIMEOUT_SECONDS", 300.0) or 300.0)
+            flushed = await uploader.flush(timeout=timeout)
+            self._log_iwap_phase(
+                "Phase 4",
+                f"evaluation uploader flushed ({reason}): {uploader.stats()}",
+                level="info" if flushed else "warning",
+            )
+        gif_pool = getattr(self, "gif_upload_pool", None)
+        if isinstance(gif_pool, GIFUploadPool):
+            timeout = float(getattr(validator_config, "IWAP_GIF_UPLOAD_FLUSH_TIMEOUT_SECONDS", 180.0) or 0.0)
+            flushed = await gif_pool.flush(timeout=timeout) and flushed
+            self._log_iwap_phase(
+                "Phase 4",
+                f"GIF uploads flushed ({reason}): {gif_pool.stats()}",
+                level="info" if gif_pool.failed == 0 else "warning",
+            )
+        client = getattr(self, "iwap_client", None)
+        if isinstance(client, iwa_main.IWAPClient):
+            timeout = float(getattr(validator_config, "IWAP_OUTBOX_FLUSH_TIMEOUT_SECONDS", 60.0) or 0.0)
+            flushed = await client.flush_outbox(timeout=timeout) and flushed
+        return flushed
+
+    def _export_iwap_metrics(self) -> None:
+        """Write the IWAP client's cumulative request metrics to the Prometheus textfile (best effort)."""
+        client = getattr(self, "iwap_client", None)
+        path = getattr(self, "_iwap_metrics_path", None)
+        if not isinstance(client, iwa_main.IWAPClient) or not isinstance(path, Path):
+            return
+        try:
+            client.telemetry.write_textfile(path)
+        except Exception as exc:
+            bt.logging.debug(f"IWAP metrics textfile not written to {path}: {exc}")
+
     async def _iwap_register_miners(self) -> None:
         """
         Register all participating miners in IWAP dashboard after handshake.
@@ -314,6 +422,8 @@ class ValidatorPlatformMixin:
         final_weights: Dict[int, float],
         tasks_completed: int,
     ) -> bool:
+        # Every queued evaluation must reach IWAP before the round is closed there.
+        await self._flush_iwap_submissions(reason="finish_round")
         return await _utils_finish_round_flow(
             self,
             avg_rewards=avg_rewards,
@@ -401,6 +511,12 @@ class ValidatorPlatformMixin:
                     "failed_tasks": (tasks or len(miner_rewards)) - success_tasks,
                     "zero_reason": getattr(agent_for_uid, "zero_reason", None) if agent_for_uid else None,
                 }
+        _utils_cancel_pending_miner_registrations(self)
+        client = getattr(self, "iwap_client", None)
+        if isinstance(client, iwa_main.IWAPClient):
+            self._export_iwap_metrics()
+            client.telemetry.reset_round()
+        self.gif_upload_outcomes = {}
         self.current_round_id = None
         self.current_round_tasks = {}
         self.current_agent_runs = {}
@@ -0,0 +1,275 @@
+"""
+Durable outbox for IWAP write requests.
+
+Every request routed through the outbox is committed to a local SQLite
+database before it is sent and marked done once IWAP accepts it. Requests
+that fail with a network error or 5xx stay pending and are replayed by
+IWAPClient's drainer, with exponential backoff whose schedule is stored
+alongside the request so it survives validator restarts, until they succeed,
+run out of attempts (`max_attempts`) or expire (`max_age_s`).
+
+Ordering is kept only where it matters: each request belongs to a lane (its
+agent run or round, see `outbox_lane`; requests without one get a lane of
+their own) and only the oldest pending request of a lane may be sent. A
+request that keeps failing holds back its own lane, not everything queued
+after it.
+Each request carries an idempotency key (derived from the ids the
+`generate_*_id` helpers put in the payload), which deduplicates local
+re-submissions and is sent as the `Idempotency-Key` header on replay.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+PENDING = "pending"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    context TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    lane TEXT,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    done_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (state, id);
+"""
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    id: int
+    key: str
+    context: str
+    path: str
+    kind: str
+    body: bytes
+    created_at: float
+    attempts: int
+    next_attempt_at: float
+    state: str
+
+
+class IWAPOutbox:
+    """
+    SQLite-backed queue of IWAP requests (`kind` is "json" for a JSON body, "gif" for GIF bytes), FIFO per lane.
+
+    All methods are synchronous and thread-safe; IWAPClient calls them through
+    asyncio.to_thread so disk I/O never runs on the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        base_backoff_s: float = 2.0,
+        max_backoff_s: float = 600.0,
+        max_age_s: float = 24 * 3600.0,
+        max_attempts: int = 12,
+        keep_done_s: float = 3600.0,
+        time_fn=time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.base_backoff_s = float(base_backoff_s)
+        self.max_backoff_s = float(max_backoff_s)
+        self.max_age_s = float(max_age_s)
+        self.max_attempts = max(0, int(max_attempts))
+        self.keep_done_s = float(keep_done_s)
+        self._time = time_fn
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "lane" not in columns:
+            # Outboxes written before lanes existed: every old request gets a lane of its own.
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN lane TEXT")
+            self._conn.execute("UPDATE outbox SET lane = key WHERE lane IS NULL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_lane ON outbox (state, lane, id)")
+        self.prune()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── enqueue ─────────────────────────────────────────────────────────────
+
+    def put(self, *, key: str, context: str, path: str, body: bytes, kind: str = "json", replace: bool = False, lane: Optional[str] = None) -> OutboxEntry:
+        """
+        Persist a request and return its entry; `lane` defaults to the key (no ordering).
+
+        A pending request with the same key is kept as is (or, with `replace`,
+        gets the new body in its original queue position). A request whose key
+        was already delivered is returned as DONE and not queued again, unless
+        `replace` is set, in which case it is queued anew at the tail.
+        """
+        now = self._time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                entry = self._put_locked(key=key, context=context, path=path, body=body, kind=kind, replace=replace, lane=lane or key, now=now)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return entry
+
+    def _put_locked(self, *, key: str, context: str, path: str, body: bytes, kind: str, replace: bool, lane: str, now: float) -> OutboxEntry:
+        existing = self._conn.execute("SELECT id, state FROM outbox WHERE key = ?", (key,)).fetchone()
+        if existing is not None:
+            entry_id, state = existing
+            if state == PENDING and replace:
+                self._conn.execute("UPDATE outbox SET body = ?, path = ? WHERE id = ?", (body, path, entry_id))
+                return self._get(entry_id)
+            if state == PENDING or not replace:
+                return self._get(entry_id)
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        cursor = self._conn.execute(
+            "INSERT INTO outbox (key, context, path, kind, lane, body, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, context, path, kind, lane, body, now),
+        )
+        return self._get(cursor.lastrowid)
+
+    # ── drain ───────────────────────────────────────────────────────────────
+
+    def head(self) -> Optional[OutboxEntry]:
+        """Oldest pending request, or None when the outbox is drained."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM outbox WHERE state = ? ORDER BY id LIMIT 1", (PENDING,)).fetchone()
+        return OutboxEntry(*row) if row else None
+
+    def next_ready(self, exclude: Iterable[int] = ()) -> Optional[OutboxEntry]:
+        """
+        The lane head due soonest (ready ones first, oldest first among those), or
+        None when nothing is pending. Lanes whose head is in `exclude` (being sent
+        inline) are skipped.
+        """
+        excluded = sorted({int(entry_id) for entry_id in exclude})
+        not_in = f" AND o.id NOT IN ({','.join('?' * len(excluded))})" if excluded else ""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM outbox o WHERE o.state = ? AND o.id = (SELECT MIN(i.id) FROM outbox i WHERE i.state = ? AND i.lane = o.lane){not_in} ORDER BY o.next_attempt_at, o.id LIMIT 1",
+                (PENDING, PENDING, *excluded),
+            ).fetchone()
+        return OutboxEntry(*row) if row else None
+
+    def is_head(self, entry_id: int) -> bool:
+        """True when no older request of the same lane is still pending."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox o WHERE o.state = ? AND o.id < ? AND o.lane = (SELECT lane FROM outbox WHERE id = ?) LIMIT 1",
+                (PENDING, entry_id, entry_id),
+            ).fetchone()
+        return row is None
+
+    def get(self, entry_id: int) -> Optional[OutboxEntry]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return OutboxEntry(*row) if row else None
+
+    def state_of(self, key: str) -> Optional[str]:
+        """State of the request stored under `key`, or None when there is none."""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM outbox WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def mark_done(self, entry_id: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET state = ?, done_at = ?, body = ? WHERE id = ?", (DONE, self._time(), b"", entry_id))
+
+    def mark_dead(self, entry_id: int, error: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET state = ?, done_at = ?, last_error = ? WHERE id = ?", (DEAD, self._time(), error[:2000], entry_id))
+
+    def mark_failed(self, entry_id: int, error: str) -> Optional[float]:
+        """
+        Record a failed attempt and schedule the next one; returns the backoff
+        delay in seconds, or None when that was the last of `max_attempts` and
+        the request is now dead.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            attempts = (int(row[0]) if row else 0) + 1
+            if self.max_attempts and attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, state = ?, done_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, DEAD, self._time(), error[:2000], entry_id),
+                )
+                return None
+            delay = min(self.base_backoff_s * (2 ** min(attempts - 1, 20)), self.max_backoff_s)
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, self._time() + delay, error[:2000], entry_id),
+            )
+        return delay
+
+    def is_expired(self, entry: OutboxEntry) -> bool:
+        return self.max_age_s > 0 and self._time() - entry.created_at > self.max_age_s
+
+    # ── housekeeping ────────────────────────────────────────────────────────
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall()
+        counts = {PENDING: 0, DONE: 0, DEAD: 0}
+        counts.update({state: int(n) for state, n in rows})
+        return counts
+
+    def prune(self) -> int:
+        """Drop delivered requests older than `keep_done_s`; dead ones are kept for inspection."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM outbox WHERE state = ? AND done_at < ?", (DONE, self._time() - self.keep_done_s))
+        return cursor.rowcount
+
+    def _get(self, entry_id: int) -> OutboxEntry:
+        row = self._conn.execute(f"SELECT {_COLUMNS} FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return OutboxEntry(*row)
+
+
+_COLUMNS = "id, key, context, path, kind, body, created_at, attempts, next_attempt_at, state"
+
+
+def outbox_key(context: str, *parts: Any) -> str:
+    """Idempotency key for a request: its context plus the ids that identify it (long id lists are hashed)."""
+    ids = ":".join(str(part) for part in parts)
+    if len(ids) > 200:
+        ids = hashlib.sha256(ids.encode("utf-8")).hexdigest()
+    return f"{context}:{ids}"
+
+
+_RUN_PATH = re.compile(r"/validator-rounds/([^/?]+)/agent-runs/([^/?]+)/")
+_ROUND_PATH = re.compile(r"/validator-rounds/([^/?]+)/")
+
+
+def outbox_lane(path: str) -> Optional[str]:
+    """
+    Ordering lane of a request path: writes for one agent run (evaluation
+    batches) stay in order, as do round-level writes (round logs); anything
+    else (GIFs, task logs) is independent and gets None.
+    """
+    match = _RUN_PATH.search(path)
+    if match:
+        return f"agent_run:{match.group(2)}"
+    match = _ROUND_PATH.search(path)
+    if match:
+        return f"round:{match.group(1)}"
+    return None
@@ -0,0 +1,231 @@
+"""
+Request telemetry for IWAPClient.
+
+`IWAPTelemetry` keeps, per endpoint (the request `context`, e.g.
+"add_evaluations_batch"), a latency histogram of every HTTP attempt, request
+payload sizes (serialized and as sent on the wire), retries, exhausted retry
+loops and outcomes by status ("200", "503", "timeout", "network", ...).
+Everything is counted twice: cumulatively since start-up and for the current
+round. `round_summary()` is what goes into summary_round.json and
+`reset_round()` starts the next round. `render_prometheus()` /
+`write_textfile()` expose the cumulative counters in the Prometheus text
+format, for node_exporter's textfile collector.
+
+Recording is a few dict and list updates on the event loop; nothing here does
+I/O except `write_textfile`.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def status_label(outcome: Any) -> str:
+    """Outcome label of one attempt: the HTTP status code, or the kind of transport failure."""
+    if isinstance(outcome, httpx.Response):
+        return str(outcome.status_code)
+    if isinstance(outcome, httpx.HTTPStatusError) and outcome.response is not None:
+        return str(outcome.response.status_code)
+    if isinstance(outcome, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(outcome, httpx.TransportError):
+        return "network"
+    if isinstance(outcome, BaseException):
+        return "error"
+    return "ok"
+
+
+class _EndpointStats:
+    __slots__ = ("buckets", "latency_counts", "requests", "latency_sum", "latency_max", "payloads", "payload_bytes", "wire_bytes", "payload_max", "retries", "exhausted", "statuses")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.latency_counts = [0] * (len(buckets) + 1)
+        self.requests = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.payloads = 0
+        self.payload_bytes = 0
+        self.wire_bytes = 0
+        self.payload_max = 0
+        self.retries = 0
+        self.exhausted = 0
+        self.statuses: Dict[str, int] = {}
+
+    def observe_request(self, elapsed_s: float, status: str) -> None:
+        idx = 0
+        while idx < len(self.buckets) and elapsed_s > self.buckets[idx]:
+            idx += 1
+        self.latency_counts[idx] += 1
+        self.requests += 1
+        self.latency_sum += elapsed_s
+        self.latency_max = max(self.latency_max, elapsed_s)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def observe_payload(self, raw_bytes: int, wire_bytes: int) -> None:
+        self.payloads += 1
+        self.payload_bytes += raw_bytes
+        self.wire_bytes += wire_bytes
+        self.payload_max = max(self.payload_max, raw_bytes)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.requests:
+            return None
+        rank = q * self.requests
+        seen = 0
+        for idx, count in enumerate(self.latency_counts):
+            seen += count
+            if seen >= rank and count:
+                bound = self.buckets[idx] if idx < len(self.buckets) else math.inf
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def summary(self) -> Dict[str, Any]:
+        failures = {status: count for status, count in self.statuses.items() if not status.startswith(("1", "2", "3")) and status != "ok"}
+        return {
+            "requests": self.requests,
+            "latency_s": {
+                "mean": round(self.latency_sum / self.requests, 4) if self.requests else None,
+                "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95),
+                "max": round(self.latency_max, 4) if self.requests else None,
+                "total": round(self.latency_sum, 4),
+            },
+            "payload_bytes": {
+                "count": self.payloads,
+                "total": self.payload_bytes,
+                "sent": self.wire_bytes,
+                "mean": self.payload_bytes // self.payloads if self.payloads else None,
+                "max": self.payload_max,
+            },
+            "retries": self.retries,
+            "retries_exhausted": self.exhausted,
+            "statuses": dict(self.statuses),
+            "failures": failures,
+        }
+
+
+class IWAPTelemetry:
+    def __init__(self, *, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._total: Dict[str, _EndpointStats] = {}
+        self._round: Dict[str, _EndpointStats] = {}
+
+    def _both(self, endpoint: str) -> Tuple[_EndpointStats, _EndpointStats]:
+        total = self._total.get(endpoint)
+        if total is None:
+            total = self._total[endpoint] = _EndpointStats(self.buckets)
+        current = self._round.get(endpoint)
+        if current is None:
+            current = self._round[endpoint] = _EndpointStats(self.buckets)
+        return total, current
+
+    # ── recording ───────────────────────────────────────────────────────────
+
+    def observe_request(self, endpoint: str, elapsed_s: float, outcome: Any) -> None:
+        """One HTTP attempt; `outcome` is the response or the exception it raised."""
+        status = status_label(outcome)
+        for stats in self._both(endpoint):
+            stats.observe_request(max(0.0, float(elapsed_s)), status)
+
+    def observe_payload(self, endpoint: str, raw_bytes: int, wire_bytes: Optional[int] = None) -> None:
+        for stats in self._both(endpoint):
+            stats.observe_payload(int(raw_bytes), int(raw_bytes if wire_bytes is None else wire_bytes))
+
+    def observe_retry(self, endpoint: str) -> None:
+        for stats in self._both(endpoint):
+            stats.retries += 1
+
+    def observe_exhausted(self, endpoint: str) -> None:
+        for stats in self._both(endpoint):
+            stats.exhausted += 1
+
+    # ── reporting ───────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Cumulative per-endpoint summary since start-up."""
+        return {endpoint: stats.summary() for endpoint, stats in sorted(self._total.items())}
+
+    def round_summary(self) -> Dict[str, Any]:
+        """Per-endpoint summary of the current round plus totals, for the round summary file."""
+        endpoints = {endpoint: stats.summary() for endpoint, stats in sorted(self._round.items())}
+        return {
+            "requests": sum(stats.requests for stats in self._round.values()),
+            "time_in_requests_s": round(sum(stats.latency_sum for stats in self._round.values()), 3),
+            "payload_bytes": sum(stats.payload_bytes for stats in self._round.values()),
+            "retries": sum(stats.retries for stats in self._round.values()),
+            "failures": sum(sum(summary["failures"].values()) for summary in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+    def reset_round(self) -> None:
+        self._round = {}
+
+    def render_prometheus(self, prefix: str = "iwap_client") -> str:
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds IWAP HTTP attempt latency by endpoint.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for endpoint, stats in sorted(self._total.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), stats.latency_counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {stats.latency_sum!r}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{endpoint}"}} {stats.requests}')
+        counters = (
+            ("requests_total", "IWAP HTTP attempts by endpoint and status.", lambda s: [(f',status="{status}"', n) for status, n in sorted(s.statuses.items())]),
+            ("payload_bytes_total", "Serialized IWAP request payload bytes by endpoint.", lambda s: [("", s.payload_bytes)]),
+            ("wire_bytes_total", "IWAP request body bytes sent (after compression) by endpoint.", lambda s: [("", s.wire_bytes)]),
+            ("payloads_total", "IWAP request payloads by endpoint.", lambda s: [("", s.payloads)]),
+            ("retries_total", "IWAP request retries by endpoint.", lambda s: [("", s.retries)]),
+            ("retries_exhausted_total", "IWAP requests that failed after all retries, by endpoint.", lambda s: [("", s.exhausted)]),
+        )
+        for name, help_text, samples in counters:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for endpoint, stats in sorted(self._total.items()):
+                for extra, value in samples(stats):
+                    lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"{extra}}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path | str) -> None:
+        """Atomically write `render_prometheus()` to `path` (node_exporter textfile collector)."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, target)
+
+
+class DebugLogSampler:
+    """Decides which requests get their headers/bodies logged at debug level, and caps what is logged."""
+
+    _REDACTED_HEADERS = frozenset({"authorization", "x-validator-signature", "cookie", "set-cookie"})
+
+    def __init__(self, rate: float = 0.05, max_chars: int = 1024, *, rng: Optional[random.Random] = None) -> None:
+        self.rate = min(1.0, max(0.0, float(rate)))
+        self.max_chars = max(0, int(max_chars))
+        self._rng = rng or random.Random()
+
+    def sample(self) -> bool:
+        return self.rate >= 1.0 or (self.rate > 0.0 and self._rng.random() < self.rate)
+
+    def cap(self, text: Any) -> str:
+        text = text if isinstance(text, str) else str(text)
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[: self.max_chars]}... [{len(text) - self.max_chars} more chars]"
+
+    def headers(self, headers: Any) -> Dict[str, str]:
+        return {key: ("<redacted>" if key.lower() in self._REDACTED_HEADERS else value) for key, value in dict(headers).items()}
@@ -0,0 +1,185 @@
+"""
+Background uploader for per-task evaluation results.
+
+The evaluation loop hands each finished batch to `IWAPEvaluationUploader.put`
+and moves on to the next tasks. A single worker task on the validator's event
+loop coalesces queued batches per (round, miner) into size- and time-bounded
+IWAP submissions and sends them while evaluation continues. `put` only waits
+when the bounded queue is full (backpressure against a slow dashboard), and
+`flush()` returns once everything queued before it has been submitted, so the
+round can be finished deterministically.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import bittensor as bt
+
+SubmitFn = Callable[[str, int, List[dict]], Awaitable[Any]]
+
+
+@dataclass
+class _PendingGroup:
+    round_id: str
+    agent_uid: int
+    evaluations: List[dict] = field(default_factory=list)
+    first_queued_at: float = 0.0
+
+
+@dataclass
+class _Flush:
+    done: asyncio.Future
+
+
+class IWAPEvaluationUploader:
+    def __init__(
+        self,
+        submit: SubmitFn,
+        *,
+        max_queue: int = 32,
+        max_batch_evaluations: int = 25,
+        linger_s: float = 2.0,
+        time_fn: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._submit = submit
+        self.max_queue = max(1, int(max_queue))
+        self.max_batch_evaluations = max(1, int(max_batch_evaluations))
+        self.linger_s = max(0.0, float(linger_s))
+        self._time = time_fn
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Dict[Tuple[str, int], _PendingGroup] = {}
+        self._queued = 0
+
+        self.enqueued = 0
+        self.batches_submitted = 0
+        self.evaluations_submitted = 0
+        self.failures = 0
+        self.backpressure_waits = 0
+        self.backpressure_wait_s = 0.0
+
+    # ── producer side ───────────────────────────────────────────────────────
+
+    async def put(self, round_id: str, agent_uid: int, batch_eval_data: List[dict]) -> None:
+        """Queue one evaluation batch; waits only while the queue is full."""
+        if not batch_eval_data:
+            return
+        queue = self._ensure_worker()
+        item = (str(round_id), int(agent_uid), list(batch_eval_data))
+        if queue.full():
+            self.backpressure_waits += 1
+            started = self._time()
+            bt.logging.warning(f"IWAP upload queue full ({queue.qsize()}/{self.max_queue}); evaluation waits for the uploader")
+            await queue.put(item)
+            self.backpressure_wait_s += self._time() - started
+        else:
+            queue.put_nowait(item)
+        self._queued += len(item[2])
+        self.enqueued += len(item[2])
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Submit everything queued so far; True once it has all been handed to IWAP."""
+        if self._queue is None and not self._pending:
+            return True
+        queue = self._ensure_worker()
+        done = asyncio.get_running_loop().create_future()
+        await queue.put(_Flush(done))
+        try:
+            await asyncio.wait_for(asyncio.shield(done), timeout)
+        except asyncio.TimeoutError:
+            bt.logging.warning(f"IWAP upload flush timed out after {timeout}s with {self.backlog()} evaluations still queued")
+            return False
+        return True
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        await self.flush(timeout)
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+
+    def backlog(self) -> int:
+        """Evaluations queued or coalescing but not yet submitted."""
+        return self._queued + sum(len(group.evaluations) for group in self._pending.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "batches_submitted": self.batches_submitted,
+            "evaluations_submitted": self.evaluations_submitted,
+            "failures": self.failures,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_wait_s": round(self.backpressure_wait_s, 3),
+            "backlog": self.backlog(),
+        }
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._worker.get_loop() is loop:
+            return self._queue
+        # First use, or the previous worker's loop is gone: coalescing groups carry over.
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._queued = 0
+        self._worker = loop.create_task(self._run(), name="iwap-evaluation-uploader")
+        return self._queue
+
+    # ── worker side ─────────────────────────────────────────────────────────
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        oldest = min(group.first_queued_at for group in self._pending.values())
+        return max(0.0, oldest + self.linger_s - self._time())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), self._next_deadline())
+            except asyncio.TimeoutError:
+                item = None
+
+            if isinstance(item, _Flush):
+                await self._submit_groups(list(self._pending))
+                if not item.done.done():
+                    item.done.set_result(None)
+                continue
+
+            if item is not None:
+                round_id, agent_uid, evaluations = item
+                self._queued -= len(evaluations)
+                key = (round_id, agent_uid)
+                group = self._pending.get(key)
+                if group is None:
+                    group = self._pending[key] = _PendingGroup(round_id, agent_uid, first_queued_at=self._time())
+                group.evaluations.extend(evaluations)
+                if len(group.evaluations) >= self.max_batch_evaluations:
+                    await self._submit_groups([key])
+
+            now = self._time()
+            await self._submit_groups([key for key, group in self._pending.items() if now - group.first_queued_at >= self.linger_s])
+
+    async def _submit_groups(self, keys: List[Tuple[str, int]]) -> None:
+        for key in keys:
+            group = self._pending.pop(key, None)
+            if group is None:
+                continue
+            evaluations = group.evaluations
+            for start in range(0, len(evaluations), self.max_batch_evaluations):
+                chunk = evaluations[start : start + self.max_batch_evaluations]
+                try:
+                    await self._submit(group.round_id, group.agent_uid, chunk)
+                    self.batches_submitted += 1
+                    self.evaluations_submitted += len(chunk)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self.failures += 1
+                    bt.logging.error(f"IWAP background submission failed for agent {group.agent_uid} ({len(chunk)} evaluations): {type(exc).__name__}: {exc}")
@@ -0,0 +1,222 @@
+"""
+Worker pool for evaluation GIF uploads.
+
+After an evaluation batch is submitted, its GIFs are handed to
+`GIFUploadPool.submit` instead of being uploaded one after another inline. A
+fixed number of workers on the validator's event loop take the smallest
+pending GIF first, so one large recording no longer holds up every upload
+queued behind it. Each attempt is bounded by a timeout. Failed attempts are
+retried with backoff up to `max_attempts`, as long as the pool-wide retry
+budget allows it: retries may not exceed `min_retries` plus `retry_ratio`
+times the uploads started, so an IWAP outage does not multiply GIF traffic.
+Every outcome is reported as a `GIFUploadResult` through the submit callback
+and never raised into the evaluation flow. `flush()` waits for everything
+queued so far. The validator keeps the round's outcomes by evaluation id and
+`summarize_gif_uploads` condenses them for summary_round.json.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import bittensor as bt
+
+UploadFn = Callable[[str, bytes], Awaitable[Optional[str]]]
+
+
+@dataclass
+class GIFUploadResult:
+    evaluation_id: str
+    size_bytes: int
+    status: str  # "uploaded" | "failed"
+    attempts: int
+    elapsed_s: float
+    url: Optional[str] = None
+    error: Optional[str] = None
+
+    def as_metadata(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"status": self.status, "attempts": self.attempts, "bytes": self.size_bytes}
+        if self.url:
+            out["url"] = self.url
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+@dataclass
+class _Job:
+    evaluation_id: str
+    gif_bytes: bytes
+    on_done: Optional[Callable[[GIFUploadResult], None]]
+    future: asyncio.Future
+
+
+class GIFUploadPool:
+    def __init__(
+        self,
+        upload: UploadFn,
+        *,
+        concurrency: int = 4,
+        timeout_s: float = 60.0,
+        max_attempts: int = 3,
+        backoff_s: float = 1.0,
+        retry_ratio: float = 0.2,
+        min_retries: int = 3,
+    ) -> None:
+        self._upload = upload
+        self.concurrency = max(1, int(concurrency))
+        self.timeout_s = max(0.001, float(timeout_s))
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_s = max(0.0, float(backoff_s))
+        self.retry_ratio = max(0.0, float(retry_ratio))
+        self.min_retries = max(0, int(min_retries))
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._pending = 0
+
+        self.started = 0
+        self.uploaded = 0
+        self.failed = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.timeouts = 0
+        self.bytes_uploaded = 0
+
+    # ── producer side ───────────────────────────────────────────────────────
+
+    def submit(self, evaluation_id: str, gif_bytes: bytes, *, on_done: Optional[Callable[[GIFUploadResult], None]] = None) -> asyncio.Future:
+        """Queue one GIF (smallest first); the returned future resolves to its GIFUploadResult."""
+        queue = self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((len(gif_bytes), next(self._seq), _Job(str(evaluation_id), bytes(gif_bytes), on_done, future)))
+        self._pending += 1
+        return future
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """True once every GIF queued so far has been uploaded or given up on."""
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._queue.join()), timeout)
+        except asyncio.TimeoutError:
+            bt.logging.warning(f"GIF upload flush timed out after {timeout}s with {self.backlog()} GIFs pending")
+            return False
+        return True
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        await self.flush(timeout)
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._workers = []
+        self._queue = None
+
+    def backlog(self) -> int:
+        """GIFs queued or in flight."""
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "uploaded": self.uploaded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "timeouts": self.timeouts,
+            "bytes_uploaded": self.bytes_uploaded,
+            "backlog": self.backlog(),
+        }
+
+    def _ensure_workers(self) -> asyncio.PriorityQueue:
+        loop = asyncio.get_running_loop()
+        alive = [w for w in self._workers if not w.done() and w.get_loop() is loop]
+        if self._queue is not None and len(alive) == self.concurrency:
+            return self._queue
+        if self._queue is None or not alive:
+            # First use, or the previous loop is gone along with its queue.
+            self._queue = asyncio.PriorityQueue()
+            self._pending = 0
+            alive = []
+        self._workers = alive + [loop.create_task(self._run(), name=f"iwap-gif-upload-{i}") for i in range(len(alive), self.concurrency)]
+        return self._queue
+
+    # ── workers ─────────────────────────────────────────────────────────────
+
+    def _may_retry(self) -> bool:
+        if self.retries < self.min_retries + self.retry_ratio * self.started:
+            self.retries += 1
+            return True
+        self.retries_denied += 1
+        return False
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            _size, _seq, job = await queue.get()
+            try:
+                result = await self._upload_one(job)
+                if not job.future.done():
+                    job.future.set_result(result)
+                if job.on_done is not None:
+                    try:
+                        job.on_done(result)
+                    except Exception as exc:  # noqa: BLE001
+                        bt.logging.warning(f"GIF upload callback failed for evaluation_id={job.evaluation_id}: {exc}")
+            finally:
+                self._pending -= 1
+                queue.task_done()
+
+    async def _upload_one(self, job: _Job) -> GIFUploadResult:
+        self.started += 1
+        started = time.monotonic()
+        error: Optional[str] = None
+        attempt = 0
+        while attempt < self.max_attempts:
+            attempt += 1
+            try:
+                url = await asyncio.wait_for(self._upload(job.evaluation_id, job.gif_bytes), self.timeout_s)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                error = f"timed out after {self.timeout_s:g}s"
+            except Exception as exc:  # noqa: BLE001
+                error = f"{type(exc).__name__}: {exc}"
+                status_code = getattr(getattr(exc, "response", None), "status_code", None)
+                if isinstance(status_code, int) and 400 <= status_code < 500:
+                    break
+            else:
+                self.uploaded += 1
+                self.bytes_uploaded += len(job.gif_bytes)
+                return GIFUploadResult(job.evaluation_id, len(job.gif_bytes), "uploaded", attempt, time.monotonic() - started, url=url)
+            if attempt >= self.max_attempts or not self._may_retry():
+                break
+            await asyncio.sleep(self.backoff_s * (2 ** (attempt - 1)))
+        self.failed += 1
+        bt.logging.warning(f"GIF upload failed for evaluation_id={job.evaluation_id} ({len(job.gif_bytes)} bytes) after {attempt} attempt(s): {error}")
+        return GIFUploadResult(job.evaluation_id, len(job.gif_bytes), "failed", attempt, time.monotonic() - started, error=error)
+
+
+def summarize_gif_uploads(outcomes: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Counts by status plus the error of every GIF that did not make it, from outcomes keyed by evaluation id."""
+    by_status: Dict[str, int] = {}
+    not_uploaded: Dict[str, Optional[str]] = {}
+    bytes_uploaded = 0
+    for evaluation_id, outcome in sorted(outcomes.items()):
+        status = str(outcome.get("status") or "unknown")
+        by_status[status] = by_status.get(status, 0) + 1
+        if status == "uploaded":
+            bytes_uploaded += int(outcome.get("bytes") or 0)
+        else:
+            not_uploaded[evaluation_id] = outcome.get("error")
+    return {"total": len(outcomes), "by_status": by_status, "bytes_uploaded": bytes_uploaded, "not_uploaded": not_uploaded}
@@ -0,0 +1,116 @@
+"""
+Content-addressed HTML snapshots for task-log payloads.
+
+Every step of a task log carries the page HTML twice (the step's
+`agent_input.html` is the previous step's `post_execute_output.html`), and
+steps that do not navigate usually see the very same page. `dedupe_task_log`
+replaces each snapshot string with a `<key>_ref` holding its sha256 and moves
+the distinct snapshots into a single `snapshots` table on the payload, so
+each page is serialized once per task log. `expand_task_log` is the inverse
+that dashboard consumers apply to get the full per-step view back.
+
+Readers that predate schema 1.1 cannot expand the table, so the IWAP client
+only sends deduplicated logs once the backend lists 1.1 in its
+`X-IWAP-Task-Log-Schemas` response header (see `parse_schema_versions`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Optional, Set, Tuple
+
+SNAPSHOT_KEYS = ("html", "prev_html", "current_html")
+REF_SUFFIX = "_ref"
+# Snapshots shorter than this stay inline; a reference would not be much smaller.
+MIN_SNAPSHOT_CHARS = 256
+DEDUPED_SCHEMA_VERSION = "1.1"
+# Response header in which IWAP lists the task-log schema versions it can read.
+TASK_LOG_SCHEMAS_HEADER = "X-IWAP-Task-Log-Schemas"
+
+
+def parse_schema_versions(header: Optional[str]) -> Set[str]:
+    """Schema versions listed in a comma-separated `TASK_LOG_SCHEMAS_HEADER` value."""
+    if not header:
+        return set()
+    return {part.strip() for part in header.split(",") if part.strip()}
+
+
+def snapshot_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def intern_snapshots(obj: Any, blobs: Dict[str, str], *, min_chars: int = MIN_SNAPSHOT_CHARS) -> Any:
+    """Copy of `obj` with snapshot strings replaced by `<key>_ref` hashes; the strings are added to `blobs`."""
+    if isinstance(obj, list):
+        return [intern_snapshots(item, blobs, min_chars=min_chars) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    out: Dict[str, Any] = {}
+    for key, value in obj.items():
+        if key in SNAPSHOT_KEYS and isinstance(value, str) and len(value) >= min_chars:
+            digest = snapshot_hash(value)
+            blobs.setdefault(digest, value)
+            out[key + REF_SUFFIX] = digest
+        else:
+            out[key] = intern_snapshots(value, blobs, min_chars=min_chars)
+    return out
+
+
+def restore_snapshots(obj: Any, blobs: Dict[str, str]) -> Any:
+    """Inverse of `intern_snapshots`; references missing from `blobs` are left as they are."""
+    if isinstance(obj, list):
+        return [restore_snapshots(item, blobs) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    out: Dict[str, Any] = {}
+    for key, value in obj.items():
+        base = key[: -len(REF_SUFFIX)] if key.endswith(REF_SUFFIX) else None
+        if base in SNAPSHOT_KEYS and isinstance(value, str) and value in blobs:
+            out[base] = blobs[value]
+        else:
+            out[key] = restore_snapshots(value, blobs)
+    return out
+
+
+def dedupe_task_log(payload: Dict[str, Any], *, min_chars: int = MIN_SNAPSHOT_CHARS) -> Dict[str, Any]:
+    """Task-log payload with its step snapshots moved into a `snapshots` table keyed by sha256."""
+    blobs: Dict[str, str] = {}
+    steps = intern_snapshots(payload.get("steps") or [], blobs, min_chars=min_chars)
+    if not blobs:
+        return payload
+    deduped = dict(payload)
+    deduped["schema_version"] = DEDUPED_SCHEMA_VERSION
+    deduped["steps"] = steps
+    deduped["snapshots"] = blobs
+    return deduped
+
+
+def expand_task_log(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Full task-log payload (as `schema_version` 1.0 consumers expect it) from a deduplicated one."""
+    blobs = payload.get("snapshots")
+    if not isinstance(blobs, dict):
+        return payload
+    expanded = {key: value for key, value in payload.items() if key != "snapshots"}
+    expanded["steps"] = restore_snapshots(payload.get("steps") or [], blobs)
+    expanded["schema_version"] = "1.0"
+    return expanded
+
+
+def snapshot_stats(payload: Dict[str, Any]) -> Tuple[int, int]:
+    """(snapshot references, distinct snapshots) in a deduplicated task-log payload."""
+    refs = 0
+
+    def _count(obj: Any) -> None:
+        nonlocal refs
+        if isinstance(obj, list):
+            for item in obj:
+                _count(item)
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                if key.endswith(REF_SUFFIX) and key[: -len(REF_SUFFIX)] in SNAPSHOT_KEYS:
+                    refs += 1
+                else:
+                    _count(value)
+
+    _count(payload.get("steps"))
+    return refs, len(payload.get("snapshots") or {})
@@ -5,6 +5,7 @@ import re
 import math
 import time
 import json
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -15,6 +16,8 @@ import bittensor as bt
 from autoppia_web_agents_subnet.validator import config as validator_config
 from autoppia_web_agents_subnet.platform import models as iwa_models
 from autoppia_web_agents_subnet.platform import client as iwa_main
+from autoppia_web_agents_subnet.platform.telemetry import IWAPTelemetry
+from autoppia_web_agents_subnet.platform.utils.gif_uploader import summarize_gif_uploads
 from .iwa_core import (
     log_iwap_phase,
     build_validator_identity,
@@ -444,6 +447,17 @@ def _persist_round_summary_file(
         "round_summary": pre_summary.get("round_summary", {}) if isinstance(pre_summary, dict) else {},
         "season_summary": pre_summary.get("season_summary", {}) if isinstance(pre_summary, dict) else {},
     }
+    telemetry = getattr(getattr(ctx, "iwap_client", None), "telemetry", None)
+    if isinstance(telemetry, IWAPTelemetry):
+        payload["iwap_client"] = telemetry.round_summary()
+        log_iwap_phase(
+            "Phase 5",
+            f"IWAP client this round: {payload['iwap_client']['requests']} requests, {payload['iwap_client']['time_in_requests_s']}s in requests, "
+            f"{payload['iwap_client']['retries']} retries, {payload['iwap_client']['failures']} failed attempts",
+        )
+    gif_outcomes = getattr(ctx, "gif_upload_outcomes", None)
+    if isinstance(gif_outcomes, dict) and gif_outcomes:
+        payload["gif_uploads"] = summarize_gif_uploads(gif_outcomes)
 
     try:
         root_getter = getattr(ctx, "_state_summary_root", None)
@@ -739,6 +753,244 @@ async def start_round_flow(ctx, *, current_block: int, n_tasks: int) -> None:
     # after handshake to avoid duplication
 
 
+@dataclass
+class _MinerRegistration:
+    miner_uid: int
+    agent_run: iwa_models.AgentRunIWAP
+    miner_identity: iwa_models.MinerIdentityIWAP
+    miner_snapshot: iwa_models.MinerSnapshotIWAP
+    reused_from_id: Optional[str] = None
+
+
+def _build_miner_registration(ctx, miner_uid: int, *, validator_identity, coldkeys, now_ts: float) -> _MinerRegistration:
+    miner_hotkey = None
+    try:
+        miner_hotkey = ctx.metagraph.hotkeys[miner_uid]
+    except Exception:
+        pass
+
+    miner_coldkey = None
+    try:
+        if coldkeys:
+            miner_coldkey = coldkeys[miner_uid]
+    except Exception:
+        miner_coldkey = None
+
+    handshake_payload = ctx.round_handshake_payloads.get(miner_uid)
+
+    miner_identity = iwa_main.build_miner_identity(
+        miner_uid=miner_uid,
+        miner_hotkey=miner_hotkey,
+        miner_coldkey=miner_coldkey,
+        agent_key=None,
+    )
+    miner_snapshot = iwa_main.build_miner_snapshot(
+        validator_round_id=ctx.current_round_id,
+        miner_uid=miner_uid,
+        miner_hotkey=miner_hotkey,
+        miner_coldkey=miner_coldkey,
+        agent_key=None,
+        handshake_payload=handshake_payload,
+        now_ts=now_ts,
+    )
+
+    agent_run_id = iwa_main.generate_agent_run_id(miner_uid)
+    miners_reused = getattr(ctx, "miners_reused_this_round", None) or set()
+    prev_run_ids = getattr(ctx, "prev_round_agent_run_ids", None) or {}
+    prev_stats = getattr(ctx, "prev_round_run_stats", None) or {}
+    # Always use the FIRST evaluated run as reused_from (handshake sets this from _evaluated_commits_by_miner).
+    # prev_run_ids is only fallback (e.g. after restart before handshake); handshake ensures all reused runs point to the same origin.
+    reused_from_id = getattr(ctx, "reused_from_agent_run_id_by_uid", None) or {}
+    reused_from_id = reused_from_id.get(miner_uid) or prev_run_ids.get(miner_uid)
+    reused_stats = getattr(ctx, "reused_stats_by_uid", None) or {}
+    prev_s = reused_stats.get(miner_uid) or prev_stats.get(miner_uid)
+    is_reused = miner_uid in miners_reused and reused_from_id
+
+    if is_reused and reused_from_id and prev_s:
+        reused_meta = {"handshake_note": "reused", "reused_from_round": reused_from_id}
+        try:
+            avg_cost_prev = prev_s.get("average_cost")
+            if avg_cost_prev is None:
+                avg_cost_prev = prev_s.get("avg_cost")
+            if avg_cost_prev is not None:
+                reused_meta["average_cost"] = float(avg_cost_prev)
+        except Exception:
+            pass
+        agent_run = iwa_models.AgentRunIWAP(
+            agent_run_id=agent_run_id,
+            validator_round_id=ctx.current_round_id,
+            validator_uid=int(ctx.uid),
+            validator_hotkey=validator_identity.hotkey,
+            miner_uid=miner_uid,
+            miner_hotkey=miner_hotkey,
+            is_sota=False,
+            version=None,
+            started_at=now_ts,
+            metadata=reused_meta,
+            is_reused=True,
+            reused_from_agent_run_id=reused_from_id,
+            average_score=prev_s.get("average_score"),
+            average_execution_time=prev_s.get("average_execution_time"),
+            average_reward=prev_s.get("average_reward"),
+            total_tasks=prev_s.get("total_tasks", 0),
+            completed_tasks=prev_s.get("success_tasks", 0),
+            failed_tasks=prev_s.get("failed_tasks", 0),
+            zero_reason=prev_s.get("zero_reason"),
+        )
+    else:
+        agent_run = iwa_models.AgentRunIWAP(
+            agent_run_id=agent_run_id,
+            validator_round_id=ctx.current_round_id,
+            validator_uid=int(ctx.uid),
+            validator_hotkey=validator_identity.hotkey,
+            miner_uid=miner_uid,
+            miner_hotkey=miner_hotkey,
+            is_sota=False,
+            version=None,
+            started_at=now_ts,
+            metadata={"handshake_note": getattr(handshake_payload, "note", None)},
+        )
+
+    return _MinerRegistration(
+        miner_uid=miner_uid,
+        agent_run=agent_run,
+        miner_identity=miner_identity,
+        miner_snapshot=miner_snapshot,
+        reused_from_id=reused_from_id if is_reused else None,
+    )
+
+
+def _record_registered_miner(ctx, reg: _MinerRegistration, *, keep_snapshot: bool = False) -> None:
+    ctx.current_agent_runs[reg.miner_uid] = reg.agent_run
+    ctx.current_miner_snapshots[reg.miner_uid] = (ctx.current_miner_snapshots.get(reg.miner_uid) if keep_snapshot else None) or reg.miner_snapshot
+    ctx.agent_run_accumulators.setdefault(
+        reg.miner_uid,
+        {"reward": 0.0, "eval_score": 0.0, "execution_time": 0.0, "cost": 0.0, "tasks": 0},
+    )
+
+
+def _registration_suffix(reg: _MinerRegistration) -> str:
+    if reg.reused_from_id:
+        return f"miner_uid={reg.miner_uid}, agent_run_id={reg.agent_run.agent_run_id} (reused from {reg.reused_from_id})"
+    return f"miner_uid={reg.miner_uid}, agent_run_id={reg.agent_run.agent_run_id}"
+
+
+async def _register_miner(ctx, reg: _MinerRegistration) -> str:
+    """
+    One start_agent_run call (the client retries transient errors itself).
+
+    Returns "registered", "skipped" (the backend rejected it; retrying will
+    not help) or "retry" (the backend was unreachable or failing).
+    """
+    miner_uid = reg.miner_uid
+    log_iwap_phase("Phase 3", f"Calling start_agent_run for {_registration_suffix(reg)}")
+    try:
+        await ctx.iwap_client.start_agent_run(
+            validator_round_id=ctx.current_round_id,
+            agent_run=reg.agent_run,
+            miner_identity=reg.miner_identity,
+            miner_snapshot=reg.miner_snapshot,
+        )
+    except httpx.HTTPStatusError as exc:
+        status = exc.response.status_code if exc.response is not None else None
+        body = exc.response.text if exc.response is not None else ""
+        # If validator_round is missing on backend (e.g., after API reset), skip retry
+        # The round should have been created in _iwap_start_round() before this
+        if status == 400 and "Validator round" in body and "not found" in body:
+            log_iwap_phase(
+                "Register Miners",
+                f"start_agent_run failed for miner_uid={miner_uid}: validator round not found. Skipping.",
+                level="error",
+            )
+            return "skipped"
+        if _is_duplicate_like_error(exc):
+            log_iwap_phase(
+                "Phase 3",
+                f"start_agent_run returned {status} for miner_uid={miner_uid} (already exists); continuing",
+                level="warning",
+            )
+            _record_registered_miner(ctx, reg, keep_snapshot=True)
+            return "registered"
+        log_iwap_phase("Phase 3", f"start_agent_run failed for {_registration_suffix(reg)} (HTTP {status})", level="error", exc_info=False)
+        return "retry" if status is None or status >= 500 else "skipped"
+    except Exception as exc:
+        log_iwap_phase("Phase 3", f"start_agent_run failed for {_registration_suffix(reg)}: {type(exc).__name__}: {exc}", level="error", exc_info=False)
+        return "retry"
+
+    log_iwap_phase("Phase 3", f"start_agent_run completed for {_registration_suffix(reg)}", level="success")
+    # Update local state for bookkeeping
+    _record_registered_miner(ctx, reg)
+    return "registered"
+
+
+async def _register_miners_batch(ctx, registrations: List[_MinerRegistration]) -> List[_MinerRegistration]:
+    """Register miners with one batch call when IWAP supports it; returns those still unregistered."""
+    client = ctx.iwap_client
+    if not isinstance(client, iwa_main.IWAPClient) or client.agent_run_batch_supported is False or len(registrations) < 2:
+        return registrations
+    try:
+        results = await client.start_agent_runs_batch(
+            validator_round_id=ctx.current_round_id,
+            registrations=[(reg.agent_run, reg.miner_identity, reg.miner_snapshot) for reg in registrations],
+        )
+    except Exception as exc:
+        log_iwap_phase("Phase 3", f"Batch start_agent_run failed ({type(exc).__name__}: {exc}); registering miners one by one", level="warning")
+        return registrations
+    if results is None:
+        return registrations
+
+    remaining: List[_MinerRegistration] = []
+    for reg in registrations:
+        row = results.get(reg.miner_uid) or {}
+        if row.get("status") in ("created", "exists"):
+            _record_registered_miner(ctx, reg, keep_snapshot=row.get("status") == "exists")
+        else:
+            remaining.append(reg)
+    log_iwap_phase("Phase 3", f"Batch start_agent_run registered {len(registrations) - len(remaining)}/{len(registrations)} miners", level="success")
+    return remaining
+
+
+async def _retry_miner_registration(ctx, reg: _MinerRegistration, *, round_id: str) -> bool:
+    """Background retries for a failed registration; stops when the round changes."""
+    attempts = max(0, int(getattr(validator_config, "IWAP_REGISTRATION_RETRY_ATTEMPTS", 5) or 0))
+    backoff = max(0.0, float(getattr(validator_config, "IWAP_REGISTRATION_RETRY_BACKOFF_SECONDS", 10.0) or 0.0))
+    try:
+        for attempt in range(attempts):
+            await asyncio.sleep(backoff * (2**attempt))
+            if ctx.current_round_id != round_id:
+                return False
+            outcome = await _register_miner(ctx, reg)
+            if outcome != "retry":
+                return outcome == "registered"
+        log_iwap_phase("Register Miners", f"Giving up on registering miner_uid={reg.miner_uid} after {attempts} background retries", level="error")
+        return False
+    finally:
+        pending = getattr(ctx, "pending_miner_registrations", None)
+        if isinstance(pending, dict) and pending.get(reg.miner_uid) is asyncio.current_task():
+            pending.pop(reg.miner_uid, None)
+
+
+async def wait_for_miner_registration(ctx, miner_uid: int, *, timeout: Optional[float] = None) -> bool:
+    """
+    Wait (bounded) for a miner's background registration retry, if one is pending.
+    True when the miner has an agent run for the current round.
+    """
+    pending = getattr(ctx, "pending_miner_registrations", None)
+    task = pending.get(miner_uid) if isinstance(pending, dict) else None
+    if isinstance(task, asyncio.Task) and not task.done():
+        if timeout is None:
+            timeout = float(getattr(validator_config, "IWAP_REGISTRATION_WAIT_SECONDS", 120.0) or 0.0)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            bt.logging.warning(f"Registration of miner_uid={miner_uid} still pending after {timeout}s")
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+    agent_runs = getattr(ctx, "current_agent_runs", None)
+    return isinstance(agent_runs, dict) and miner_uid in agent_runs
+
+
 async def register_participating_miners_in_iwap(ctx) -> None:
     """
     Register all miners that responded to handshake in IWAP dashboard.
@@ -752,6 +1004,12 @@ async def register_participating_miners_in_iwap(ctx) -> None:
     - validator_round_miners (miner info)
     - miner_evaluation_runs (agent_evaluation_runs)
 
+    Miners are registered with one batch call when the backend supports it,
+    otherwise with up to IWAP_REGISTRATION_CONCURRENCY concurrent
+    start_agent_run calls. Registrations that fail with a transient error are
+    retried in the background (ctx.pending_miner_registrations) while
+    evaluation starts for the miners already registered.
+
     Skips registration if IWAP is in offline mode.
     """
     if not ctx.current_round_id:
@@ -784,7 +1042,12 @@ async def register_participating_miners_in_iwap(ctx) -> None:
     validator_identity = build_validator_identity(ctx)
     coldkeys = getattr(ctx.metagraph, "coldkeys", [])
     now_ts = time.time()
+    pending = getattr(ctx, "pending_miner_registrations", None)
+    if not isinstance(pending, dict):
+        pending = {}
+        ctx.pending_miner_registrations = pending
 
+    registrations: List[_MinerRegistration] = []
     for miner_uid in ctx.active_miner_uids:
         # CRITICAL: Check if agent_run already exists for this miner in this round
         # An agent run should be unique per (validator_round_id, miner_uid)
@@ -797,162 +1060,40 @@ async def register_participating_miners_in_iwap(ctx) -> None:
                 level="warning",
             )
             continue
+        if miner_uid in pending and not pending[miner_uid].done():
+            continue
+        registrations.append(_build_miner_registration(ctx, miner_uid, validator_identity=validator_identity, coldkeys=coldkeys, now_ts=now_ts))
 
-        miner_hotkey = None
-        try:
-            miner_hotkey = ctx.metagraph.hotkeys[miner_uid]
-        except Exception:
-            pass
+    started = time.monotonic()
+    if bool(getattr(validator_config, "IWAP_REGISTRATION_BATCH", True)):
+        registrations = await _register_miners_batch(ctx, registrations)
 
-        miner_coldkey = None
-        try:
-            if coldkeys:
-                miner_coldkey = coldkeys[miner_uid]
-        except Exception:
-            miner_coldkey = None
+    semaphore = asyncio.Semaphore(max(1, int(getattr(validator_config, "IWAP_REGISTRATION_CONCURRENCY", 8) or 1)))
 
-        handshake_payload = ctx.round_handshake_payloads.get(miner_uid)
+    async def _register_bounded(reg: _MinerRegistration) -> str:
+        async with semaphore:
+            return await _register_miner(ctx, reg)
 
-        miner_identity = iwa_main.build_miner_identity(
-            miner_uid=miner_uid,
-            miner_hotkey=miner_hotkey,
-            miner_coldkey=miner_coldkey,
-            agent_key=None,
-        )
-        miner_snapshot = iwa_main.build_miner_snapshot(
-            validator_round_id=ctx.current_round_id,
-            miner_uid=miner_uid,
-            miner_hotkey=miner_hotkey,
-            miner_coldkey=miner_coldkey,
-            agent_key=None,
-            handshake_payload=handshake_payload,
-            now_ts=now_ts,
-        )
+    outcomes = await asyncio.gather(*(_register_bounded(reg) for reg in registrations))
 
-        agent_run_id = iwa_main.generate_agent_run_id(miner_uid)
-        miners_reused = getattr(ctx, "miners_reused_this_round", None) or set()
-        prev_run_ids = getattr(ctx, "prev_round_agent_run_ids", None) or {}
-        prev_stats = getattr(ctx, "prev_round_run_stats", None) or {}
-        # Always use the FIRST evaluated run as reused_from (handshake sets this from _evaluated_commits_by_miner).
-        # prev_run_ids is only fallback (e.g. after restart before handshake); handshake ensures all reused runs point to the same origin.
-        reused_from_id = getattr(ctx, "reused_from_agent_run_id_by_uid", None) or {}
-        reused_from_id = reused_from_id.get(miner_uid) or prev_run_ids.get(miner_uid)
-        reused_stats = getattr(ctx, "reused_stats_by_uid", None) or {}
-        prev_s = reused_stats.get(miner_uid) or prev_stats.get(miner_uid)
-        is_reused = miner_uid in miners_reused and reused_from_id
-
-        if is_reused and reused_from_id and prev_s:
-            reused_meta = {"handshake_note": "reused", "reused_from_round": reused_from_id}
-            try:
-                avg_cost_prev = prev_s.get("average_cost")
-                if avg_cost_prev is None:
-                    avg_cost_prev = prev_s.get("avg_cost")
-                if avg_cost_prev is not None:
-                    reused_meta["average_cost"] = float(avg_cost_prev)
-            except Exception:
-                pass
-            agent_run = iwa_models.AgentRunIWAP(
-                agent_run_id=agent_run_id,
-                validator_round_id=ctx.current_round_id,
-                validator_uid=int(ctx.uid),
-                validator_hotkey=validator_identity.hotkey,
-                miner_uid=miner_uid,
-                miner_hotkey=miner_hotkey,
-                is_sota=False,
-                version=None,
-                started_at=now_ts,
-                metadata=reused_meta,
-                is_reused=True,
-                reused_from_agent_run_id=reused_from_id,
-                average_score=prev_s.get("average_score"),
-                average_execution_time=prev_s.get("average_execution_time"),
-                average_reward=prev_s.get("average_reward"),
-                total_tasks=prev_s.get("total_tasks", 0),
-                completed_tasks=prev_s.get("success_tasks", 0),
-                failed_tasks=prev_s.get("failed_tasks", 0),
-                zero_reason=prev_s.get("zero_reason"),
-            )
-        else:
-            agent_run = iwa_models.AgentRunIWAP(
-                agent_run_id=agent_run_id,
-                validator_round_id=ctx.current_round_id,
-                validator_uid=int(ctx.uid),
-                validator_hotkey=validator_identity.hotkey,
-                miner_uid=miner_uid,
-                miner_hotkey=miner_hotkey,
-                is_sota=False,
-                version=None,
-                started_at=now_ts,
-                metadata={"handshake_note": getattr(handshake_payload, "note", None)},
-            )
+    round_id = ctx.current_round_id
+    retrying = [reg for reg, outcome in zip(registrations, outcomes) if outcome == "retry"]
+    for reg in retrying:
+        pending[reg.miner_uid] = asyncio.get_running_loop().create_task(_retry_miner_registration(ctx, reg, round_id=round_id), name=f"iwap-register-miner-{reg.miner_uid}")
+    log_iwap_phase(
+        "Register Miners",
+        f"Registered {sum(1 for uid in ctx.active_miner_uids if uid in ctx.current_agent_runs)}/{len(ctx.active_miner_uids)} miners in {time.monotonic() - started:.1f}s"
+        + (f"; retrying {len(retrying)} in the background" if retrying else ""),
+        level="info",
+    )
 
-        try:
-            if is_reused and reused_from_id:
-                start_agent_run_message = f"Calling start_agent_run for miner_uid={miner_uid}, agent_run_id={agent_run_id} (reused from {reused_from_id})"
-            else:
-                start_agent_run_message = f"Calling start_agent_run for miner_uid={miner_uid}, agent_run_id={agent_run_id}"
-            log_iwap_phase("Phase 3", start_agent_run_message)
-            try:
-                await ctx.iwap_client.start_agent_run(
-                    validator_round_id=ctx.current_round_id,
-                    agent_run=agent_run,
-                    miner_identity=miner_identity,
-                    miner_snapshot=miner_snapshot,
-                )
-            except httpx.HTTPStatusError as exc:
-                status = exc.response.status_code if exc.response is not None else None
-                body = exc.response.text if exc.response is not None else ""
-                # If validator_round is missing on backend (e.g., after API reset), skip retry
-                # The round should have been created in _iwap_start_round() before this
-                if status == 400 and "Validator round" in body and "not found" in body:
-                    log_iwap_phase(
-                        "Register Miners",
-                        f"start_agent_run failed for miner_uid={miner_uid}: validator round not found. Skipping.",
-                        level="error",
-                    )
-                    continue
-                else:
-                    raise
-        except httpx.HTTPStatusError as exc:
-            status = exc.response.status_code if exc.response is not None else None
-            if _is_duplicate_like_error(exc):
-                log_iwap_phase(
-                    "Phase 3",
-                    f"start_agent_run returned {status} for miner_uid={miner_uid} (already exists); continuing",
-                    level="warning",
-                )
-                ctx.current_agent_runs[miner_uid] = agent_run
-                ctx.current_miner_snapshots[miner_uid] = ctx.current_miner_snapshots.get(miner_uid) or miner_snapshot
-                ctx.agent_run_accumulators.setdefault(
-                    miner_uid,
-                    {"reward": 0.0, "eval_score": 0.0, "execution_time": 0.0, "cost": 0.0, "tasks": 0},
-                )
-            else:
-                start_agent_run_error = f"start_agent_run failed for miner_uid={miner_uid}, agent_run_id={agent_run_id}"
-                log_iwap_phase(
-                    "Phase 3",
-                    start_agent_run_error,
-                    level="error",
-                    exc_info=False,
-                )
-                continue
-        except Exception:
-            start_agent_run_error = f"start_agent_run failed for miner_uid={miner_uid}, agent_run_id={agent_run_id}"
-            log_iwap_phase("Phase 3", start_agent_run_error, level="error", exc_info=False)
-            continue
-        else:
-            if is_reused and reused_from_id:
-                start_agent_run_success = f"start_agent_run completed for miner_uid={miner_uid} (reused from {reused_from_id})"
-            else:
-                start_agent_run_success = f"start_agent_run completed for miner_uid={miner_uid}, agent_run_id={agent_run_id}"
-            log_iwap_phase("Phase 3", start_agent_run_success, level="success")
-            # Update local state for bookkeeping
-            ctx.current_agent_runs[miner_uid] = agent_run
-            ctx.current_miner_snapshots[miner_uid] = miner_snapshot
-            ctx.agent_run_accumulators.setdefault(
-                miner_uid,
-                {"reward": 0.0, "eval_score": 0.0, "execution_time": 0.0, "cost": 0.0, "tasks": 0},
-            )
+
+def cancel_pending_miner_registrations(ctx) -> None:
+    pending = getattr(ctx, "pending_miner_registrations", None)
+    if isinstance(pending, dict):
+        for task in pending.values():
+            task.cancel()
+        pending.clear()
 
 
 async def finish_round_flow(
@@ -998,8 +1139,12 @@ async def finish_round_flow(
                 reason="finish_round",
                 force=True,
                 min_interval_seconds=0.0,
+                final=True,
             )
-        if round_log_url is None:
+        # A log sealed through chunk uploads is complete on IWAP even if no URL came back.
+        log_uploader = getattr(ctx, "round_log_uploader", None)
+        sealed = getattr(log_uploader, "sealed", False) is True and getattr(log_uploader, "round_id", None) == round_id
+        if round_log_url is None and not sealed:
             from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 
             round_log_file = ColoredLogger.get_round_log_file()
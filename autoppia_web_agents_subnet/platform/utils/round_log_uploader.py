@@ -0,0 +1,115 @@
+"""
+Incremental uploads of the validator round log.
+
+The round log is an append-only file, so instead of re-sending the whole
+file on every periodic upload, `IncrementalRoundLogUploader` remembers the
+byte offset IWAP already has for the current round and sends only the bytes
+written since, as gzip-compressed chunks numbered from 0 (`seq`). The last
+upload of the round is sent with `final=True`, which seals the log.
+
+When the backend has no chunk endpoint (the client sets
+`round_log_chunks_supported` to False), when it rejects a chunk as out of
+sequence (409), when the file shrank (it was recreated), or when chunked
+uploads are disabled, the uploader falls back to `upload_round_log` with the
+full content; later chunks continue from the end of that full upload.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import bittensor as bt
+import httpx
+
+
+def _read_range(path: Path, start: int, end: int) -> bytes:
+    with path.open("rb") as fh:
+        fh.seek(start)
+        return fh.read(max(0, end - start))
+
+
+class IncrementalRoundLogUploader:
+    def __init__(self, client: Any, *, chunked: bool = True, max_chunk_bytes: int = 4 * 1024 * 1024) -> None:
+        self.client = client
+        self.chunked = bool(chunked)
+        self.max_chunk_bytes = max(1, int(max_chunk_bytes))
+        self.reset(None)
+
+    def reset(self, round_id: Optional[str]) -> None:
+        self.round_id = round_id
+        self.offset = 0
+        self.next_seq = 0
+        self.sealed = False
+        self.url: Optional[str] = None
+        self.full_uploads = 0
+        self.bytes_sent = 0
+
+    def _chunks_available(self) -> bool:
+        return self.chunked and callable(getattr(self.client, "upload_round_log_chunk", None)) and getattr(self.client, "round_log_chunks_supported", None) is not False
+
+    async def upload(self, path: Path, *, round_id: str, final: bool = False, **meta: Any) -> Optional[str]:
+        """
+        Ship what the round log gained since the last call (everything, on a
+        fallback); `meta` is passed through (season_number, validator_uid, ...).
+        Returns the log URL IWAP reported, if any. Upload errors propagate and
+        leave the offset unchanged, so the next call resends the same chunk.
+        """
+        if round_id != self.round_id:
+            self.reset(round_id)
+        if self.sealed:
+            return self.url
+        size = (await asyncio.to_thread(path.stat)).st_size
+
+        if self._chunks_available() and size >= self.offset:
+            try:
+                sealed_by_chunks = await self._upload_chunks(path, size, round_id=round_id, final=final, meta=meta)
+            except httpx.HTTPStatusError as exc:
+                if exc.response is None or exc.response.status_code != 409:
+                    raise
+                # IWAP's copy does not end where ours does (e.g. a chunk it applied but we never heard back about).
+                bt.logging.warning(f"Round log chunk seq={self.next_seq} offset={self.offset} rejected as out of sequence; uploading the log in full")
+                sealed_by_chunks = None
+            if sealed_by_chunks is not None:
+                self.sealed = final and sealed_by_chunks
+                return self.url
+        elif size < self.offset:
+            bt.logging.warning(f"Round log {path} shrank from {self.offset} to {size} bytes; uploading it in full")
+
+        data = await asyncio.to_thread(path.read_bytes)
+        url = await self.client.upload_round_log(validator_round_id=round_id, content=data.decode("utf-8", errors="replace"), **meta)
+        self.offset = len(data)
+        self.full_uploads += 1
+        self.bytes_sent += len(data)
+        self.sealed = final
+        if isinstance(url, str) and url.strip():
+            self.url = url.strip()
+        return self.url
+
+    async def _upload_chunks(self, path: Path, size: int, *, round_id: str, final: bool, meta: Dict[str, Any]) -> Optional[bool]:
+        """Send [offset, size) in chunks; None when the backend turned out not to support them."""
+        while True:
+            end = min(size, self.offset + self.max_chunk_bytes)
+            last = end >= size
+            if self.offset == end and not (final and last):
+                return True
+            data = await asyncio.to_thread(_read_range, path, self.offset, end)
+            response = await self.client.upload_round_log_chunk(
+                validator_round_id=round_id,
+                chunk=data,
+                offset=self.offset,
+                seq=self.next_seq,
+                final=final and last,
+                **meta,
+            )
+            if response is None:
+                return None
+            self.offset += len(data)
+            self.next_seq += 1
+            self.bytes_sent += len(data)
+            url = self.client.round_log_url_from_response(response)
+            if url:
+                self.url = url
+            if last:
+                return True
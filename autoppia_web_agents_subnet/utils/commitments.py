@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
 
 from bittensor import AsyncSubtensor  # type: ignore
 
@@ -84,12 +86,103 @@ async def read_plain_commitment(
     return _maybe_json_load(raw)
 
 
+def _chain_key(st: AsyncSubtensor) -> Hashable:
+    return getattr(st, "chain_endpoint", None) or getattr(st, "network", None) or id(st)
+
+
+class CommitmentReader:
+    """
+    Block-keyed cache of decoded plain commitments.
+
+    Commitments only change when blocks advance, so `read()` serves every
+    consumer asking for the same (chain, netuid, block) from one
+    `get_all_commitments` call; concurrent callers share the in-flight fetch.
+    Callers pass the head from the neuron's block clock; without a block,
+    `read()` asks the chain for it first. When a new block is fetched, only
+    hotkeys whose raw value changed since the previous fetch are decoded again.
+    Returned dicts are fresh copies, but the decoded entries are shared and
+    should be treated as read-only.
+    """
+
+    def __init__(self, *, max_blocks: int = 8) -> None:
+        self.max_blocks = max(1, int(max_blocks))
+        self._by_block: "OrderedDict[Tuple[Hashable, int, int], Dict[str, Any]]" = OrderedDict()
+        # Latest raw/decoded values per (chain, netuid), for incremental decoding.
+        self._last_raw: Dict[Tuple[Hashable, int], Dict[str, Any]] = {}
+        self._last_decoded: Dict[Tuple[Hashable, int], Dict[str, Any]] = {}
+        self._inflight: Dict[Tuple[Hashable, int, int], asyncio.Task] = {}
+        self.fetches = 0
+        self.hits = 0
+        self.decodes = 0
+
+    def clear(self) -> None:
+        self._by_block.clear()
+        self._last_raw.clear()
+        self._last_decoded.clear()
+
+    def _decode(self, series: Tuple[Hashable, int], raw: Dict[str, Any]) -> Dict[str, Any]:
+        prev_raw = self._last_raw.get(series, {})
+        prev_decoded = self._last_decoded.get(series, {})
+        decoded: Dict[str, Any] = {}
+        for hk, value in raw.items():
+            if hk in prev_decoded and hk in prev_raw and prev_raw[hk] == value:
+                decoded[hk] = prev_decoded[hk]
+            else:
+                decoded[hk] = _maybe_json_load(value)
+                self.decodes += 1
+        self._last_raw[series] = dict(raw)
+        self._last_decoded[series] = decoded
+        return decoded
+
+    def _forget_inflight(self, key: Tuple[Hashable, int, int], task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _fetch(self, st: AsyncSubtensor, key: Tuple[Hashable, int, int]) -> Dict[str, Any]:
+        chain, netuid, block = key
+        raw = await st.get_all_commitments(netuid=netuid, block=block, reuse_block=False)
+        self.fetches += 1
+        decoded = self._decode((chain, netuid), dict(raw or {}))
+        self._by_block[key] = decoded
+        while len(self._by_block) > self.max_blocks:
+            self._by_block.popitem(last=False)
+        return decoded
+
+    async def read(self, st: AsyncSubtensor, *, netuid: int, block: Optional[int] = None) -> Dict[str, Any]:
+        if block is None:
+            block = await st.get_current_block()
+        key = (_chain_key(st), int(netuid), int(block))
+        cached = self._by_block.get(key)
+        if cached is not None:
+            self._by_block.move_to_end(key)
+            self.hits += 1
+            return dict(cached)
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch(st, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget_inflight(k, t))
+        else:
+            self.hits += 1
+        return dict(await asyncio.shield(task))
+
+
+_default_reader = CommitmentReader()
+
+
+def default_commitment_reader() -> CommitmentReader:
+    return _default_reader
+
+
 async def read_all_plain_commitments(
     st: AsyncSubtensor,
     *,
     netuid: int,
     block: Optional[int] = None,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
+    if use_cache:
+        return await _default_reader.read(st, netuid=netuid, block=block)
     commits = await st.get_all_commitments(netuid=netuid, block=block, reuse_block=False)
     return {hk: _maybe_json_load(v) for hk, v in commits.items()}
 
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from autoppia_web_agents_subnet.utils.ipfs_cache import verify_cid
+from autoppia_web_agents_subnet.utils.ipfs_client import CIDMismatchError, IPFSError
+from autoppia_web_agents_subnet.validator.config import (
+    IPFS_ADD_RETRIES,
+    IPFS_API_URL,
+    IPFS_GATEWAYS,
+    IPFS_MAX_PAYLOAD_BYTES,
+    IPFS_RACE_GATEWAYS,
+)
+
+# Latency assumed for endpoints we have not measured yet (seconds).
+_UNKNOWN_LATENCY_S = 1.0
+_EWMA_ALPHA = 0.3
+_COOLDOWN_BASE_S = 5.0
+_COOLDOWN_MAX_S = 300.0
+_FAILURES_BEFORE_COOLDOWN = 3
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class IPFSFetchError(IPFSError):
+    """One endpoint failed to serve a CID (bad status, oversize, timeout...)."""
+
+
+class _EndpointMismatch(IPFSFetchError):
+    """One endpoint served bytes that do not hash to the CID."""
+
+
+@dataclass
+class EndpointHealth:
+    """Rolling health of one IPFS endpoint (the API or a gateway)."""
+
+    url: str
+    latency_ewma_s: Optional[float] = None
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is better: expected latency, inflated by recent failures."""
+        latency = self.latency_ewma_s if self.latency_ewma_s is not None else _UNKNOWN_LATENCY_S
+        return latency * (1 + self.consecutive_failures)
+
+    def record_success(self, latency_s: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        if self.latency_ewma_s is None:
+            self.latency_ewma_s = latency_s
+        else:
+            self.latency_ewma_s = _EWMA_ALPHA * latency_s + (1 - _EWMA_ALPHA) * self.latency_ewma_s
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= _FAILURES_BEFORE_COOLDOWN:
+            backoff = _COOLDOWN_BASE_S * (2 ** (self.consecutive_failures - _FAILURES_BEFORE_COOLDOWN))
+            self.cooldown_until = now + min(backoff, _COOLDOWN_MAX_S)
+
+    def snapshot(self) -> dict:
+        return {
+            "latency_ewma_s": self.latency_ewma_s,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": not self.available(time.monotonic()),
+        }
+
+
+class AsyncIPFSClient:
+    """
+    Pooled httpx client for the IPFS HTTP API and public gateways.
+
+    Reads race the API against the `race_gateways` best-ranked gateways and keep
+    the first response whose bytes verify against the CID; the losing requests
+    are cancelled. Writes go to the API with `pin=true` and are retried on
+    transient errors. Every endpoint keeps its own EndpointHealth.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        gateways: Optional[Sequence[str]] = None,
+        *,
+        race_gateways: int = IPFS_RACE_GATEWAYS,
+        max_bytes: int = IPFS_MAX_PAYLOAD_BYTES,
+        add_retries: int = IPFS_ADD_RETRIES,
+        timeout: float = 20.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.api_url = (api_url if api_url is not None else IPFS_API_URL or "").rstrip("/")
+        self.gateways = [gw.rstrip("/") for gw in (gateways if gateways is not None else IPFS_GATEWAYS or [])]
+        self.race_gateways = max(0, int(race_gateways))
+        self.max_bytes = int(max_bytes)
+        self.add_retries = max(0, int(add_retries))
+        self.health: Dict[str, EndpointHealth] = {url: EndpointHealth(url) for url in ([self.api_url] if self.api_url else []) + self.gateways}
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncIPFSClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ------------------------------------------------------------------ reads
+
+    def ranked_gateways(self) -> List[str]:
+        """Gateways to race, best score first; all of them if every one is cooling down."""
+        now = time.monotonic()
+        healthy = [gw for gw in self.gateways if self.health[gw].available(now)]
+        pool = healthy or list(self.gateways)
+        return sorted(pool, key=lambda gw: self.health[gw].score())[: self.race_gateways]
+
+    async def _read_limited(self, resp: httpx.Response) -> bytes:
+        declared = resp.headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            raise IPFSFetchError(f"payload too large ({declared} > {self.max_bytes} bytes)")
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in resp.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise IPFSFetchError(f"payload too large (> {self.max_bytes} bytes)")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def _fetch_from(self, endpoint: str, cid: str) -> bytes:
+        health = self.health[endpoint]
+        started = time.monotonic()
+        try:
+            if endpoint == self.api_url:
+                request = self._client.build_request("POST", f"{endpoint}/cat", params={"arg": cid})
+            else:
+                request = self._client.build_request("GET", f"{endpoint}/{cid}")
+            resp = await self._client.send(request, stream=True)
+            try:
+                if resp.status_code != 200:
+                    raise IPFSFetchError(f"HTTP {resp.status_code}")
+                data = await self._read_limited(resp)
+            finally:
+                await resp.aclose()
+            if verify_cid(cid, data) is False:
+                raise _EndpointMismatch("content does not match CID")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            health.record_failure(time.monotonic())
+            if isinstance(e, IPFSFetchError):
+                raise
+            raise IPFSFetchError(f"{type(e).__name__}: {e}") from e
+        health.record_success(time.monotonic() - started)
+        return data
+
+    async def cat(self, cid: str) -> bytes:
+        """Fetch CID bytes from whichever raced endpoint answers correctly first."""
+        endpoints = ([self.api_url] if self.api_url else []) + self.ranked_gateways()
+        if not endpoints:
+            raise IPFSError("No IPFS API URL or gateways configured")
+
+        tasks = {asyncio.ensure_future(self._fetch_from(ep, cid)): ep for ep in endpoints}
+        errors: list[tuple[str, BaseException]] = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append((tasks[task], task.exception()))
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if errors and all(isinstance(err, _EndpointMismatch) for _ep, err in errors):
+            raise CIDMismatchError(f"Content for CID {cid} does not match its hash")
+        raise IPFSError(f"Failed to fetch CID {cid}: {'; '.join(f'{ep}: {err}' for ep, err in errors)}")
+
+    async def get_json(self, cid: str) -> Tuple[object, bytes]:
+        raw = await self.cat(cid)
+        return json.loads(raw.decode("utf-8")), raw
+
+    # ----------------------------------------------------------------- writes
+
+    async def add_bytes(self, data: bytes, *, filename: str = "commit.json", pin: bool = True) -> str:
+        """Add (and by default pin) `data` through the API, retrying transient failures."""
+        if not self.api_url:
+            raise IPFSError("No IPFS API URL configured")
+        params = {
+            "cid-version": "1",
+            "hash": "sha2-256",
+            "pin": "true" if pin else "false",
+            "wrap-with-directory": "false",
+            "quieter": "true",
+        }
+        health = self.health[self.api_url]
+        last_err: Optional[Exception] = None
+        for attempt in range(self.add_retries + 1):
+            started = time.monotonic()
+            try:
+                resp = await self._client.post(f"{self.api_url}/add", params=params, files={"file": (filename, data)})
+                if resp.status_code in _RETRYABLE_STATUS:
+                    raise IPFSFetchError(f"HTTP {resp.status_code}")
+                resp.raise_for_status()
+                lines = [ln for ln in resp.text.strip().splitlines() if ln.strip()]
+                last = json.loads(lines[-1])
+                cid = last.get("Hash") or last.get("Cid") or last.get("Key")
+                if not cid:
+                    raise IPFSError(f"IPFS /add returned no CID: {last}")
+                health.record_success(time.monotonic() - started)
+                return str(cid)
+            except (IPFSFetchError, httpx.TransportError) as e:
+                health.record_failure(time.monotonic())
+                last_err = e
+                if attempt < self.add_retries:
+                    await asyncio.sleep(min(0.5 * (2**attempt), 8.0) * random.uniform(0.5, 1.0))
+            except httpx.HTTPStatusError as e:
+                health.record_failure(time.monotonic())
+                raise IPFSError(f"IPFS /add failed: HTTP {e.response.status_code}") from e
+        raise IPFSError(f"IPFS /add failed after {self.add_retries + 1} attempts: {last_err}")
+
+    def health_snapshot(self) -> Dict[str, dict]:
+        return {url: h.snapshot() for url, h in self.health.items()}
+
+
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncIPFSClient]]" = weakref.WeakKeyDictionary()
+
+
+def get_async_ipfs_client(api_url: Optional[str] = None, gateways: Optional[Sequence[str]] = None) -> AsyncIPFSClient:
+    """
+    Shared client for the running event loop, so connections and endpoint
+    health persist across rounds. httpx clients cannot cross event loops.
+    """
+    loop = asyncio.get_running_loop()
+    per_loop = _shared_clients.setdefault(loop, {})
+    key = ((api_url if api_url is not None else IPFS_API_URL or "").rstrip("/"), tuple(gateways if gateways is not None else IPFS_GATEWAYS or []))
+    client = per_loop.get(key)
+    if client is None:
+        client = per_loop[key] = AsyncIPFSClient(key[0], list(key[1]))
+    return client
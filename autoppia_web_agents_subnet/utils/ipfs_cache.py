@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from autoppia_web_agents_subnet.validator.config import IPFS_CACHE_DIR
+
+# Multicodec / multihash codes we can verify locally.
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MH_SHA2_256 = 0x12
+
+# Default kubo chunk size; files up to this size are a single block.
+_UNIXFS_CHUNK_SIZE = 262144
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(_B58_ALPHABET)}
+# CIDs become file names: only accept plain multibase characters.
+_CID_RE = re.compile(r"^[A-Za-z0-9]{10,128}$")
+
+
+def _b58decode(text: str) -> bytes:
+    num = 0
+    for ch in text:
+        num = num * 58 + _B58_INDEX[ch]
+    body = num.to_bytes((num.bit_length() + 7) // 8, "big") if num else b""
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\x00" * pad + body
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ValueError("truncated varint")
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def parse_cid(cid: str) -> Tuple[int, int, bytes]:
+    """
+    Parse a CID string into (codec, multihash_code, digest).
+
+    Supports CIDv0 ("Qm...", base58btc dag-pb) and CIDv1 in base32 ("b...").
+    Raises ValueError for anything else.
+    """
+    if not isinstance(cid, str) or not _CID_RE.match(cid):
+        raise ValueError(f"invalid CID: {cid!r}")
+    if cid.startswith("Qm") and len(cid) == 46:
+        mh = _b58decode(cid)
+        codec = CODEC_DAG_PB
+        pos = 0
+    elif cid.startswith("b"):
+        body = cid[1:].upper()
+        raw = base64.b32decode(body + "=" * (-len(body) % 8))
+        version, pos = _read_varint(raw, 0)
+        if version != 1:
+            raise ValueError(f"unsupported CID version {version}")
+        codec, pos = _read_varint(raw, pos)
+        mh = raw
+    else:
+        raise ValueError(f"unsupported CID encoding: {cid[:8]}...")
+    code, pos = _read_varint(mh, pos)
+    length, pos = _read_varint(mh, pos)
+    digest = mh[pos : pos + length]
+    if len(digest) != length:
+        raise ValueError("truncated multihash")
+    return codec, code, digest
+
+
+def _unixfs_file_block(data: bytes) -> bytes:
+    """dag-pb node kubo writes for a single-chunk file without raw leaves."""
+    unixfs = b"\x08\x02"  # Type = File
+    if data:
+        unixfs += b"\x12" + _varint(len(data)) + data
+    unixfs += b"\x18" + _varint(len(data))  # filesize
+    return b"\x0a" + _varint(len(unixfs)) + unixfs
+
+
+def verify_cid(cid: str, data: bytes) -> Optional[bool]:
+    """
+    Check that `data` is the content addressed by `cid`.
+
+    Returns True/False when the CID can be verified locally (sha2-256 raw blocks
+    and single-chunk UnixFS files), or None when it cannot (e.g. multi-block
+    DAGs, other hash functions).
+    """
+    try:
+        codec, code, digest = parse_cid(cid)
+    except Exception:
+        return None
+    if code != MH_SHA2_256:
+        return None
+    if codec == CODEC_RAW:
+        return hashlib.sha256(data).digest() == digest
+    if codec == CODEC_DAG_PB and len(data) <= _UNIXFS_CHUNK_SIZE:
+        if hashlib.sha256(_unixfs_file_block(data)).digest() == digest:
+            return True
+        # Could still be a different DAG layout of the same file; do not claim a mismatch.
+        return None
+    return None
+
+
+class CIDCache:
+    """
+    Content-addressed on-disk cache of IPFS payloads.
+
+    Entries are only written when their bytes verify against the CID, and are
+    re-verified on read, so a cache hit is as trustworthy as a fresh download.
+    """
+
+    def __init__(self, root: os.PathLike | str, *, max_entry_bytes: int = 8 * 1024 * 1024) -> None:
+        self.root = Path(root)
+        self.max_entry_bytes = int(max_entry_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, cid: str) -> Optional[Path]:
+        if not isinstance(cid, str) or not _CID_RE.match(cid):
+            return None
+        return self.root / cid[-2:] / cid
+
+    def get(self, cid: str) -> Optional[bytes]:
+        path = self._path(cid)
+        if path is None or not path.is_file():
+            self.misses += 1
+            return None
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        if verify_cid(cid, data) is not True:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, cid: str, data: bytes) -> bool:
+        path = self._path(cid)
+        if path is None or len(data) > self.max_entry_bytes:
+            return False
+        if verify_cid(cid, data) is not True:
+            return False
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            except Exception:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return False
+        return True
+
+
+_default_cache: Optional[CIDCache] = None
+
+
+def default_cid_cache() -> Optional[CIDCache]:
+    """Process-wide cache rooted at IPFS_CACHE_DIR (None when disabled)."""
+    global _default_cache
+    if not IPFS_CACHE_DIR:
+        return None
+    if _default_cache is None or str(_default_cache.root) != str(Path(IPFS_CACHE_DIR)):
+        _default_cache = CIDCache(IPFS_CACHE_DIR)
+    return _default_cache
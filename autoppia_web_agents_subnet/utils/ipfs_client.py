@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import hashlib
 import json
 from typing import Any, Optional, Sequence, Tuple
@@ -13,12 +12,18 @@ except Exception:  # pragma: no cover
     _HAVE_REQUESTS = False
 
 from autoppia_web_agents_subnet.validator.config import IPFS_API_URL, IPFS_GATEWAYS
+from autoppia_web_agents_subnet.utils.ipfs_cache import CIDCache, default_cid_cache, verify_cid
+from autoppia_web_agents_subnet.utils.snapshot_codec import decode_snapshot, is_columnar_snapshot
 
 
 class IPFSError(Exception):
     pass
 
 
+class CIDMismatchError(IPFSError):
+    """Fetched bytes do not hash to the requested CID."""
+
+
 def minidumps(obj: Any, *, sort_keys: bool = True) -> str:
     return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys)
 
@@ -73,6 +78,10 @@ def ipfs_add_json(
     text = minidumps(obj, sort_keys=sort_keys)
     b = text.encode("utf-8")
     cid = ipfs_add_bytes(b, filename=filename, api_url=api_url, pin=pin)
+    # Seed the CID cache so our own snapshot is never downloaded back.
+    cache = default_cid_cache()
+    if cache is not None:
+        cache.put(cid, b)
     return cid, sha256_hex(b), len(b)
 
 
@@ -109,15 +118,51 @@ def ipfs_cat(
     raise IPFSError(f"Failed to fetch CID {cid}: {last_err}")
 
 
+def ipfs_cat_verified(
+    cid: str,
+    *,
+    api_url: Optional[str] = None,
+    gateways: Optional[Sequence[str]] = None,
+    cache: Optional[CIDCache] = None,
+    use_cache: bool = True,
+) -> bytes:
+    """
+    Fetch CID bytes, serving from and populating the on-disk CID cache.
+
+    CIDs are immutable, so a verified cache entry never needs re-downloading.
+    Content that provably does not match the CID raises CIDMismatchError.
+    """
+    if use_cache and cache is None:
+        cache = default_cid_cache()
+    if use_cache and cache is not None:
+        cached = cache.get(cid)
+        if cached is not None:
+            return cached
+    raw = ipfs_cat(cid, api_url=api_url, gateways=gateways)
+    if verify_cid(cid, raw) is False:
+        raise CIDMismatchError(f"Content for CID {cid} does not match its hash")
+    if use_cache and cache is not None:
+        cache.put(cid, raw)
+    return raw
+
+
 def ipfs_get_json(
     cid: str,
     *,
     api_url: Optional[str] = None,
     gateways: Optional[Sequence[str]] = None,
     expected_sha256_hex: Optional[str] = None,
+    cache: Optional[CIDCache] = None,
+    use_cache: bool = True,
 ) -> Tuple[Any, bytes, str]:
-    raw = ipfs_cat(cid, api_url=api_url, gateways=gateways)
-    obj = json.loads(raw.decode("utf-8"))
+    raw = ipfs_cat_verified(cid, api_url=api_url, gateways=gateways, cache=cache, use_cache=use_cache)
+    return _decode_json_payload(cid, raw, expected_sha256_hex)
+
+
+def _decode_json_payload(cid: str, raw: bytes, expected_sha256_hex: Optional[str]) -> Tuple[Any, bytes, str]:
+    # Columnar (msgpack) snapshots decode to the same object their JSON form would,
+    # so `norm` and its hash do not depend on the wire format.
+    obj = decode_snapshot(raw) if is_columnar_snapshot(raw) else json.loads(raw.decode("utf-8"))
     norm = minidumps(obj).encode("utf-8")
     h = sha256_hex(norm)
     if expected_sha256_hex and h.lower() != expected_sha256_hex.lower():
@@ -125,6 +170,9 @@ def ipfs_get_json(
     return obj, norm, h
 
 
+# Async helpers go through the pooled, racing httpx client in ipfs_async.
+
+
 async def add_json_async(
     obj: Any,
     *,
@@ -133,10 +181,30 @@ async def add_json_async(
     pin: bool = True,
     sort_keys: bool = True,
 ) -> Tuple[str, str, int]:
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        None, lambda: ipfs_add_json(obj, filename=filename, api_url=api_url, pin=pin, sort_keys=sort_keys)
-    )
+    from autoppia_web_agents_subnet.utils.ipfs_async import get_async_ipfs_client
+
+    b = minidumps(obj, sort_keys=sort_keys).encode("utf-8")
+    cid = await get_async_ipfs_client(api_url=api_url).add_bytes(b, filename=filename, pin=pin)
+    cache = default_cid_cache()
+    if cache is not None:
+        cache.put(cid, b)
+    return cid, sha256_hex(b), len(b)
+
+
+async def add_bytes_async(
+    data: bytes,
+    *,
+    filename: str = "commit.bin",
+    api_url: Optional[str] = None,
+    pin: bool = True,
+) -> Tuple[str, str, int]:
+    from autoppia_web_agents_subnet.utils.ipfs_async import get_async_ipfs_client
+
+    cid = await get_async_ipfs_client(api_url=api_url).add_bytes(data, filename=filename, pin=pin)
+    cache = default_cid_cache()
+    if cache is not None:
+        cache.put(cid, data)
+    return cid, sha256_hex(data), len(data)
 
 
 async def get_json_async(
@@ -145,9 +213,16 @@ async def get_json_async(
     api_url: Optional[str] = None,
     gateways: Optional[Sequence[str]] = None,
     expected_sha256_hex: Optional[str] = None,
+    cache: Optional[CIDCache] = None,
+    use_cache: bool = True,
 ) -> Tuple[Any, bytes, str]:
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        None, lambda: ipfs_get_json(cid, api_url=api_url, gateways=gateways, expected_sha256_hex=expected_sha256_hex)
-    )
-
+    from autoppia_web_agents_subnet.utils.ipfs_async import get_async_ipfs_client
+
+    if use_cache and cache is None:
+        cache = default_cid_cache()
+    raw = cache.get(cid) if use_cache and cache is not None else None
+    if raw is None:
+        raw = await get_async_ipfs_client(api_url=api_url, gateways=gateways).cat(cid)
+        if use_cache and cache is not None:
+            cache.put(cid, raw)
+    return _decode_json_payload(cid, raw, expected_sha256_hex)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+import msgpack
+
+try:
+    import zstandard  # type: ignore
+    _HAVE_ZSTD = True
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+    _HAVE_ZSTD = False
+
+from autoppia_web_agents_subnet.validator.config import IPFS_MAX_PAYLOAD_BYTES
+
+# Container: MAGIC + format version byte + compression byte + compressed msgpack body.
+# JSON snapshots start with "{", so readers can tell the two formats apart from the bytes alone.
+MAGIC = b"ASNP"
+FORMAT_COLUMNAR = 2
+COMPRESSION_NONE = 0
+COMPRESSION_GZIP = 1
+COMPRESSION_ZSTD = 2
+_COMPRESSION_BY_NAME = {"none": COMPRESSION_NONE, "gzip": COMPRESSION_GZIP, "zstd": COMPRESSION_ZSTD}
+_HEADER_LEN = len(MAGIC) + 2
+# Compressed snapshots are small; refuse to inflate anything past this (zip bombs).
+_MAX_DECODED_BYTES = 8 * IPFS_MAX_PAYLOAD_BYTES
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class SnapshotFormatError(ValueError):
+    """Bytes are not a valid columnar snapshot (or need an unavailable codec)."""
+
+
+def zstd_available() -> bool:
+    return _HAVE_ZSTD
+
+
+def is_columnar_snapshot(raw: bytes) -> bool:
+    return raw[: len(MAGIC)] == MAGIC
+
+
+def _pack_key(key: str) -> Any:
+    """uid-like JSON keys ("17") travel as msgpack ints; anything else stays a string."""
+    try:
+        as_int = int(key)
+    except (TypeError, ValueError):
+        return key
+    return as_int if str(as_int) == key else key
+
+
+def _is_map(value: Any) -> bool:
+    return isinstance(value, dict) and all(isinstance(v, _SCALARS) for v in value.values())
+
+
+def _table_columns(value: Any) -> Optional[List[str]]:
+    """Column names when `value` maps keys to flat dicts that all share the same keys."""
+    if not isinstance(value, dict) or not value:
+        return None
+    columns: Optional[List[str]] = None
+    for row in value.values():
+        if not isinstance(row, dict):
+            return None
+        if columns is None:
+            columns = list(row)
+        elif len(row) != len(columns) or list(row) != columns:
+            return None
+        if not all(isinstance(v, _SCALARS) for v in row.values()):
+            return None
+    return columns
+
+
+def to_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Columnar layout of a snapshot payload.
+
+    Flat {key: scalar} maps (rewards, handshake_results, ...) become a key array
+    plus a parallel value array; {key: {field: scalar}} maps with uniform rows
+    (miner_metrics) become a key array plus one array per field. A map equal to
+    one already stored (the `scores` alias of `rewards`) is stored as a
+    reference. Everything else is kept as-is under "meta".
+    """
+    # Normalize to exactly what a JSON reader would see (str keys, lists, ...).
+    payload = json.loads(json.dumps(payload))
+    maps: Dict[str, list] = {}
+    tables: Dict[str, list] = {}
+    alias: Dict[str, str] = {}
+    meta: Dict[str, Any] = {}
+    stored: list[tuple[str, Any]] = []
+    for name, value in payload.items():
+        target = next((prev for prev, prev_value in stored if prev_value == value), None) if isinstance(value, dict) and value else None
+        if target is not None:
+            alias[name] = target
+            continue
+        columns = _table_columns(value)
+        if columns is not None:
+            rows = list(value.values())
+            tables[name] = [[_pack_key(k) for k in value], columns, [[row[c] for row in rows] for c in columns]]
+        elif _is_map(value):
+            maps[name] = [[_pack_key(k) for k in value], list(value.values())]
+        else:
+            meta[name] = value
+            continue
+        stored.append((name, value))
+    return {"order": list(payload), "meta": meta, "maps": maps, "tables": tables, "alias": alias}
+
+
+def from_columnar(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of to_columnar: the payload exactly as its JSON encoding would decode."""
+    try:
+        meta = doc["meta"]
+        built: Dict[str, Any] = {}
+        for name, (keys, values) in doc["maps"].items():
+            if len(keys) != len(values):
+                raise SnapshotFormatError(f"column length mismatch in {name!r}")
+            built[name] = dict(zip(map(str, keys), values))
+        for name, (keys, columns, arrays) in doc["tables"].items():
+            if len(columns) != len(arrays) or any(len(arr) != len(keys) for arr in arrays):
+                raise SnapshotFormatError(f"column length mismatch in {name!r}")
+            built[name] = {str(k): dict(zip(columns, row)) for k, row in zip(keys, zip(*arrays))} if columns else {str(k): {} for k in keys}
+        for name, target in doc["alias"].items():
+            built[name] = {k: dict(v) if isinstance(v, dict) else v for k, v in built[target].items()}
+        return {name: built[name] if name in built else meta[name] for name in doc["order"]}
+    except SnapshotFormatError:
+        raise
+    except Exception as e:
+        raise SnapshotFormatError(f"malformed columnar snapshot: {type(e).__name__}: {e}") from e
+
+
+def _compress(body: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_GZIP:
+        # mtime=0 keeps the bytes (and so the CID) deterministic.
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=19).compress(body)
+    return body
+
+
+def _decompress(data: bytes, compression: int, limit: int) -> bytes:
+    if compression == COMPRESSION_NONE:
+        out = data
+    elif compression == COMPRESSION_GZIP:
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            out = inflater.decompress(data, limit + 1)
+        except zlib.error as e:
+            raise SnapshotFormatError(f"corrupt gzip body: {e}") from e
+    elif compression == COMPRESSION_ZSTD:
+        if not _HAVE_ZSTD:
+            raise SnapshotFormatError("snapshot is zstd-compressed but the 'zstandard' package is not installed")
+        try:
+            out = zstandard.ZstdDecompressor().stream_reader(data).read(limit + 1)
+        except zstandard.ZstdError as e:
+            raise SnapshotFormatError(f"corrupt zstd body: {e}") from e
+    else:
+        raise SnapshotFormatError(f"unknown snapshot compression {compression}")
+    if len(out) > limit:
+        raise SnapshotFormatError(f"decoded snapshot exceeds {limit} bytes")
+    return out
+
+
+def encode_snapshot(payload: Dict[str, Any], *, compression: str = "gzip") -> bytes:
+    """Serialize a snapshot payload as compressed columnar msgpack."""
+    name = (compression or "none").strip().lower()
+    if name not in _COMPRESSION_BY_NAME:
+        raise ValueError(f"unknown snapshot compression {compression!r}")
+    if name == "zstd" and not _HAVE_ZSTD:
+        name = "gzip"
+    code = _COMPRESSION_BY_NAME[name]
+    body = msgpack.packb(to_columnar(payload), use_bin_type=True)
+    return MAGIC + bytes([FORMAT_COLUMNAR, code]) + _compress(body, code)
+
+
+def decode_snapshot(raw: bytes, *, max_decoded_bytes: int = _MAX_DECODED_BYTES) -> Dict[str, Any]:
+    """Parse bytes produced by encode_snapshot back into the snapshot payload dict."""
+    if not is_columnar_snapshot(raw) or len(raw) < _HEADER_LEN:
+        raise SnapshotFormatError("not a columnar snapshot")
+    version, compression = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+    if version != FORMAT_COLUMNAR:
+        raise SnapshotFormatError(f"unsupported columnar snapshot version {version}")
+    body = _decompress(raw[_HEADER_LEN:], compression, max_decoded_bytes)
+    try:
+        doc = msgpack.unpackb(body, raw=False, strict_map_key=False)
+    except Exception as e:
+        raise SnapshotFormatError(f"corrupt msgpack body: {type(e).__name__}: {e}") from e
+    if not isinstance(doc, dict):
+        raise SnapshotFormatError("columnar snapshot body is not a map")
+    return from_columnar(doc)
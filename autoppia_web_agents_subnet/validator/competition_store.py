@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import bittensor as bt
+
+SCHEMA_VERSION = 2
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+class CompetitionStateStore:
+    """
+    Append-only JSON-lines log of season competition state.
+
+    The log starts with a `snapshot` record holding every season, followed by
+    `round` records (one season/round entry) and `summary` records (one
+    season summary). `save()` appends only the entries whose serialized form
+    changed since the last save, fsyncs, and returns the rounds it wrote, so
+    a settled round costs one or two appended lines regardless of season
+    length. Replaying the log in order reproduces the `seasons` mapping
+    (string keys, as written by Validator._save_competition_state).
+
+    A torn final line (crash mid-append) is dropped and truncated away on
+    load; a complete final record that lost only its newline gets it back, so
+    the next append starts on a line of its own. Once `compact_every` delta records accumulate, the log is rewritten
+    as a single snapshot via a temp file + os.replace, so a crash leaves
+    either the old or the new log, never a mix.
+    """
+
+    def __init__(self, path: Path | str, *, compact_every: int = 256) -> None:
+        self.path = Path(path)
+        self.compact_every = max(1, int(compact_every))
+        self._rounds: Dict[Tuple[str, str], str] = {}
+        self._summaries: Dict[str, str] = {}
+        self._deltas = 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # ── reading ─────────────────────────────────────────────────────────────
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Replay the log into {season: {"rounds": {round: entry}, "summary": {...}}}."""
+        seasons: Dict[str, Dict[str, Any]] = {}
+        self._rounds.clear()
+        self._summaries.clear()
+        self._deltas = 0
+        if not self.path.exists():
+            return seasons
+
+        good_offset = 0
+        torn = False
+        unterminated = False
+        with self.path.open("rb") as fh:
+            for raw in fh:
+                try:
+                    record = json.loads(raw)
+                    if not isinstance(record, dict):
+                        raise ValueError("record is not an object")
+                except ValueError:
+                    torn = True
+                    break
+                self._apply(seasons, record)
+                good_offset += len(raw)
+                unterminated = not raw.endswith(b"\n")
+        if unterminated:
+            with self.path.open("ab") as fh:
+                fh.write(b"\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+        if torn:
+            bt.logging.warning(f"Competition state log {self.path} has a torn record at byte {good_offset}; truncating")
+            with self.path.open("r+b") as fh:
+                fh.truncate(good_offset)
+                fh.flush()
+                os.fsync(fh.fileno())
+        return seasons
+
+    def _apply(self, seasons: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "snapshot":
+            seasons.clear()
+            self._rounds.clear()
+            self._summaries.clear()
+            self._deltas = 0
+            for season_key, season_data in (record.get("seasons") or {}).items():
+                if not isinstance(season_data, dict):
+                    continue
+                season = seasons.setdefault(str(season_key), {"rounds": {}, "summary": {}})
+                for round_key, entry in (season_data.get("rounds") or {}).items():
+                    season["rounds"][str(round_key)] = entry
+                    self._rounds[(str(season_key), str(round_key))] = _canonical(entry)
+                summary = season_data.get("summary") or {}
+                season["summary"] = summary
+                self._summaries[str(season_key)] = _canonical(summary)
+        elif op == "round":
+            season_key, round_key = str(record.get("s")), str(record.get("r"))
+            entry = record.get("data")
+            seasons.setdefault(season_key, {"rounds": {}, "summary": {}})["rounds"][round_key] = entry
+            self._rounds[(season_key, round_key)] = _canonical(entry)
+            self._deltas += 1
+        elif op == "summary":
+            season_key = str(record.get("s"))
+            summary = record.get("data") or {}
+            seasons.setdefault(season_key, {"rounds": {}, "summary": {}})["summary"] = summary
+            self._summaries[season_key] = _canonical(summary)
+            self._deltas += 1
+
+    # ── writing ─────────────────────────────────────────────────────────────
+
+    def save(self, seasons: Dict[str, Dict[str, Any]]) -> List[Tuple[int, int]]:
+        """Append records for rounds/summaries that changed; returns the (season, round) pairs written."""
+        records: List[Dict[str, Any]] = []
+        changed_rounds: List[Tuple[int, int]] = []
+        pending_rounds: Dict[Tuple[str, str], str] = {}
+        pending_summaries: Dict[str, str] = {}
+        for season_key, season_data in seasons.items():
+            season_key = str(season_key)
+            for round_key, entry in (season_data.get("rounds") or {}).items():
+                key = (season_key, str(round_key))
+                encoded = _canonical(entry)
+                if self._rounds.get(key) != encoded:
+                    records.append({"op": "round", "s": season_key, "r": key[1], "data": entry})
+                    pending_rounds[key] = encoded
+                    changed_rounds.append((int(season_key), int(round_key)))
+            summary = season_data.get("summary") or {}
+            encoded = _canonical(summary)
+            if self._summaries.get(season_key) != encoded:
+                records.append({"op": "summary", "s": season_key, "data": summary})
+                pending_summaries[season_key] = encoded
+
+        if not records:
+            return []
+        if not self.path.exists() or self._deltas + len(records) >= self.compact_every:
+            self.compact(seasons)
+            return changed_rounds
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write("".join(_canonical(record) + "\n" for record in records))
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._rounds.update(pending_rounds)
+        self._summaries.update(pending_summaries)
+        self._deltas += len(records)
+        return changed_rounds
+
+    def compact(self, seasons: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the log with a single snapshot of `seasons`."""
+        snapshot = {
+            "op": "snapshot",
+            "schema_version": SCHEMA_VERSION,
+            "seasons": {str(k): {"rounds": dict(v.get("rounds") or {}), "summary": v.get("summary") or {}} for k, v in seasons.items()},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(_canonical(snapshot) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        _fsync_dir(self.path.parent)
+        self._apply({}, snapshot)
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_legacy_state(path: Path | str) -> Optional[Dict[str, Any]]:
+    """`seasons` mapping from the pre-log season_competition_state.json, or None if absent."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as fh:
+        payload = json.load(fh)
+    seasons = payload.get("seasons", {}) if isinstance(payload, dict) else {}
+    return seasons if isinstance(seasons, dict) else {}
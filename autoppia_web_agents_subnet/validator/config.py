@@ -43,6 +43,70 @@ SHOULD_RECORD_GIF = _env_bool("SHOULD_RECORD_GIF", True)
 # Upload the per-round validator log to IWAP/S3 periodically during evaluation.
 # This reduces observability gaps when round settlement is skipped/late.
 ROUND_LOG_UPLOAD_INTERVAL_SECONDS = _env_int("ROUND_LOG_UPLOAD_INTERVAL_SECONDS", 120)
+# Each upload sends only the bytes appended since the previous one (gzip chunks of at most
+# ROUND_LOG_CHUNK_MAX_BYTES, sealed at round end); falls back to full uploads when IWAP
+# has no chunk endpoint or ROUND_LOG_CHUNKED_UPLOADS is off.
+ROUND_LOG_CHUNKED_UPLOADS = _env_bool("ROUND_LOG_CHUNKED_UPLOADS", True)
+ROUND_LOG_CHUNK_MAX_BYTES = _env_int("ROUND_LOG_CHUNK_MAX_BYTES", 4 * 1024 * 1024)
+# Evaluation results go to IWAP from a background uploader: batches are coalesced per
+# miner up to IWAP_UPLOAD_MAX_BATCH_EVALUATIONS or IWAP_UPLOAD_LINGER_SECONDS, and the
+# evaluation loop only waits when IWAP_UPLOAD_QUEUE_SIZE batches are queued. 0 submits inline.
+IWAP_UPLOAD_QUEUE_SIZE = _env_int("IWAP_UPLOAD_QUEUE_SIZE", 32)
+IWAP_UPLOAD_MAX_BATCH_EVALUATIONS = _env_int("IWAP_UPLOAD_MAX_BATCH_EVALUATIONS", 25)
+IWAP_UPLOAD_LINGER_SECONDS = _env_float("IWAP_UPLOAD_LINGER_SECONDS", 2.0)
+IWAP_UPLOAD_FLUSH_TIMEOUT_SECONDS = _env_float("IWAP_UPLOAD_FLUSH_TIMEOUT_SECONDS", 300.0, test_default=30.0)
+# Evaluation GIFs are uploaded by IWAP_GIF_UPLOAD_CONCURRENCY workers, smallest first, each
+# attempt bounded by IWAP_GIF_UPLOAD_TIMEOUT_SECONDS and retried up to IWAP_GIF_UPLOAD_MAX_ATTEMPTS
+# times (0 workers uploads them one by one inline). finish_round waits up to
+# IWAP_GIF_UPLOAD_FLUSH_TIMEOUT_SECONDS for pending GIFs.
+IWAP_GIF_UPLOAD_CONCURRENCY = _env_int("IWAP_GIF_UPLOAD_CONCURRENCY", 4)
+IWAP_GIF_UPLOAD_TIMEOUT_SECONDS = _env_float("IWAP_GIF_UPLOAD_TIMEOUT_SECONDS", 60.0)
+IWAP_GIF_UPLOAD_MAX_ATTEMPTS = _env_int("IWAP_GIF_UPLOAD_MAX_ATTEMPTS", 3)
+IWAP_GIF_UPLOAD_FLUSH_TIMEOUT_SECONDS = _env_float("IWAP_GIF_UPLOAD_FLUSH_TIMEOUT_SECONDS", 180.0, test_default=10.0)
+# Miners are registered in IWAP (start_agent_run) IWAP_REGISTRATION_CONCURRENCY at a time,
+# or in one batch call when the backend supports it. Failed registrations are retried
+# in the background up to IWAP_REGISTRATION_RETRY_ATTEMPTS times while evaluation runs;
+# submitting a miner's evaluations waits up to IWAP_REGISTRATION_WAIT_SECONDS for its retry.
+IWAP_REGISTRATION_CONCURRENCY = _env_int("IWAP_REGISTRATION_CONCURRENCY", 8)
+IWAP_REGISTRATION_BATCH = _env_bool("IWAP_REGISTRATION_BATCH", True)
+IWAP_REGISTRATION_RETRY_ATTEMPTS = _env_int("IWAP_REGISTRATION_RETRY_ATTEMPTS", 5)
+IWAP_REGISTRATION_RETRY_BACKOFF_SECONDS = _env_float("IWAP_REGISTRATION_RETRY_BACKOFF_SECONDS", 10.0, test_default=0.5)
+IWAP_REGISTRATION_WAIT_SECONDS = _env_float("IWAP_REGISTRATION_WAIT_SECONDS", 120.0, test_default=5.0)
+# Evaluation batches, GIFs and task/round logs are written to a local SQLite outbox
+# (IWAP_BACKUP_DIR/iwap_outbox.sqlite3) before sending and replayed with backoff while
+# IWAP is unreachable, across restarts (in order per agent run / round); requests are
+# given up after IWAP_OUTBOX_MAX_ATTEMPTS attempts or IWAP_OUTBOX_MAX_AGE_HOURS.
+# finish_round waits up to IWAP_OUTBOX_FLUSH_TIMEOUT_SECONDS for the outbox to drain.
+IWAP_OUTBOX_ENABLED = _env_bool("IWAP_OUTBOX_ENABLED", True)
+IWAP_OUTBOX_MAX_AGE_HOURS = _env_float("IWAP_OUTBOX_MAX_AGE_HOURS", 24.0)
+IWAP_OUTBOX_MAX_ATTEMPTS = _env_int("IWAP_OUTBOX_MAX_ATTEMPTS", 12)
+IWAP_OUTBOX_FLUSH_TIMEOUT_SECONDS = _env_float("IWAP_OUTBOX_FLUSH_TIMEOUT_SECONDS", 60.0, test_default=5.0)
+# JSON request bodies of at least IWAP_REQUEST_COMPRESSION_MIN_BYTES are compressed:
+# auto = only once IWAP advertises the coding (Accept-Encoding response header),
+# gzip | zstd = always (zstd needs the optional `zstandard` package), none = never.
+IWAP_REQUEST_COMPRESSION = (_env_str("IWAP_REQUEST_COMPRESSION", "auto") or "auto").strip().lower()
+IWAP_REQUEST_COMPRESSION_MIN_BYTES = _env_int("IWAP_REQUEST_COMPRESSION_MIN_BYTES", 32 * 1024)
+# Task logs can carry each distinct page HTML once, in a payload["snapshots"] table keyed
+# by sha256, with steps referencing it via html_ref (schema_version 1.1):
+# auto = only once IWAP lists 1.1 in its X-IWAP-Task-Log-Schemas response header,
+# on = always, off = never (full 1.0 logs).
+IWAP_TASK_LOG_DEDUP_SNAPSHOTS = (_env_str("IWAP_TASK_LOG_DEDUP_SNAPSHOTS", "auto") or "auto").strip().lower()
+# Payload backups (IWAP_BACKUP_DIR/season_*/round_*/logs/iwap_payloads.jsonl[.gz|.zst]) are
+# written by a background thread; files beyond IWAP_BACKUP_MAX_ROUNDS rounds or
+# IWAP_BACKUP_MAX_MB in total are deleted oldest first (0 = keep everything).
+IWAP_BACKUP_COMPRESSION = (_env_str("IWAP_BACKUP_COMPRESSION", "gzip") or "gzip").strip().lower()
+IWAP_BACKUP_MAX_ROUNDS = _env_int("IWAP_BACKUP_MAX_ROUNDS", 100)
+IWAP_BACKUP_MAX_MB = _env_float("IWAP_BACKUP_MAX_MB", 2048.0)
+IWAP_BACKUP_QUEUE_SIZE = _env_int("IWAP_BACKUP_QUEUE_SIZE", 1024)
+# Request headers/bodies are logged at debug level for a sample of IWAP requests only
+# (IWAP_DEBUG_LOG_SAMPLE_RATE, 0..1), truncated to IWAP_DEBUG_LOG_MAX_CHARS; failures are
+# always logged, with the same cap on the response body.
+IWAP_DEBUG_LOG_SAMPLE_RATE = _env_float("IWAP_DEBUG_LOG_SAMPLE_RATE", 0.05)
+IWAP_DEBUG_LOG_MAX_CHARS = _env_int("IWAP_DEBUG_LOG_MAX_CHARS", 1024)
+# Per-endpoint IWAP request telemetry (latency histograms, payload sizes, retries, failures
+# by status) is added to summary_round.json and written in the Prometheus text format to
+# IWAP_METRICS_TEXTFILE (default: IWAP_BACKUP_DIR/metrics/iwap_client.prom; "off" disables).
+IWAP_METRICS_TEXTFILE = (_env_str("IWAP_METRICS_TEXTFILE", "") or "").strip()
 
 MAX_TASK_DOLLAR_COST_USD = _env_float("MAX_TASK_DOLLAR_COST_USD", 0.05)
 
@@ -87,6 +151,25 @@ MIN_MINER_STAKE_ALPHA = _env_float("MIN_MINER_STAKE_ALPHA", 100.0, test_default=
 IPFS_API_URL = _env_str("IPFS_API_URL", "http://ipfs.metahash73.com:5001/api/v0")
 # Comma-separated gateways for fetch fallback
 IPFS_GATEWAYS = [gw.strip() for gw in (_env_str("IPFS_GATEWAYS", "https://ipfs.io/ipfs,https://cloudflare-ipfs.com/ipfs") or "").split(",") if gw.strip()]
+# Parallel snapshot downloads during consensus aggregation: at most
+# IPFS_FETCH_CONCURRENCY CIDs in flight, each bounded by IPFS_FETCH_TIMEOUT_SECONDS.
+IPFS_FETCH_CONCURRENCY = _env_int("IPFS_FETCH_CONCURRENCY", 8)
+IPFS_FETCH_TIMEOUT_SECONDS = _env_float("IPFS_FETCH_TIMEOUT_SECONDS", 30.0, test_default=5.0)
+# On-disk cache of downloaded IPFS payloads keyed by (verified) CID. Empty disables.
+IPFS_CACHE_DIR = _env_str("IPFS_CACHE_DIR", "data/ipfs_cache", test_default="")
+# Reads race the IPFS API against the IPFS_RACE_GATEWAYS best-ranked gateways.
+IPFS_RACE_GATEWAYS = _env_int("IPFS_RACE_GATEWAYS", 2)
+IPFS_MAX_PAYLOAD_BYTES = _env_int("IPFS_MAX_PAYLOAD_BYTES", 16 * 1024 * 1024)
+IPFS_ADD_RETRIES = _env_int("IPFS_ADD_RETRIES", 3, test_default=1)
+# After publishing our snapshot, re-read commitments every N blocks and download
+# peers' snapshots in the background so aggregation only fetches late CIDs. 0 disables.
+SNAPSHOT_PREFETCH_INTERVAL_BLOCKS = _env_int("SNAPSHOT_PREFETCH_INTERVAL_BLOCKS", 3, test_default=0)
+# Refresh the metagraph in the background every N blocks on its own connection;
+# handshake and consensus read the latest snapshot instead of a live RPC. 0 disables.
+METAGRAPH_REFRESH_INTERVAL_BLOCKS = _env_int("METAGRAPH_REFRESH_INTERVAL_BLOCKS", 25, test_default=0)
+# Follow new chain heads on a dedicated websocket so block reads/waits resolve as
+# blocks land; when off (or disconnected) the block clock polls adaptively.
+BLOCK_CLOCK_SUBSCRIBE = _env_bool("BLOCK_CLOCK_SUBSCRIBE", True, test_default=False)
 # Retry policy for finish_round when backend blocks non-main validator writes.
 # Optional via env:
 # - FINISH_ROUND_MAX_RETRIES
@@ -152,6 +235,13 @@ SANDBOX_AGENT_RETURN_METRICS = _env_bool("SANDBOX_AGENT_RETURN_METRICS", False)
 # ═══════════════════════════════════════════════════════════════════════════
 
 CONSENSUS_VERSION = _env_int("CONSENSUS_VERSION", 1)
+# Snapshot wire format, advertised through the commitment "v": JSON snapshots are
+# committed as CONSENSUS_VERSION, columnar msgpack ones as CONSENSUS_COLUMNAR_VERSION.
+# Readers accept both; publish "columnar" once peers run a release that reads it.
+CONSENSUS_COLUMNAR_VERSION = _env_int("CONSENSUS_COLUMNAR_VERSION", 2)
+CONSENSUS_SNAPSHOT_FORMAT = (_env_str("CONSENSUS_SNAPSHOT_FORMAT", "json") or "json").strip().lower()
+# gzip | zstd | none. zstd needs the optional `zstandard` package (on both ends); falls back to gzip.
+CONSENSUS_SNAPSHOT_COMPRESSION = (_env_str("CONSENSUS_SNAPSHOT_COMPRESSION", "gzip") or "gzip").strip().lower()
 MIN_VALIDATOR_STAKE_FOR_CONSENSUS_TAO = _env_float(
     "MIN_VALIDATOR_STAKE_FOR_CONSENSUS_TAO",
     10000.0,
@@ -9,6 +9,7 @@ from autoppia_web_agents_subnet.validator.evaluation.rewards import calculate_re
 from autoppia_web_agents_subnet.validator import config as validator_config
 from autoppia_web_agents_subnet.validator.round_manager import RoundPhase
 from autoppia_web_agents_subnet.utils.logging import ColoredLogger
+from autoppia_web_agents_subnet.platform.utils.evaluation_uploader import IWAPEvaluationUploader
 from autoppia_web_agents_subnet.opensource.utils_git import (
     normalize_and_validate_github_url,
     resolve_remote_ref_commit,
@@ -680,34 +681,19 @@ class ValidatorEvaluationMixin:
                             }
                         )
 
-                    # Submit batch evaluations to IWAP
+                    # Hand the batch to the background IWAP uploader (inline when it is disabled).
                     if batch_eval_data:
                         try:
-                            submitted = await self._submit_batch_evaluations_to_iwap(
-                                agent_uid=agent.uid,
-                                batch_eval_data=batch_eval_data,
-                            )
-                            if submitted:
-                                ColoredLogger.info(
-                                    f"✅ Submitted {len(batch_eval_data)} evaluations to IWAP for agent {agent.uid}",
-                                    ColoredLogger.GREEN,
-                                )
+                            uploader = getattr(self, "iwap_uploader", None)
+                            if isinstance(uploader, IWAPEvaluationUploader) and getattr(self, "current_round_id", None):
+                                await uploader.put(self.current_round_id, agent.uid, batch_eval_data)
                             else:
-                                ColoredLogger.warning(
-                                    f"IWAP submission skipped for agent {agent.uid}; evaluations kept local only",
-                                    ColoredLogger.YELLOW,
-                                )
+                                await self._deliver_batch_evaluations_to_iwap(agent_uid=agent.uid, batch_eval_data=batch_eval_data)
                         except Exception as e:
                             ColoredLogger.error(
                                 f"Failed to submit batch evaluations to IWAP for agent {agent.uid}: {e}",
                                 ColoredLogger.RED,
                             )
-                        try:
-                            uploader = getattr(self, "_upload_round_log_snapshot", None)
-                            if callable(uploader):
-                                await uploader(reason=f"evaluation_batch_uid_{agent.uid}")
-                        except Exception:
-                            pass
 
                     if stop_for_cost_limit_streak:
                         break
@@ -744,6 +730,82 @@ class ValidatorEvaluationMixin:
         ColoredLogger.info("Evaluation phase completed", ColoredLogger.MAGENTA)
         return agents_evaluated
 
+    async def _deliver_batch_evaluations_to_iwap(self, *, agent_uid: int, batch_eval_data: list) -> None:
+        """Submit one batch and refresh the round log; failures are logged, never raised."""
+        try:
+            submitted = await self._submit_batch_evaluations_to_iwap(
+                agent_uid=agent_uid,
+                batch_eval_data=batch_eval_data,
+            )
+            if submitted:
+                ColoredLogger.info(
+                    f"✅ Submitted {len(batch_eval_data)} evaluations to IWAP for agent {agent_uid}",
+                    ColoredLogger.GREEN,
+                )
+            else:
+                ColoredLogger.warning(
+                    f"IWAP submission skipped for agent {agent_uid}; evaluations kept local only",
+                    ColoredLogger.YELLOW,
+                )
+        except Exception as e:
+            ColoredLogger.error(
+                f"Failed to submit batch evaluations to IWAP for agent {agent_uid}: {e}",
+                ColoredLogger.RED,
+            )
+        try:
+            uploader = getattr(self, "_upload_round_log_snapshot", None)
+            if callable(uploader):
+                await uploader(reason=f"evaluation_batch_uid_{agent_uid}")
+        except Exception:
+            pass
+
+    def _record_gif_upload(self, evaluation_id: str, outcome: dict) -> None:
+        """Keep a GIF upload outcome for this round's summary_round.json (see summarize_gif_uploads)."""
+        outcomes = getattr(self, "gif_upload_outcomes", None)
+        if not isinstance(outcomes, dict):
+            outcomes = self.gif_upload_outcomes = {}
+        outcomes[evaluation_id] = outcome
+
+    async def _upload_evaluation_gifs(self, agent_uid: int, pending_gif_uploads: list[tuple[str, object]]) -> None:
+        """
+        Hand a batch's GIFs to the GIF upload pool (or, without one, upload them
+        one by one). Each outcome is kept per evaluation id for the round
+        summary; a failed GIF never fails the batch.
+        """
+        from autoppia_web_agents_subnet.platform.utils.gif_uploader import GIFUploadPool
+        from autoppia_web_agents_subnet.platform.utils.iwa_core import extract_gif_bytes
+
+        pool = getattr(self, "gif_upload_pool", None)
+        queued = uploaded = skipped = 0
+        for evaluation_id, gif_payload in pending_gif_uploads:
+            gif_bytes = extract_gif_bytes(gif_payload)
+            if not gif_bytes:
+                skipped += 1
+                self._record_gif_upload(evaluation_id, {"status": "skipped", "error": "invalid GIF payload"})
+                ColoredLogger.warning(
+                    f"Skipping GIF upload for evaluation_id={evaluation_id}: invalid payload",
+                    ColoredLogger.YELLOW,
+                )
+                continue
+            if isinstance(pool, GIFUploadPool):
+                pool.submit(evaluation_id, gif_bytes, on_done=lambda result: self._record_gif_upload(result.evaluation_id, result.as_metadata()))
+                queued += 1
+                continue
+            try:
+                url = await self.iwap_client.upload_evaluation_gif(evaluation_id, gif_bytes)
+                uploaded += 1
+                self._record_gif_upload(evaluation_id, {"status": "uploaded", "attempts": 1, "bytes": len(gif_bytes), "url": url})
+            except Exception as gif_exc:
+                self._record_gif_upload(evaluation_id, {"status": "failed", "bytes": len(gif_bytes), "error": f"{type(gif_exc).__name__}: {gif_exc}"})
+                ColoredLogger.error(
+                    f"Failed GIF upload for evaluation_id={evaluation_id}: {gif_exc}",
+                    ColoredLogger.RED,
+                )
+        ColoredLogger.info(
+            f"GIF upload summary for agent {agent_uid}: queued={queued} uploaded={uploaded} skipped={skipped} total={len(pending_gif_uploads)}",
+            ColoredLogger.CYAN,
+        )
+
     async def _submit_batch_evaluations_to_iwap(
         self,
         *,
@@ -776,6 +838,11 @@ class ValidatorEvaluationMixin:
         if getattr(self, "_iwap_shadow_mode", False):
             ColoredLogger.warning("IWAP shadow mode enabled, continuing IWAP submission with idempotent writes", ColoredLogger.YELLOW)
 
+        if isinstance(getattr(self, "current_agent_runs", None), dict) and agent_uid not in self.current_agent_runs:
+            # Registration may still be retrying in the background.
+            from autoppia_web_agents_subnet.platform.utils.round_flow import wait_for_miner_registration
+
+            await wait_for_miner_registration(self, agent_uid)
         if not hasattr(self, "current_agent_runs") or agent_uid not in self.current_agent_runs:
             ColoredLogger.warning(f"No agent run found for agent {agent_uid}, skipping IWAP submission", ColoredLogger.YELLOW)
             return False
@@ -784,7 +851,6 @@ class ValidatorEvaluationMixin:
 
         # Prepare all evaluation payloads
         from autoppia_web_agents_subnet.platform.utils.task_flow import prepare_evaluation_payload
-        from autoppia_web_agents_subnet.platform.utils.iwa_core import extract_gif_bytes
 
         evaluations_batch = []
         pending_gif_uploads: list[tuple[str, object]] = []
@@ -1032,7 +1098,17 @@ class ValidatorEvaluationMixin:
                 )
                 created = int(result.get("evaluations_created") or 0) if isinstance(result, dict) else 0
                 total = int(result.get("total_requested") or len(evaluations_batch)) if isinstance(result, dict) else len(evaluations_batch)
-                if created < total:
+                deferred = isinstance(result, dict) and bool(result.get("deferred"))
+                duplicate = isinstance(result, dict) and bool(result.get("duplicate"))
+                if duplicate:
+                    ColoredLogger.info(f"{total} evaluations for agent {agent_uid} were already delivered to IWAP", ColoredLogger.GREEN)
+                elif deferred:
+                    # Persisted in the IWAP outbox; the drainer replays it (and the GIFs below) in order.
+                    ColoredLogger.warning(
+                        f"IWAP unreachable; {total} evaluations for agent {agent_uid} queued in the outbox",
+                        ColoredLogger.YELLOW,
+                    )
+                elif created < total:
                     ColoredLogger.error(
                         f"Batch submission incomplete: created={created} total={total} message={result.get('message')}",
                         ColoredLogger.RED,
@@ -1045,30 +1121,8 @@ class ValidatorEvaluationMixin:
                 # Batch endpoint stores evaluations but does not upload GIF binaries.
                 # Upload each GIF separately using the deterministic evaluation_id.
                 if pending_gif_uploads:
-                    uploaded = 0
-                    skipped = 0
-                    for evaluation_id, gif_payload in pending_gif_uploads:
-                        gif_bytes = extract_gif_bytes(gif_payload)
-                        if not gif_bytes:
-                            skipped += 1
-                            ColoredLogger.warning(
-                                f"Skipping GIF upload for evaluation_id={evaluation_id}: invalid payload",
-                                ColoredLogger.YELLOW,
-                            )
-                            continue
-                        try:
-                            await self.iwap_client.upload_evaluation_gif(evaluation_id, gif_bytes)
-                            uploaded += 1
-                        except Exception as gif_exc:
-                            ColoredLogger.error(
-                                f"Failed GIF upload for evaluation_id={evaluation_id}: {gif_exc}",
-                                ColoredLogger.RED,
-                            )
-                    ColoredLogger.info(
-                        f"GIF upload summary for agent {agent_uid}: uploaded={uploaded} skipped={skipped} total={len(pending_gif_uploads)}",
-                        ColoredLogger.CYAN,
-                    )
-                return created > 0
+                    await self._upload_evaluation_gifs(agent_uid, pending_gif_uploads)
+                return created > 0 or deferred or duplicate
             except Exception as e:
                 ColoredLogger.error(f"Failed to submit batch: {e}", ColoredLogger.RED)
                 raise
@@ -8,6 +8,7 @@ from collections import Counter
 from pathlib import Path
 import bittensor as bt
 
+from autoppia_web_agents_subnet.base.utils.metagraph_snapshot import log_metagraph_staleness, metagraph_view
 from autoppia_web_agents_subnet.opensource.utils_docker import get_client
 from autoppia_web_agents_subnet.utils.log_colors import round_details_tag
 from autoppia_web_agents_subnet.utils.logging import ColoredLogger
@@ -314,11 +315,13 @@ class ValidatorRoundStartMixin:
         except Exception:
             pass
 
-        # Guard: metagraph must be available.
-        metagraph = getattr(self, "metagraph", None)
+        # Guard: metagraph must be available. Prefer the background-refreshed
+        # snapshot so the handshake never waits on a metagraph RPC.
+        metagraph = metagraph_view(self)
         if metagraph is None:
             bt.logging.warning("No metagraph on validator; skipping handshake")
             return
+        log_metagraph_staleness(self, "handshake")
 
         n = int(getattr(metagraph, "n", 0) or 0)
         if n <= 0:
@@ -1,21 +1,31 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
+import asyncio
 import re
 
 import bittensor as bt
+import numpy as np
 from bittensor import AsyncSubtensor  # type: ignore
 
 from autoppia_web_agents_subnet.validator.config import (
+    CONSENSUS_COLUMNAR_VERSION,
+    CONSENSUS_SNAPSHOT_COMPRESSION,
+    CONSENSUS_SNAPSHOT_FORMAT,
     CONSENSUS_VERSION,
     MIN_VALIDATOR_STAKE_FOR_CONSENSUS_TAO,
     IPFS_API_URL,
+    IPFS_FETCH_CONCURRENCY,
+    IPFS_FETCH_TIMEOUT_SECONDS,
+    SNAPSHOT_PREFETCH_INTERVAL_BLOCKS,
 )
+from autoppia_web_agents_subnet.base.utils.metagraph_snapshot import log_metagraph_staleness, metagraph_view
 from autoppia_web_agents_subnet.utils.commitments import (
     read_all_plain_commitments,
     write_plain_commitment_json,
 )
-from autoppia_web_agents_subnet.utils.ipfs_client import add_json_async, get_json_async
+from autoppia_web_agents_subnet.utils.ipfs_client import CIDMismatchError, add_bytes_async, add_json_async, get_json_async
+from autoppia_web_agents_subnet.utils.snapshot_codec import encode_snapshot
 from autoppia_web_agents_subnet.utils.log_colors import ipfs_tag, consensus_tag
 from autoppia_web_agents_subnet.validator.round_manager import RoundPhase
 from autoppia_web_agents_subnet.platform.client import compute_season_number
@@ -132,28 +142,172 @@ def _normalize_rewards_map(raw_scores: Dict[Any, Any]) -> Dict[str, float]:
     return normalized
 
 
-def _extract_metric_value(entry: dict, *keys: str) -> Optional[float]:
-    for key in keys:
-        if key not in entry:
-            continue
-        try:
-            return float(entry.get(key))
-        except Exception:
-            continue
-    return None
+# Per-miner metrics merged across validators, in addition to the published reward:
+# (name, accepted keys in priority order, int-valued).
+_CONSENSUS_METRICS = (
+    ("avg_reward", ("avg_reward", "reward"), False),
+    ("avg_eval_score", ("avg_eval_score",), False),
+    ("avg_eval_time", ("avg_eval_time", "avg_evaluation_time"), False),
+    ("avg_cost", ("avg_cost", "avg_cost_per_task"), False),
+    ("tasks_sent", ("tasks_sent", "tasks_attempted"), True),
+    ("tasks_success", ("tasks_success", "tasks_completed"), True),
+)
+# Matrix columns are indexed by uid while the uid span stays within this many times the
+# number of distinct uids (plus a small floor); sparser uid sets are compacted with np.unique.
+_DENSE_SPAN_FACTOR = 4
+_DENSE_SPAN_FLOOR = 1024
+_MAX_UID = (1 << 63) - 1
 
 
-def _extract_int_metric_value(entry: dict, *keys: str) -> Optional[int]:
-    for key in keys:
-        if key not in entry:
-            continue
+def _metagraph_size(metagraph: Any) -> Optional[int]:
+    """Number of uids in the metagraph (`n`, else len(hotkeys)), or None when unknown."""
+    n = getattr(metagraph, "n", None)
+    if hasattr(n, "item") and not isinstance(n, (int, np.integer)):
         try:
-            return int(entry.get(key))
+            n = n.item()
         except Exception:
-            continue
+            n = None
+    if isinstance(n, (int, np.integer)) and not isinstance(n, bool) and n > 0:
+        return int(n)
+    hotkeys = getattr(metagraph, "hotkeys", None)
+    if isinstance(hotkeys, (list, tuple)) and hotkeys:
+        return len(hotkeys)
     return None
 
 
+class _ConsensusMatrix:
+    """
+    Stake-weighted merge of validator snapshots on dense validator x miner arrays.
+
+    Snapshot entries are collected into flat per-layer (miner uid, value)
+    columns while parsing (layer 0 is the published reward, then each
+    _CONSENSUS_METRICS entry, then handshake_ok as 0/1). `reduce()` scatters
+    them into one stacked layers x validators x miners array plus a matching
+    count mask and contracts both with the stake-weight vector. Missing
+    entries have a zero mask, so each miner is averaged only over the
+    validators that reported it. Uids outside [0, n_uids) are ignored, so a
+    single peer cannot inflate the matrix or overflow the int64 uid column.
+    """
+
+    N_LAYERS = 2 + len(_CONSENSUS_METRICS)
+
+    def __init__(self, n_uids: Optional[int] = None) -> None:
+        self.uid_limit = min(int(n_uids), _MAX_UID) if n_uids is not None else _MAX_UID
+        self.weights: list[float] = []
+        self._uids: list[list[int]] = [[] for _ in range(self.N_LAYERS)]
+        self._values: list[list[float]] = [[] for _ in range(self.N_LAYERS)]
+        # Per layer, the column length after each validator (to rebuild row indices).
+        self._row_ends: list[list[int]] = [[] for _ in range(self.N_LAYERS)]
+
+    def add_snapshot(self, weight: float, rewards: Dict[Any, Any], miner_metrics: Any) -> Dict[int, float]:
+        """Add one validator's published rewards/miner_metrics; returns its {uid: reward} map."""
+        per_val_map: Dict[int, float] = {}
+        reward_uids, reward_values = self._uids[0], self._values[0]
+        for uid_s, sc in rewards.items():
+            try:
+                uid = int(uid_s)
+                val = float(sc)
+            except Exception:
+                continue
+            if not 0 <= uid < self.uid_limit:
+                continue
+            reward_uids.append(uid)
+            reward_values.append(val)
+            per_val_map[uid] = val
+
+        if isinstance(miner_metrics, dict):
+            metric_columns = [(self._uids[layer].append, self._values[layer].append, keys, is_int) for layer, (_name, keys, is_int) in enumerate(_CONSENSUS_METRICS, start=1)]
+            handshake_uids, handshake_values = self._uids[-1], self._values[-1]
+            for uid_raw, entry_raw in miner_metrics.items():
+                if not isinstance(entry_raw, dict):
+                    continue
+                try:
+                    metric_uid = int(entry_raw.get("miner_uid", uid_raw))
+                except Exception:
+                    try:
+                        metric_uid = int(uid_raw)
+                    except Exception:
+                        continue
+                if not 0 <= metric_uid < self.uid_limit:
+                    continue
+                for add_uid, add_value, keys, is_int in metric_columns:
+                    value = None
+                    for key in keys:
+                        raw = entry_raw.get(key)
+                        if raw is None and key not in entry_raw:
+                            continue
+                        # First present key that converts wins; int-valued metrics go through int().
+                        if raw.__class__ is float and not is_int:
+                            value = raw
+                            break
+                        try:
+                            value = float(int(raw)) if is_int else float(raw)
+                            break
+                        except Exception:
+                            continue
+                    if value is None and keys[0] == "avg_reward":
+                        value = per_val_map.get(metric_uid)
+                    if value is not None:
+                        add_uid(metric_uid)
+                        add_value(value)
+                handshake_ok = entry_raw.get("handshake_ok")
+                if isinstance(handshake_ok, bool):
+                    handshake_uids.append(metric_uid)
+                    handshake_values.append(1.0 if handshake_ok else 0.0)
+
+        self.weights.append(float(weight))
+        for layer in range(self.N_LAYERS):
+            self._row_ends[layer].append(len(self._uids[layer]))
+        return per_val_map
+
+    def reduce(self) -> tuple[Dict[int, float], Dict[int, Dict[str, Any]]]:
+        """Return (consensus_rewards, stats_by_miner) like the per-dict accumulation did."""
+        if not self.weights or not any(self._uids):
+            return {}, {}
+        weights = np.asarray(self.weights, dtype=np.float64)
+        n_validators = len(weights)
+        uids = np.concatenate([np.fromiter(col, dtype=np.int64, count=len(col)) for col in self._uids])
+        span = int(uids.max()) + 1
+        if span <= _DENSE_SPAN_FLOOR:
+            # Metagraph uids are small: index columns by uid directly and skip the sort in np.unique.
+            miners, cols = np.arange(span), uids
+        else:
+            miners, cols = np.unique(uids, return_inverse=True)
+            if span <= _DENSE_SPAN_FACTOR * len(miners):
+                miners, cols = np.arange(span), uids
+        n_miners = len(miners)
+        rows = np.concatenate([np.repeat(np.arange(n_validators), np.diff(np.asarray([0] + ends))) for ends in self._row_ends])
+        layers = np.repeat(np.arange(self.N_LAYERS), [len(col) for col in self._uids])
+        flat = (layers * n_validators + rows) * n_miners + cols
+        size = self.N_LAYERS * n_validators * n_miners
+        shape = (self.N_LAYERS, n_validators, n_miners)
+        # bincount sums duplicates, so a uid listed twice in one snapshot still counts twice.
+        values = np.bincount(flat, weights=np.concatenate([np.fromiter(col, dtype=np.float64, count=len(col)) for col in self._values]), minlength=size).reshape(shape)
+        mask = np.bincount(flat, minlength=size).astype(np.float64).reshape(shape)
+
+        numerator = np.einsum("v,kvm->km", weights, values)
+        denominator = np.einsum("v,kvm->km", weights, mask)
+        present = denominator > 0.0
+        means = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=present)
+
+        rewards = dict(zip(miners[present[0]].tolist(), means[0][present[0]].tolist()))
+
+        stats_by_miner: Dict[int, Dict[str, Any]] = {}
+        metric_present = present[1:].T.tolist()
+        metric_means = means[1:].T.tolist()
+        for col in np.flatnonzero(present[1:].any(axis=0)).tolist():
+            entry: Dict[str, Any] = {}
+            col_present, col_means = metric_present[col], metric_means[col]
+            for layer, (name, _keys, is_int) in enumerate(_CONSENSUS_METRICS):
+                if col_present[layer]:
+                    entry[name] = int(round(col_means[layer])) if is_int else col_means[layer]
+            if col_present[-1]:
+                entry["handshake_ok_ratio"] = col_means[-1]
+                entry["handshake_ok"] = bool(col_means[-1] >= 0.5)
+            stats_by_miner[int(miners[col])] = entry
+        return rewards, stats_by_miner
+
+
 def _eligibility_status_is_valid(status: Any) -> bool:
     return str(status or "").strip().lower() in {"handshake_valid", "reused", "evaluated"}
 
@@ -275,6 +429,121 @@ def _hotkey_to_uid_map(metagraph) -> Dict[str, int]:
     return mapping
 
 
+async def _fetch_snapshot_payloads(cids: Iterable[str], prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Download snapshot payloads for `cids` concurrently.
+
+    At most IPFS_FETCH_CONCURRENCY downloads run at once and each CID gets its
+    own IPFS_FETCH_TIMEOUT_SECONDS deadline, so one slow gateway cannot stall the
+    whole settlement. CIDs already in `prefetched` are not downloaded again.
+    Returns {cid: get_json_async result or the raised exception}.
+    """
+    known = dict(prefetched or {})
+    unique = [cid for cid in dict.fromkeys(cids) if cid not in known]
+    if not unique:
+        return known
+    sem = asyncio.Semaphore(max(1, int(IPFS_FETCH_CONCURRENCY)))
+    timeout = float(IPFS_FETCH_TIMEOUT_SECONDS)
+
+    async def _one(cid: str):
+        async with sem:
+            if timeout > 0:
+                return await asyncio.wait_for(get_json_async(cid, api_url=IPFS_API_URL), timeout=timeout)
+            return await get_json_async(cid, api_url=IPFS_API_URL)
+
+    results = await asyncio.gather(*(_one(cid) for cid in unique), return_exceptions=True)
+    known.update(zip(unique, results))
+    return known
+
+
+def _accepted_consensus_versions() -> frozenset[int]:
+    """Commitment "v" values we can read: JSON and columnar snapshots."""
+    return frozenset({int(CONSENSUS_VERSION), int(CONSENSUS_COLUMNAR_VERSION)})
+
+
+def _round_commitment_cid(entry: Any, *, consensus_versions: Iterable[int], season_number: int, round_number: int) -> Optional[str]:
+    """CID of a commitment for an accepted consensus version and this season/round, else None."""
+    if not isinstance(entry, dict):
+        return None
+    try:
+        if int(entry.get("v", CONSENSUS_VERSION)) not in set(consensus_versions):
+            return None
+        if int(entry.get("s", season_number)) != int(season_number):
+            return None
+        if int(entry.get("r", -1)) != int(round_number):
+            return None
+    except Exception:
+        return None
+    cid = entry.get("c")
+    return cid if isinstance(cid, str) and cid else None
+
+
+class SnapshotPrefetcher:
+    """
+    Background download of peer snapshots while settlement waits for the fetch block.
+
+    Started right after our own publish: every `interval_blocks` it re-reads the
+    commitments and downloads any new CID for the round being settled, keeping
+    the successful results in memory. `stop()` hands them to
+    aggregate_scores_from_commitments(prefetched=...), which then only downloads
+    the commitments that appeared late. Failed downloads are retried on the
+    next poll; stake and validator_version filtering stay in aggregation.
+    """
+
+    def __init__(self, validator: Any, st: AsyncSubtensor, *, interval_blocks: int = SNAPSHOT_PREFETCH_INTERVAL_BLOCKS, seconds_per_block: float = 12.0) -> None:
+        self.validator = validator
+        self.st = st
+        self.interval_s = max(0.01, float(interval_blocks) * float(seconds_per_block))
+        self.season_number, self.round_number = _resolve_expected_season_round(validator, validator.block)
+        self.payloads: Dict[str, Any] = {}
+        self.polls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def poll_once(self) -> int:
+        """Fetch CIDs committed since the last poll; returns how many were newly downloaded."""
+        # The head comes from the neuron's block clock, so polls between blocks hit the reader cache.
+        commits = await read_all_plain_commitments(self.st, netuid=self.validator.config.netuid, block=self.validator.block)
+        self.polls += 1
+        cids = []
+        versions = _accepted_consensus_versions()
+        for entry in (commits or {}).values():
+            cid = _round_commitment_cid(entry, consensus_versions=versions, season_number=self.season_number, round_number=self.round_number)
+            if cid and cid not in self.payloads:
+                cids.append(cid)
+        if not cids:
+            return 0
+        results = await _fetch_snapshot_payloads(cids)
+        fresh = 0
+        for cid, result in results.items():
+            if not isinstance(result, BaseException):
+                self.payloads[cid] = result
+                fresh += 1
+        bt.logging.info(consensus_tag(f"Prefetch | round {self.round_number} | +{fresh} snapshots ({len(self.payloads)} cached)"))
+        return fresh
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                bt.logging.warning(consensus_tag(f"Prefetch poll failed: {type(e).__name__}: {e}"))
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, Any]:
+        """Cancel polling and return {cid: get_json_async result} of what was prefetched."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        return dict(self.payloads)
+
+
 async def publish_round_snapshot(
     self,
     *,
@@ -293,7 +562,9 @@ async def publish_round_snapshot(
     )
 
     current_block = self.block
-    consensus_version = CONSENSUS_VERSION
+    columnar = CONSENSUS_SNAPSHOT_FORMAT == "columnar"
+    # The commitment "v" tells readers which snapshot format to expect.
+    consensus_version = CONSENSUS_COLUMNAR_VERSION if columnar else CONSENSUS_VERSION
     season_number, round_number = _resolve_expected_season_round(self, current_block)
     boundaries = self.round_manager.get_current_boundaries()
     start_epoch = int(boundaries["round_start_epoch"])
@@ -348,13 +619,21 @@ async def publish_round_snapshot(
         bt.logging.info(ipfs_tag("UPLOAD", f"Round {payload.get('r')} | {len(payload.get('rewards', {}))} miners"))
         bt.logging.info(ipfs_tag("UPLOAD", f"Payload: {payload_json}"))
 
-        cid, sha_hex, byte_len = await add_json_async(
-            payload,
-            filename=f"autoppia_commit_r{payload['r'] or 'X'}.json",
-            api_url=IPFS_API_URL,
-            pin=True,
-            sort_keys=True,
-        )
+        if columnar:
+            cid, sha_hex, byte_len = await add_bytes_async(
+                encode_snapshot(payload, compression=CONSENSUS_SNAPSHOT_COMPRESSION),
+                filename=f"autoppia_commit_r{payload['r'] or 'X'}.snap",
+                api_url=IPFS_API_URL,
+                pin=True,
+            )
+        else:
+            cid, sha_hex, byte_len = await add_json_async(
+                payload,
+                filename=f"autoppia_commit_r{payload['r'] or 'X'}.json",
+                api_url=IPFS_API_URL,
+                pin=True,
+                sort_keys=True,
+            )
 
         bt.logging.success(ipfs_tag("UPLOAD", f"✅ SUCCESS - CID: {cid}"))
         bt.logging.info(ipfs_tag("UPLOAD", f"Size: {byte_len} bytes | SHA256: {sha_hex[:16]}..."))
@@ -416,6 +695,7 @@ async def aggregate_scores_from_commitments(
     self,
     *,
     st: AsyncSubtensor,
+    prefetched: Optional[Dict[str, Any]] = None,
 ) -> tuple[Dict[int, float], Dict[str, Any]]:
     """
     Read validators' commitments for the current round and compute consensus metrics.
@@ -433,10 +713,15 @@ async def aggregate_scores_from_commitments(
             "validators": [ {"hotkey": str, "uid": int|"?", "stake": float, "cid": str} ],
             "scores_by_validator": { hotkey: { uid: reward } }
           }
+
+    `prefetched` maps CID -> get_json_async result for snapshots already
+    downloaded by a SnapshotPrefetcher; only the remaining CIDs are fetched.
     """
-    # Build hotkey->uid and stake map
-    hk_to_uid = _hotkey_to_uid_map(self.metagraph)
-    stake_list = getattr(self.metagraph, "stake", None)
+    # Build hotkey->uid and stake map from the latest metagraph snapshot
+    metagraph = metagraph_view(self)
+    log_metagraph_staleness(self, "consensus")
+    hk_to_uid = _hotkey_to_uid_map(metagraph)
+    stake_list = getattr(metagraph, "stake", None)
 
     def stake_for_hk(hk: str) -> float:
         try:
@@ -448,12 +733,12 @@ async def aggregate_scores_from_commitments(
             return 0.0
 
     current_block = self.block
-    consensus_version = CONSENSUS_VERSION
+    accepted_versions = _accepted_consensus_versions()
     season_number, round_number = _resolve_expected_season_round(self, current_block)
 
     # Fetch all plain commitments and select those for this round (v5 with CID)
     try:
-        commits = await read_all_plain_commitments(st, netuid=self.config.netuid, block=None)
+        commits = await read_all_plain_commitments(st, netuid=self.config.netuid, block=current_block)
         bt.logging.info(consensus_tag(f"Aggregate | Expected round {round_number} | Commitments found: {len(commits or {})}"))
         if commits:
             bt.logging.info(consensus_tag(f"Found {len(commits)} validator commitments:"))
@@ -468,9 +753,7 @@ async def aggregate_scores_from_commitments(
     # cada uno se descarga ese CID y se obtiene ese JSON.
     bt.logging.info(f"[CONSENSUS] Filtering commitments for current round: {round_number}")
 
-    weighted_sum: Dict[int, float] = {}
-    weight_total: Dict[int, float] = {}
-    metric_acc: Dict[int, Dict[str, float]] = {}
+    matrix = _ConsensusMatrix(_metagraph_size(metagraph))
 
     included = 0
     skipped_legacy_consensus_version = 0
@@ -493,6 +776,7 @@ async def aggregate_scores_from_commitments(
     fetched: list[tuple[str, str, float]] = []
     scores_by_validator: Dict[str, Dict[int, float]] = {}
     downloaded_payloads: list[Dict[str, Any]] = []
+    candidates: list[tuple[str, str, float, Any]] = []  # (hk, cid, stake, uid)
 
     for hk, entry in (commits or {}).items():
         if not isinstance(entry, dict):
@@ -502,16 +786,16 @@ async def aggregate_scores_from_commitments(
         # Backward compatible parsing: older commitments may omit v/s.
         raw_v = entry.get("v", None)
         if raw_v is None:
-            entry_consensus_version = int(consensus_version)
+            entry_consensus_version = int(CONSENSUS_VERSION)
         else:
             try:
                 entry_consensus_version = int(raw_v)
             except Exception:
                 entry_consensus_version = -1
-        if entry_consensus_version != int(consensus_version):
+        if entry_consensus_version not in accepted_versions:
             skipped_legacy_consensus_version += 1
             skipped_legacy_consensus_version_list.append((hk, entry_consensus_version))
-            bt.logging.debug(f"⏭️ Skip {hk[:10]}…: legacy consensus version (has v={entry_consensus_version}, need v={consensus_version})")
+            bt.logging.debug(f"⏭️ Skip {hk[:10]}…: legacy consensus version (has v={entry_consensus_version}, need v in {sorted(accepted_versions)})")
             continue
 
         raw_s = entry.get("s", None)
@@ -551,8 +835,17 @@ async def aggregate_scores_from_commitments(
             bt.logging.debug(f"⏭️ Skip {hk[:10]}…: low stake ({st_val:.1f}τ < {float(MIN_VALIDATOR_STAKE_FOR_CONSENSUS_TAO):.1f}τ)")
             continue
 
+        candidates.append((hk, cid, st_val, validator_uid))
+
+    # Download every eligible snapshot in parallel, then fold them in commitment order.
+    payloads_by_cid = await _fetch_snapshot_payloads((cid for _hk, cid, _st, _uid in candidates), prefetched=prefetched)
+
+    for hk, cid, st_val, validator_uid in candidates:
         try:
-            payload, _norm, _h = await get_json_async(cid, api_url=IPFS_API_URL)
+            fetched_result = payloads_by_cid.get(cid)
+            if isinstance(fetched_result, BaseException):
+                raise fetched_result
+            payload, _norm, _h = fetched_result
             import json
 
             payload_json = json.dumps(_payload_log_summary(payload), separators=(",", ":"), sort_keys=True)
@@ -567,6 +860,11 @@ async def aggregate_scores_from_commitments(
             miner_count = len(payload_rewards) if isinstance(payload_rewards, dict) else 0
             bt.logging.success(f"[IPFS] [DOWNLOAD] ✅ SUCCESS - Round {payload.get('r')} | {miner_count} miners | Stake: {st_val:.2f}τ")
             bt.logging.info("=" * 80)
+        except CIDMismatchError as e:
+            skipped_verification_fail += 1
+            skipped_verification_fail_list.append((hk, str(e)))
+            bt.logging.error(f"❌ IPFS CONTENT MISMATCH | cid={str(cid)[:20]} error={e}")
+            continue
         except Exception as e:
             skipped_ipfs += 1
             skipped_ipfs_list.append((hk, str(cid)))
@@ -594,91 +892,7 @@ async def aggregate_scores_from_commitments(
             continue
 
         # Record each validator's published per-miner reward map (converted to int uid).
-        per_val_map: Dict[int, float] = {}
-        effective_weight = st_val if st_val > 0.0 else 1.0
-        for uid_s, sc in rewards.items():
-            try:
-                uid = int(uid_s)
-                val = float(sc)
-            except Exception:
-                continue
-            weighted_sum[uid] = weighted_sum.get(uid, 0.0) + effective_weight * val
-            weight_total[uid] = weight_total.get(uid, 0.0) + effective_weight
-            per_val_map[uid] = val
-
-        miner_metrics = payload.get("miner_metrics")
-        if isinstance(miner_metrics, dict):
-            for uid_raw, entry_raw in miner_metrics.items():
-                if not isinstance(entry_raw, dict):
-                    continue
-                try:
-                    metric_uid = int(entry_raw.get("miner_uid", uid_raw))
-                except Exception:
-                    try:
-                        metric_uid = int(uid_raw)
-                    except Exception:
-                        continue
-                acc = metric_acc.setdefault(
-                    metric_uid,
-                    {
-                        "avg_reward_num": 0.0,
-                        "avg_reward_den": 0.0,
-                        "avg_eval_score_num": 0.0,
-                        "avg_eval_score_den": 0.0,
-                        "avg_eval_time_num": 0.0,
-                        "avg_eval_time_den": 0.0,
-                        "avg_cost_num": 0.0,
-                        "avg_cost_den": 0.0,
-                        "tasks_sent_num": 0.0,
-                        "tasks_sent_den": 0.0,
-                        "tasks_success_num": 0.0,
-                        "tasks_success_den": 0.0,
-                        "handshake_ok_num": 0.0,
-                        "handshake_ok_den": 0.0,
-                    },
-                )
-
-                avg_reward = _extract_metric_value(entry_raw, "avg_reward", "reward")
-                if avg_reward is None and metric_uid in per_val_map:
-                    avg_reward = float(per_val_map[metric_uid])
-                if avg_reward is not None:
-                    acc["avg_reward_num"] += effective_weight * float(avg_reward)
-                    acc["avg_reward_den"] += effective_weight
-
-                avg_eval_score = _extract_metric_value(entry_raw, "avg_eval_score")
-                if avg_eval_score is not None:
-                    acc["avg_eval_score_num"] += effective_weight * float(avg_eval_score)
-                    acc["avg_eval_score_den"] += effective_weight
-
-                avg_eval_time = _extract_metric_value(entry_raw, "avg_eval_time")
-                if avg_eval_time is None:
-                    avg_eval_time = _extract_metric_value(entry_raw, "avg_evaluation_time")
-                if avg_eval_time is not None:
-                    acc["avg_eval_time_num"] += effective_weight * float(avg_eval_time)
-                    acc["avg_eval_time_den"] += effective_weight
-
-                avg_cost = _extract_metric_value(entry_raw, "avg_cost")
-                if avg_cost is None:
-                    avg_cost = _extract_metric_value(entry_raw, "avg_cost_per_task")
-                if avg_cost is not None:
-                    acc["avg_cost_num"] += effective_weight * float(avg_cost)
-                    acc["avg_cost_den"] += effective_weight
-
-                tasks_sent = _extract_int_metric_value(entry_raw, "tasks_sent", "tasks_attempted")
-                if tasks_sent is not None:
-                    acc["tasks_sent_num"] += effective_weight * float(tasks_sent)
-                    acc["tasks_sent_den"] += effective_weight
-
-                tasks_success = _extract_int_metric_value(entry_raw, "tasks_success", "tasks_completed")
-                if tasks_success is not None:
-                    acc["tasks_success_num"] += effective_weight * float(tasks_success)
-                    acc["tasks_success_den"] += effective_weight
-
-                handshake_ok = entry_raw.get("handshake_ok")
-                if isinstance(handshake_ok, bool):
-                    acc["handshake_ok_den"] += effective_weight
-                    if handshake_ok:
-                        acc["handshake_ok_num"] += effective_weight
+        per_val_map = matrix.add_snapshot(st_val if st_val > 0.0 else 1.0, rewards, payload.get("miner_metrics"))
 
         included += 1
         fetched.append((hk, cid, st_val))
@@ -695,33 +909,7 @@ async def aggregate_scores_from_commitments(
             }
         )
 
-    result: Dict[int, float] = {}
-    for uid, wsum in weighted_sum.items():
-        denom = weight_total.get(uid, 0.0)
-        if denom > 0:
-            result[uid] = float(wsum / denom)
-
-    stats_by_miner: Dict[int, Dict[str, Any]] = {}
-    for uid, acc in metric_acc.items():
-        stats_entry: Dict[str, Any] = {}
-        if acc.get("avg_reward_den", 0.0) > 0.0:
-            stats_entry["avg_reward"] = float(acc["avg_reward_num"] / acc["avg_reward_den"])
-        if acc.get("avg_eval_score_den", 0.0) > 0.0:
-            stats_entry["avg_eval_score"] = float(acc["avg_eval_score_num"] / acc["avg_eval_score_den"])
-        if acc.get("avg_eval_time_den", 0.0) > 0.0:
-            stats_entry["avg_eval_time"] = float(acc["avg_eval_time_num"] / acc["avg_eval_time_den"])
-        if acc.get("avg_cost_den", 0.0) > 0.0:
-            stats_entry["avg_cost"] = float(acc["avg_cost_num"] / acc["avg_cost_den"])
-        if acc.get("tasks_sent_den", 0.0) > 0.0:
-            stats_entry["tasks_sent"] = int(round(acc["tasks_sent_num"] / acc["tasks_sent_den"]))
-        if acc.get("tasks_success_den", 0.0) > 0.0:
-            stats_entry["tasks_success"] = int(round(acc["tasks_success_num"] / acc["tasks_success_den"]))
-        if acc.get("handshake_ok_den", 0.0) > 0.0:
-            ratio = float(acc["handshake_ok_num"] / acc["handshake_ok_den"])
-            stats_entry["handshake_ok_ratio"] = ratio
-            stats_entry["handshake_ok"] = bool(ratio >= 0.5)
-        if stats_entry:
-            stats_by_miner[int(uid)] = stats_entry
+    result, stats_by_miner = matrix.reduce()
 
     if included > 0:
         all_stakes_zero = all(stake == 0.0 for _, _, stake in fetched)
@@ -7,6 +7,7 @@ from typing import Dict, Optional
 import bittensor as bt
 import numpy as np
 
+from autoppia_web_agents_subnet.base.utils.block_clock import block_clock_for
 from autoppia_web_agents_subnet.utils.logging import ColoredLogger
 from autoppia_web_agents_subnet.validator import config as validator_config
 from autoppia_web_agents_subnet.validator.config import BURN_AMOUNT_PERCENTAGE, BURN_UID
@@ -15,6 +16,7 @@ from autoppia_web_agents_subnet.validator.visualization.round_table import (
     render_round_summary_table,
 )
 from autoppia_web_agents_subnet.validator.settlement.consensus import (
+    SnapshotPrefetcher,
     publish_round_snapshot,
     aggregate_scores_from_commitments,
 )
@@ -84,7 +86,7 @@ class ValidatorSettlementMixin:
             try:
                 uploader = getattr(self, "_upload_round_log_snapshot", None)
                 if callable(uploader):
-                    await uploader(reason="settlement_late_skip", force=True, min_interval_seconds=0.0)
+                    await uploader(reason="settlement_late_skip", force=True, min_interval_seconds=0.0, final=True)
             except Exception:
                 pass
             self.round_manager.enter_phase(
@@ -163,6 +165,18 @@ class ValidatorSettlementMixin:
                 _ipfs_scores[str(int(uid))] = base_score
             await publish_round_snapshot(self, st=st, scores=_ipfs_scores)
 
+            # Download peers' snapshots as they get committed instead of all at the fetch block.
+            prefetcher: Optional[SnapshotPrefetcher] = None
+            prefetch_interval = int(getattr(validator_config, "SNAPSHOT_PREFETCH_INTERVAL_BLOCKS", 0) or 0)
+            if prefetch_interval > 0:
+                prefetcher = SnapshotPrefetcher(
+                    self,
+                    st,
+                    interval_blocks=prefetch_interval,
+                    seconds_per_block=self.round_manager.SECONDS_PER_BLOCK,
+                )
+                prefetcher.start()
+
             fetch_fraction = float(
                 getattr(
                     validator_config,
@@ -187,13 +201,16 @@ class ValidatorSettlementMixin:
                 fetch_block = int(fetch_block)
                 target_block = int(target_block)
 
-            await self._wait_until_specific_block(
-                target_block=fetch_block,
-                target_description=f"consensus fetch block ({fetch_fraction:.0%} of round)",
-            )
+            try:
+                await self._wait_until_specific_block(
+                    target_block=fetch_block,
+                    target_description=f"consensus fetch block ({fetch_fraction:.0%} of round)",
+                )
+            finally:
+                prefetched = await prefetcher.stop() if prefetcher is not None else None
 
             try:
-                scores, details = await aggregate_scores_from_commitments(self, st=st)
+                scores, details = await aggregate_scores_from_commitments(self, st=st, prefetched=prefetched)
                 # Persist consensus artifacts for finish_round payload building
                 # (ipfs_downloaded + post_consensus_evaluation reporting).
                 self._agg_scores_cache = scores
@@ -245,42 +262,28 @@ class ValidatorSettlementMixin:
             block=current_block,
             note=f"Waiting for target {target_description} to reach block {target_block}",
         )
-        last_log_time = time.time()
-        # Prevent indefinite hangs if chain reads fail persistently.
+        clock = block_clock_for(self)
+        # Prevent indefinite hangs if the chain stops producing blocks.
         blocks_to_wait = max(target_block - current_block, 0)
         expected_wait_s = max(60, blocks_to_wait * self.round_manager.SECONDS_PER_BLOCK)
         deadline = time.monotonic() + max(expected_wait_s * 3, 300)
-        consecutive_errors = 0
         while True:
-            if time.monotonic() > deadline:
-                raise TimeoutError(f"Timed out waiting for {target_description} at block {target_block}; last observed block={current_block}")
+            remaining_s = deadline - time.monotonic()
+            if remaining_s <= 0:
+                raise TimeoutError(f"Timed out waiting for {target_description} at block {target_block}; last observed block={clock.last_block}")
             try:
-                current_block = self.get_current_block(fresh=True)
-                consecutive_errors = 0
-                if current_block >= target_block:
-                    ColoredLogger.success(
-                        f"🎯 Target {target_description} reached at block {target_block}",
-                        ColoredLogger.GREEN,
-                    )
-                    break
-
-                blocks_remaining = max(target_block - current_block, 0)
-                minutes_remaining = (blocks_remaining * self.round_manager.SECONDS_PER_BLOCK) / 60
-                now = time.time()
-
-                if now - last_log_time >= 12:
-                    ColoredLogger.info(
-                        (f"Waiting — {target_description} — ~{minutes_remaining:.1f}m left — holding until block {target_block}"),
-                        ColoredLogger.BLUE,
-                    )
-                    last_log_time = now
-            except Exception as exc:
-                consecutive_errors += 1
-                bt.logging.warning(f"Failed to read current block during finalize wait: {exc}")
-                if consecutive_errors >= 5:
-                    raise RuntimeError(f"Failed to read current block 5 times while waiting for {target_description}") from exc
-
-            await asyncio.sleep(12)
+                await clock.wait_for_block(target_block, timeout=min(60.0, remaining_s))
+            except asyncio.TimeoutError:
+                ColoredLogger.info(
+                    (f"Waiting — {target_description} — ~{clock.eta(target_block) / 60:.1f}m left — holding until block {target_block}"),
+                    ColoredLogger.BLUE,
+                )
+                continue
+            ColoredLogger.success(
+                f"🎯 Target {target_description} reached at block {target_block}",
+                ColoredLogger.GREEN,
+            )
+            return
 
     async def _burn_all(
         self,